@@ -1,85 +1,90 @@
 import numpy as np
-import plotly.graph_objects as go
 from dash import Dash, Input, Output, Patch, callback, dcc, html
+from dash.exceptions import PreventUpdate
 
+import models.metrics as metrics
 import models.queries as q
 
 from models.config import (
-    GAUGE_COLUMNS,
-    BAR_COLUMNS,
     GAUGE_CONFIG,
+    GAUGE_SCORING,
     INJURY_CONFIG,
     BAR_CONFIG,
     TREND_CONFIG,
+    STARTUP_POLL_MS,
 )
+from models.instrumentation import traced
+from models.percentiles import percentile_index
+from models.refresher import readiness_probe, refresher
+from views.components import FIGURE_TEMPLATE, band_shape, line_shape, line_label
 
 
-# ====================== Gauge Helper Function ===================================
 def create_gauge(
     value: float, title: str, baseline: float | None = None, min_val=0, max_val=100
-) -> go.Figure:
+) -> dict:
     """Create a single gauge chart with scaled z-score (0-100).
 
     baseline: optional scaled score from the athlete's earliest test,
               rendered as a colored tick line on the gauge arc.
     """
-    fig = go.Figure(
-        go.Indicator(
-            mode="gauge+number",
-            value=value,
-            title={"text": title, "font": {"size": 14}},
-            number={"font": {"size": 24}},
-            gauge={
-                "axis": {"range": [min_val, max_val], "tickwidth": 1},
-                "bar": {"color": "#4a90d9"},
-                "bgcolor": "white",
-                "borderwidth": 2,
-                "bordercolor": "gray",
-                "steps": [
-                    {"range": [0, 25], "color": "#ffcccc"},
-                    {"range": [25, 50], "color": "#ffffcc"},
-                    {"range": [50, 75], "color": "#ccffcc"},
-                    {"range": [75, 100], "color": "#99ff99"},
-                ],
-                "threshold": {
-                    "line": {"color": "red", "width": 2},
-                    "thickness": 0.75,
-                    "value": 50,
+    domain = {"x": [0, 1], "y": [0, 1]}
+    return {
+        "data": [
+            {
+                "type": "indicator",
+                "mode": "gauge+number",
+                "value": value,
+                "title": {"text": title, "font": {"size": 14}},
+                "number": {"font": {"size": 24}},
+                "gauge": {
+                    "axis": {"range": [min_val, max_val], "tickwidth": 1},
+                    "bar": {"color": "#4a90d9"},
+                    "bgcolor": "white",
+                    "borderwidth": 2,
+                    "bordercolor": "gray",
+                    "steps": [
+                        {"range": [0, 25], "color": "#ffcccc"},
+                        {"range": [25, 50], "color": "#ffffcc"},
+                        {"range": [50, 75], "color": "#ccffcc"},
+                        {"range": [75, 100], "color": "#99ff99"},
+                    ],
+                    "threshold": {
+                        "line": {"color": "red", "width": 2},
+                        "thickness": 0.75,
+                        "value": 50,
+                    },
                 },
+                "domain": domain,
             },
-            domain={"x": [0, 1], "y": [0, 1]},
-        )
-    )
-
-    # Always include baseline overlay trace for consistent Patch structure
-    baseline_val = baseline if baseline is not None else 0
-    baseline_color = "orange" if baseline is not None else "rgba(0,0,0,0)"
-    fig.add_trace(
-        go.Indicator(
-            mode="gauge",
-            value=0,
-            gauge={
-                "axis": {"range": [min_val, max_val], "visible": False},
-                "bar": {"color": "rgba(0,0,0,0)"},
-                "bgcolor": "rgba(0,0,0,0)",
-                "borderwidth": 0,
-                "steps": [],
-                "threshold": {
-                    "line": {"color": baseline_color, "width": 2},
-                    "thickness": 0.75,
-                    "value": baseline_val,
+            {
+                # plotly drops the overlay's empty steps list
+                "type": "indicator",
+                "mode": "gauge",
+                "value": 0,
+                "gauge": {
+                    "axis": {"range": [min_val, max_val], "visible": False},
+                    "bar": {"color": "rgba(0,0,0,0)"},
+                    "bgcolor": "rgba(0,0,0,0)",
+                    "borderwidth": 0,
+                    "threshold": {
+                        "line": {
+                            "color": "orange" if baseline is not None else "rgba(0,0,0,0)",
+                            "width": 2,
+                        },
+                        "thickness": 0.75,
+                        "value": baseline if baseline is not None else 0,
+                    },
                 },
+                "domain": domain,
             },
-            domain={"x": [0, 1], "y": [0, 1]},
-        )
-    )
-
-    fig.update_layout(
-        height=200,
-        margin=dict(l=30, r=30, t=50, b=30),
-        paper_bgcolor="rgba(0,0,0,0)",
-    )
-    return fig
+        ],
+        "layout": {
+            "template": FIGURE_TEMPLATE,
+            "height": 200,
+            "margin": {"l": 30, "r": 30, "t": 50, "b": 30},
+            "paper_bgcolor": "rgba(0,0,0,0)",
+        },
+    }
 
 
 def scale_to_gauge(
@@ -97,7 +102,14 @@ def scale_to_gauge(
     return max(0.0, min(100.0, round(scaled, 1)))
 
 
-# ====================== Bar Graph Helper Function ===================================
+def percentile_to_gauge(rank: float, invert: bool = False) -> float:
+    """Convert a population percentile rank (0-100) to a 0-100 gauge score.
+
+    invert: if True, lower raw values (lower ranks) score higher on the gauge.
+    """
+    return round(100.0 - rank if invert else rank, 1)
+
+
 def create_bar_chart(
     athlete_value: float | None,
     athlete_avg: float | None,
@@ -105,58 +117,49 @@ def create_bar_chart(
     baseline: float | None,
     title: str,
     unit: str,
-) -> go.Figure:
+) -> dict:
     """Create a grouped bar chart with 3 bars and a team avg line overlay."""
     bar_values = [
         athlete_value if athlete_value is not None else 0,
         athlete_avg if athlete_avg is not None else 0,
         baseline if baseline is not None else 0,
     ]
-    bar_labels = ["Current Test", "Last 5 Avg", "Baseline"]
-    bar_colors = ["#4a90d9", "#7ec67e", "#f0ad4e"]
-
     team_avg_val = team_avg if team_avg is not None else 0
-
-    fig = go.Figure(
-        data=[
-            go.Bar(
-                x=bar_labels,
-                y=bar_values,
-                marker_color=bar_colors,
-                text=[f"{v:.2f}" for v in bar_values],
-                textposition="inside",
-                insidetextanchor="middle",
-                textfont=dict(size=14, color="white", family="Arial Black"),
-            )
-        ]
-    )
-
-    # Team avg as a horizontal line spanning the full chart
-    fig.add_hline(
-        y=team_avg_val,
-        line_dash="dash",
-        line_color="#d9534f",
-        line_width=2,
-        annotation_text=f"Team Avg: {team_avg_val:.2f}",
-        annotation_position="top right",
-        annotation_font_size=11,
-        annotation_font_color="#d9534f",
-    )
-
-    fig.update_layout(
-        title=dict(text=title, x=0.5, xanchor="center", font=dict(size=13)),
-        height=280,
-        margin=dict(l=40, r=20, t=50, b=40),
-        yaxis=dict(title=unit, gridcolor="lightgray"),
-        xaxis=dict(tickfont=dict(size=10)),
-        showlegend=False,
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        bargap=0.3,
-    )
-    return fig
+    return {
+        "data": [
+            {
+                "type": "bar",
+                "x": ["Current Test", "Last 5 Avg", "Baseline"],
+                "y": bar_values,
+                "marker": {"color": ["#4a90d9", "#7ec67e", "#f0ad4e"]},
+                "text": [f"{v:.2f}" for v in bar_values],
+                "textposition": "inside",
+                "insidetextanchor": "middle",
+                "textfont": {"size": 14, "color": "white", "family": "Arial Black"},
+            }
+        ],
+        "layout": {
+            "template": FIGURE_TEMPLATE,
+            "shapes": [line_shape("y", team_avg_val, "#d9534f", "dash")],
+            "annotations": [
+                line_label(team_avg_val, f"Team Avg: {team_avg_val:.2f}", "#d9534f", 11)
+            ],
+            "title": {"text": title, "x": 0.5, "xanchor": "center", "font": {"size": 13}},
+            "height": 280,
+            "margin": {"l": 40, "r": 20, "t": 50, "b": 40},
+            "yaxis": {"title": {"text": unit}, "gridcolor": "lightgray"},
+            "xaxis": {"tickfont": {"size": 10}},
+            "showlegend": False,
+            "paper_bgcolor": "rgba(0,0,0,0)",
+            "plot_bgcolor": "rgba(0,0,0,0)",
+            "bargap": 0.3,
+        },
+    }
 
 
+_default_gauges = {
+    gauge_id: create_gauge(50, title) for gauge_id, title, _col in GAUGE_CONFIG
+}
 _default_bar = create_bar_chart(0, 0, 0, 0, "—", "")
 _default_bars = {
     bar_id: create_bar_chart(0, 0, 0, 0, title, unit)
@@ -164,11 +167,7 @@ _default_bars = {
 }
 
 
-# ====================== Diverging Chart Helper Function ===================================
-def create_diverging_chart(
-    baseline_data: dict,
-    selected_data: dict,
-) -> go.Figure:
+def create_diverging_chart(baseline_data: dict, selected_data: dict) -> dict:
     """Create a horizontal diverging bar chart for injury risk asymmetry.
 
     Shows baseline vs selected test for each metric, overlaid.
@@ -176,219 +175,168 @@ def create_diverging_chart(
     """
     labels = [title for _, title, _ in INJURY_CONFIG]
     cols = [col for _, _, col in INJURY_CONFIG]
-
     baseline_vals = [float(baseline_data.get(c) or 0) for c in cols]
 
-    fig = go.Figure()
-
     if selected_data:
         selected_vals = [float(selected_data.get(c) or 0) for c in cols]
-        # Baseline trace (semi-transparent, behind)
-        fig.add_trace(
-            go.Bar(
-                y=labels,
-                x=baseline_vals,
-                orientation="h",
-                name="Baseline",
-                marker=dict(color="#f0ad4e", opacity=0.45),
-                text=[f"{v:.2f}" for v in baseline_vals],
-                textposition="auto",
-                textfont=dict(size=14),
-            )
-        )
-        # Selected test trace (solid, on top) — color by severity
-        selected_colors = []
-        for v in selected_vals:
-            abs_v = abs(v)
-            if abs_v < 11:
-                selected_colors.append("#7ec67e")
-            elif abs_v < 25:
-                selected_colors.append("#f5e642")
-            else:
-                selected_colors.append("#d9534f")
-        fig.add_trace(
-            go.Bar(
-                y=labels,
-                x=selected_vals,
-                orientation="h",
-                name="Current Test",
-                marker_color=selected_colors,
-                text=[f"{v:.2f}" for v in selected_vals],
-                textposition="auto",
-                textfont=dict(size=14),
-            )
-        )
+        selected_colors = [
+            "#7ec67e" if abs(v) < 11 else "#f5e642" if abs(v) < 25 else "#d9534f"
+            for v in selected_vals
+        ]
+        traces = [
+            ("Baseline", baseline_vals, {"color": "#f0ad4e", "opacity": 0.45}),
+            ("Current Test", selected_vals, {"color": selected_colors}),
+        ]
     else:
-        # No selected data or selected date is baseline — show baseline only
-        fig.add_trace(
-            go.Bar(
-                y=labels,
-                x=baseline_vals,
-                orientation="h",
-                name="Baseline (only test)",
-                marker_color="#f0ad4e",
-                text=[f"{v:.2f}" for v in baseline_vals],
-                textposition="auto",
-                textfont=dict(size=14),
-            )
-        )
+        selected_vals = []
+        traces = [("Baseline (only test)", baseline_vals, {"color": "#f0ad4e"})]
 
-    # Determine symmetric x-axis range
-    all_vals = baseline_vals + (
-        [float(selected_data.get(c) or 0) for c in cols] if selected_data else []
-    )
+    all_vals = baseline_vals + selected_vals
     max_abs = max(abs(v) for v in all_vals) if all_vals else 1
     x_range = max(max_abs * 1.3, 0.1)
 
-    fig.update_layout(
-        title=dict(text="Asymmetry Analysis", x=0.5, xanchor="center"),
-        barmode="group",
-        height=450,
-        xaxis=dict(
-            range=[-x_range, x_range],
-            zeroline=True,
-            zerolinewidth=2,
-            zerolinecolor="black",
-            gridcolor="lightgray",
-            title="Asymmetry",
-        ),
-        yaxis=dict(autorange="reversed", tickfont=dict(size=14)),
-        legend=dict(
-            orientation="h", x=0.5, xanchor="center", yanchor="bottom", y=-0.55
-        ),
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        margin=dict(l=40, r=40, t=50, b=60),
-    )
-    return fig
+    return {
+        "data": [
+            {
+                "type": "bar",
+                "y": labels,
+                "x": values,
+                "orientation": "h",
+                "name": name,
+                "marker": marker,
+                "text": [f"{v:.2f}" for v in values],
+                "textposition": "auto",
+                "textfont": {"size": 14},
+            }
+            for name, values, marker in traces
+        ],
+        "layout": {
+            "template": FIGURE_TEMPLATE,
+            "title": {"text": "Asymmetry Analysis", "x": 0.5, "xanchor": "center"},
+            "barmode": "group",
+            "height": 450,
+            "xaxis": {
+                "range": [-x_range, x_range],
+                "zeroline": True,
+                "zerolinewidth": 2,
+                "zerolinecolor": "black",
+                "gridcolor": "lightgray",
+                "title": {"text": "Asymmetry"},
+            },
+            "yaxis": {"autorange": "reversed", "tickfont": {"size": 14}},
+            "legend": {
+                "orientation": "h", "x": 0.5, "xanchor": "center", "yanchor": "bottom", "y": -0.55
+            },
+            "paper_bgcolor": "rgba(0,0,0,0)",
+            "plot_bgcolor": "rgba(0,0,0,0)",
+            "margin": {"l": 40, "r": 40, "t": 50, "b": 60},
+        },
+    }
 
 
 _default_diverging = create_diverging_chart({}, {})
 
 
-def create_trend_chart(dates, values, title: str) -> go.Figure:
+def create_trend_chart(dates, values, title: str) -> dict:
     """Create a scatter plot with highlighted baseline/current and a trend line.
 
     dates: list of datetime.date objects (ascending)
     values: list of float metric values
     """
-    fig = go.Figure()
-
+    layout = {
+        "template": FIGURE_TEMPLATE,
+        "title": {"text": title, "x": 0.5, "xanchor": "center", "font": {"size": 13}},
+        "height": 250,
+        "margin": {"l": 40, "r": 20, "t": 50, "b": 40},
+        "paper_bgcolor": "rgba(0,0,0,0)",
+        "plot_bgcolor": "rgba(0,0,0,0)",
+    }
     if not dates:
-        fig.update_layout(
-            title=dict(text=title, x=0.5, xanchor="center", font=dict(size=13)),
-            height=250,
-            margin=dict(l=40, r=20, t=50, b=40),
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-        )
-        return fig
+        return {"data": [], "layout": layout}
 
     n = len(dates)
-    # Last 5 tests *before* the current (most recent) one
-    last5_end = n - 1  # exclusive — stop before current
+    last5_end = n - 1
     last5_start = max(0, last5_end - 5)
-
-    # Shaded band for last-5 test window (only if there are tests before current)
     if last5_end > last5_start:
-        fig.add_vrect(
-            x0=dates[last5_start],
-            x1=dates[last5_end - 1],
-            fillcolor="#4a90d9",
-            opacity=0.08,
-            line_width=0,
-            annotation_text="Last 5",
-            annotation_position="top left",
-            annotation_font_size=9,
-            annotation_font_color="#4a90d9",
-        )
-
-    # All data points (regular markers)
-    fig.add_trace(
-        go.Scatter(
-            x=dates,
-            y=values,
-            mode="markers",
-            name="Tests",
-            marker=dict(color="#4a90d9", size=7),
-        )
-    )
-
-    # Baseline highlight (first point)
-    fig.add_trace(
-        go.Scatter(
-            x=[dates[0]],
-            y=[values[0]],
-            mode="markers+text",
-            name="Baseline",
-            marker=dict(
-                color="#f0ad4e",
-                size=13,
-                symbol="diamond",
-                line=dict(color="white", width=1.5),
-            ),
-            text=["Baseline"],
-            textposition="top center",
-            textfont=dict(size=9, color="#f0ad4e"),
-        )
-    )
+        # add_vrect's band and annotation
+        layout["shapes"] = [band_shape(dates[last5_start], dates[last5_end - 1], "#4a90d9", 0.08)]
+        layout["annotations"] = [
+            {
+                "text": "Last 5",
+                "xref": "x",
+                "x": dates[last5_start],
+                "xanchor": "left",
+                "yref": "y domain",
+                "y": 1,
+                "yanchor": "top",
+                "showarrow": False,
+                "font": {"color": "#4a90d9", "size": 9},
+            }
+        ]
 
-    # Most recent highlight (last point)
+    data = [
+        {
+            "type": "scatter",
+            "x": list(dates),
+            "y": list(values),
+            "mode": "markers",
+            "name": "Tests",
+            "marker": {"color": "#4a90d9", "size": 7},
+        },
+        _highlight(dates[0], values[0], "Baseline", "#f0ad4e", "diamond"),
+    ]
     if n > 1:
-        fig.add_trace(
-            go.Scatter(
-                x=[dates[-1]],
-                y=[values[-1]],
-                mode="markers+text",
-                name="Current",
-                marker=dict(
-                    color="#5cb85c",
-                    size=13,
-                    symbol="star",
-                    line=dict(color="white", width=1.5),
-                ),
-                text=["Current"],
-                textposition="top center",
-                textfont=dict(size=9, color="#5cb85c"),
-            )
-        )
-
-    # Linear trend line (needs at least 2 points)
+        data.append(_highlight(dates[-1], values[-1], "Current", "#5cb85c", "star"))
     if n >= 2:
         x_numeric = np.arange(n, dtype=float)
-        y_arr = np.array(values, dtype=float)
-        coeffs = np.polyfit(x_numeric, y_arr, 1)
-        trend_y = np.polyval(coeffs, x_numeric)
-        fig.add_trace(
-            go.Scatter(
-                x=dates,
-                y=trend_y.tolist(),
-                mode="lines",
-                name="Trend",
-                line=dict(color="#d9534f", width=2, dash="dash"),
-            )
+        coeffs = np.polyfit(x_numeric, np.array(values, dtype=float), 1)
+        data.append(
+            {
+                "type": "scatter",
+                "x": list(dates),
+                "y": np.polyval(coeffs, x_numeric).tolist(),
+                "mode": "lines",
+                "name": "Trend",
+                "line": {"color": "#d9534f", "width": 2, "dash": "dash"},
+            }
         )
 
-    fig.update_layout(
-        title=dict(text=title, x=0.5, xanchor="center", font=dict(size=13)),
-        height=250,
-        margin=dict(l=40, r=20, t=50, b=40),
-        xaxis=dict(tickformat="%m/%d/%Y", tickfont=dict(size=9)),
-        yaxis=dict(gridcolor="lightgray"),
+    layout.update(
+        xaxis={"tickformat": "%m/%d/%Y", "tickfont": {"size": 9}},
+        yaxis={"gridcolor": "lightgray"},
         showlegend=False,
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
     )
-    return fig
+    return {"data": data, "layout": layout}
+
+
+def _highlight(date, value, name: str, color: str, symbol: str) -> dict:
+    """A trend chart's labelled baseline/current marker trace."""
+    return {
+        "type": "scatter",
+        "x": [date],
+        "y": [value],
+        "mode": "markers+text",
+        "name": name,
+        "marker": {
+            "color": color,
+            "size": 13,
+            "symbol": symbol,
+            "line": {"color": "white", "width": 1.5},
+        },
+        "text": [name],
+        "textposition": "top center",
+        "textfont": {"size": 9, "color": color},
+    }
 
 
 _default_trend = create_trend_chart([], [], "—")
 
 
 # =============== Startup data ==================================
-dropdown_names = q.get_athlete_names()
-population_stats = q.get_population_stats(GAUGE_COLUMNS, "tests_cmjr")
-team_averages = q.get_team_average(BAR_COLUMNS, "tests_cmjr")
+# Loaded in the background, reloaded when tests_cmjr changes; layouts peek(), never wait
+dropdown_names = refresher.register(
+    "athlete_names", lambda: tuple(q.get_athlete_names()), "tests_cmjr"
+)
 
 # ====================== Styling ===================================
 CARD_STYLE = {
@@ -407,7 +355,8 @@ GAUGE_CLUSTER_STYLE = {
 
 
 def serve_layout():
-    """Returns the page layout"""
+    """Returns the page layout; the roster fills in when loaded if it isn't yet"""
+    names = dropdown_names.peek()
     return html.Div(
         className="gauge-container",
         style={
@@ -434,10 +383,14 @@ def serve_layout():
                     dcc.Dropdown(
                         id="athlete-dropdown",
                         options=[
-                            {"label": name, "value": name} for name in dropdown_names
+                            {"label": name, "value": name} for name in names or ()
                         ],
                         clearable=False,
-                        placeholder="Select Athlete",
+                        placeholder="Select Athlete" if names is not None else "Loading…",
+                        disabled=names is None,
+                    ),
+                    dcc.Interval(
+                        id="startup-poll", interval=STARTUP_POLL_MS, disabled=names is not None
                     ),
                     html.P("Age: 17"),
                     html.P("Height: 5' 10''"),
@@ -492,7 +445,7 @@ def serve_layout():
                                         [
                                             dcc.Graph(
                                                 id=f"gauge-{gauge_id}",
-                                                figure=create_gauge(50, title),
+                                                figure=_default_gauges[gauge_id],
                                                 config={"displayModeBar": False},
                                             ),
                                             html.P(
@@ -734,12 +687,30 @@ def serve_layout():
 
 
 # ====================== Callbacks ===================================
+@callback(
+    Output("athlete-dropdown", "options"),
+    Output("athlete-dropdown", "placeholder"),
+    Output("athlete-dropdown", "disabled"),
+    Output("startup-poll", "disabled"),
+    Input("startup-poll", "n_intervals"),
+    prevent_initial_call=True,
+)
+@traced
+def load_athlete_dropdown(_n_intervals):
+    """Fill in the roster once its background load finishes, then stop polling."""
+    names = dropdown_names.peek()
+    if names is None:
+        raise PreventUpdate
+    return [{"label": name, "value": name} for name in names], "Select Athlete", False, True
+
+
 @callback(
     Output("date-dropdown", "options"),
     Output("date-dropdown", "value"),
     Output("total-tests-text", "children"),
     Input("athlete-dropdown", "value"),
 )
+@traced
 def update_date_dropdown(selected_name):
     """Populate test date dropdown based on selected athlete.
 
@@ -760,9 +731,10 @@ def update_date_dropdown(selected_name):
     Input("athlete-dropdown", "value"),
     Input("date-dropdown", "value"),
 )
+@traced
 def update_gauges(selected_name, selected_date):
     """Update all 5 gauge figures when athlete or date changes."""
-    default_figs = [create_gauge(50, title) for _, title, _ in GAUGE_CONFIG]
+    default_figs = [_default_gauges[gauge_id] for gauge_id, _, _ in GAUGE_CONFIG]
     default_texts = ["—" for _ in GAUGE_CONFIG]
     default_pct_texts = ["" for _ in GAUGE_CONFIG]
     default_pct_styles = [{"display": "none"} for _ in GAUGE_CONFIG]
@@ -770,12 +742,14 @@ def update_gauges(selected_name, selected_date):
     if not selected_name or not selected_date:
         return default_figs + default_texts + default_pct_texts + default_pct_styles
 
-    test_data = q.get_test_data(selected_name, selected_date)
+    snapshot = q.get_session_snapshot("tests_cmjr", selected_name, selected_date)
+    test_data = snapshot["current"]
     if not test_data:
         return default_figs + default_texts + default_pct_texts + default_pct_styles
 
-    # Get baseline (earliest test) for this athlete — independent of selected date
-    baseline_data = q.get_baseline_data(selected_name)
+    # Baseline (earliest test) for this athlete — independent of selected date
+    baseline_data = snapshot["baseline"]
+    population_stats = snapshot["population"]
 
     figures = []
     raw_texts = []
@@ -784,27 +758,51 @@ def update_gauges(selected_name, selected_date):
     # Metrics where lower raw values are better (inverted z-score)
     INVERT_GAUGE = set()
 
+    ranks = None
+    if GAUGE_SCORING == "percentile":
+        # Current and baseline values of every gauge, ranked in one pass
+        ranks = percentile_index.score(
+            "tests_cmjr",
+            {
+                col: [test_data.get(col), baseline_data.get(col) if baseline_data else None]
+                for _, _, col in GAUGE_CONFIG
+            },
+        )
+
     for _gauge_id, title, col in GAUGE_CONFIG:
         stats = population_stats.get(col, {"mean": 0, "std": 1})
         invert = col in INVERT_GAUGE
 
-        # Current test value
+        # Current test value, and the baseline value (earliest test)
         raw_value = test_data.get(col)
-        scaled = (
-            scale_to_gauge(float(raw_value), stats["mean"], stats["std"], invert=invert)
-            if raw_value is not None
-            else 50
-        )
-
-        # Baseline value (earliest test)
         baseline_raw = baseline_data.get(col) if baseline_data else None
-        baseline_scaled = (
-            scale_to_gauge(
-                float(baseline_raw), stats["mean"], stats["std"], invert=invert
+        if ranks is not None:
+            current_rank, baseline_rank = ranks[col]
+            scaled = (
+                percentile_to_gauge(current_rank, invert=invert)
+                if current_rank is not None
+                else 50
+            )
+            baseline_scaled = (
+                percentile_to_gauge(baseline_rank, invert=invert)
+                if baseline_rank is not None
+                else None
+            )
+        else:
+            scaled = (
+                scale_to_gauge(
+                    float(raw_value), stats["mean"], stats["std"], invert=invert
+                )
+                if raw_value is not None
+                else 50
+            )
+            baseline_scaled = (
+                scale_to_gauge(
+                    float(baseline_raw), stats["mean"], stats["std"], invert=invert
+                )
+                if baseline_raw is not None
+                else None
             )
-            if baseline_raw is not None
-            else None
-        )
 
         # Patch only the changed values instead of rebuilding the full figure
         patched = Patch()
@@ -868,6 +866,7 @@ def update_gauges(selected_name, selected_date):
     Input("athlete-dropdown", "value"),
     Input("date-dropdown", "value"),
 )
+@traced
 def update_bars(selected_name, selected_date):
     """Update all Movement Analysis bar charts when athlete or date changes."""
     default_pct_texts = ["" for _ in BAR_CONFIG]
@@ -880,9 +879,12 @@ def update_bars(selected_name, selected_date):
             + default_pct_styles
         )
 
-    test_data = q.get_test_data(selected_name, selected_date)
-    athlete_avg = q.get_athlete_average(selected_name)
-    baseline_data = q.get_baseline_data(selected_name)
+    snapshot = q.get_session_snapshot("tests_cmjr", selected_name, selected_date)
+    test_data = snapshot["current"]
+    athlete_avg = snapshot["last5"]
+    baseline_data = snapshot["baseline"]
+    # Population means are the trial-weighted team averages
+    team_averages = {col: stats["mean"] for col, stats in snapshot["population"].items()}
     figures = []
     pct_texts = []
     pct_styles = []
@@ -957,16 +959,18 @@ def update_bars(selected_name, selected_date):
     Input("athlete-dropdown", "value"),
     Input("date-dropdown", "value"),
 )
+@traced
 def update_injury_chart(selected_name, selected_date):
     """Update the injury risk diverging chart when athlete or date changes."""
     if not selected_name or not selected_date:
         return _default_diverging
 
-    baseline_data = q.get_cmjr_baseline_asymmetry(selected_name)
+    snapshot = q.get_session_snapshot("tests_cmjr", selected_name, selected_date)
+    baseline_data = snapshot["baseline"]
     if not baseline_data:
         return _default_diverging
 
-    selected_data = q.get_cmjr_date_asymmetry(selected_name, selected_date)
+    selected_data = snapshot["current"]
     return create_diverging_chart(baseline_data, selected_data)
 
 
@@ -976,6 +980,7 @@ def update_injury_chart(selected_name, selected_date):
     Input("athlete-dropdown", "value"),
     Input("date-dropdown", "value"),
 )
+@traced
 def update_injury_data(selected_name, selected_date):
     """Update the injury data values below the diverging chart."""
     default = [
@@ -985,7 +990,7 @@ def update_injury_data(selected_name, selected_date):
     if not selected_name or not selected_date:
         return default, "Weight: —"
 
-    data = q.get_injury_data(selected_name, selected_date)
+    data = q.get_session_snapshot("tests_cmjr", selected_name, selected_date)["current"]
     if not data:
         return default, "Weight: —"
 
@@ -1024,6 +1029,7 @@ def update_injury_data(selected_name, selected_date):
     [Output(f"trend-{tid}", "figure") for tid, _, _ in TREND_CONFIG],
     Input("athlete-dropdown", "value"),
 )
+@traced
 def update_trends(selected_name):
     """Update all Trend scatter plots when athlete changes."""
     defaults = [_default_trend for _ in TREND_CONFIG]
@@ -1058,5 +1064,8 @@ def update_trends(selected_name):
 # ====================== Standalone App (for testing) ===================================
 if __name__ == "__main__":
     app = Dash(__name__)
-    app.layout = serve_layout()
+    app.layout = serve_layout
+    app.server.add_url_rule("/ready", "ready", readiness_probe)
+    metrics.install(app.server)
+    refresher.warm()
     app.run(debug=True, port=8051)
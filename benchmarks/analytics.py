@@ -0,0 +1,226 @@
+"""Analytics backend benchmark: Postgres vs the embedded DuckDB copy at scale.
+
+Builds a synthetic dataset in its own schema (analytics_bench, dropped and
+rebuilt on every run): TRIALS trials in tests_cmjr and TRIALS // 10 in
+tests_cmj, from ATHLETES athletes on TEAMS teams, generated with a fixed
+seed, then migrated like the real tables. Checks the DuckDB answers of the
+aggregates enable_duckdb_analytics() routes against Postgres, then times:
+
+  * population stats (all trials, one team) and team averages: Postgres
+    through population_moments and the rollups, Postgres scanning the raw
+    trials, and DuckDB;
+  * an ad-hoc roster query (monthly averages per athlete) on both;
+  * filling DuckDB from Postgres, appending new trials, and exporting to and
+    cold-starting from Parquet.
+
+Exits non-zero on any parity mismatch. Run from the repository root:
+    DATABASE_URL=postgresql+psycopg://... python -m benchmarks.analytics [TRIALS]
+"""
+
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+import models.queries as q
+from models.analytics import DuckDBAnalytics
+from models.cache import query_cache
+from models.config import ALL_SEGMENT, SNAPSHOT_COLUMNS
+from models.db import get_engine
+from models.migrations import upgrade
+
+SCHEMA = "analytics_bench"
+TRIALS = 1_000_000
+ATHLETES = 2000
+TEAMS = 20
+APPEND_TRIALS = 1000
+ROUNDS = 15
+TEAM = "team_07"
+# The trials of each table are spread evenly over three years
+SPAN_SECONDS = 3 * 365 * 86400
+
+MONTHLY_POSTGRES = text(
+    "SELECT athlete_name, date_trunc('month', test_date) AS month, "
+    "AVG(cmj_jump_height_m) AS jump FROM tests_cmjr "
+    "WHERE athlete_name IS NOT NULL GROUP BY 1, 2"
+)
+MONTHLY_DUCKDB = (
+    "SELECT athlete_name, date_trunc('month', test_date) AS month, "
+    "avg(cmj_jump_height_m) AS jump FROM tests_cmjr "
+    "WHERE athlete_name IS NOT NULL GROUP BY 1, 2"
+)
+
+
+def use_bench_schema() -> None:
+    """Point DATABASE_URL's connections at SCHEMA (before the engine exists)."""
+    url = make_url(os.environ["DATABASE_URL"])
+    url = url.update_query_dict({"options": f"-csearch_path={SCHEMA}"})
+    os.environ["DATABASE_URL"] = url.render_as_string(hide_password=False)
+
+
+def insert_sql(table: str, first: int, last: int, spacing: int) -> str:
+    """INSERT of trials first..last, spacing seconds apart in that order."""
+    cols = SNAPSHOT_COLUMNS[table]
+    values = ", ".join(
+        "CASE WHEN random() < 0.03 THEN NULL "
+        "ELSE 10 + 3 * (random() + random() + random() - 1.5) * 2 END"
+        for _ in cols
+    )
+    return (
+        f"INSERT INTO {table} (athlete_name, timestamp, athlete_teams, {', '.join(cols)}) "
+        f"SELECT 'Athlete ' || lpad((i % {ATHLETES})::text, 4, '0'), "
+        f"1600000000 + i * {spacing}, "
+        f"json_build_array('team_' || lpad((i % {ATHLETES} % {TEAMS})::text, 2, '0')), "
+        f"{values} FROM generate_series({first}, {last}) AS i"
+    )
+
+
+def build(trials: int) -> float:
+    """Recreate SCHEMA with the synthetic tables, migrated; returns seconds."""
+    started = time.perf_counter()
+    with get_engine().begin() as conn:
+        conn.exec_driver_sql("SET LOCAL statement_timeout = 0")
+        conn.exec_driver_sql(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.exec_driver_sql(f"CREATE SCHEMA {SCHEMA}")
+        conn.exec_driver_sql("SELECT setseed(0.42)")
+        for table, count in (("tests_cmjr", trials), ("tests_cmj", trials // 10)):
+            metric_defs = ", ".join(f"{col} double precision" for col in SNAPSHOT_COLUMNS[table])
+            conn.exec_driver_sql(
+                f"CREATE TABLE {table} (id bigserial PRIMARY KEY, athlete_name text, "
+                f"timestamp bigint, athlete_teams json, {metric_defs})"
+            )
+            conn.execute(text(insert_sql(table, 1, count, SPAN_SECONDS // count)))
+    upgrade()
+    return time.perf_counter() - started
+
+
+def same(a, b) -> bool:
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(same(a[k], b[k]) for k in a)
+    if isinstance(a, float) or isinstance(b, float):
+        # Both sides sum a million floats, in different orders
+        return a is not None and b is not None and math.isclose(a, b, rel_tol=1e-7, abs_tol=1e-9)
+    return a == b
+
+
+def parity(duck: DuckDBAnalytics) -> int:
+    failures = 0
+    for test_type, cols in SNAPSHOT_COLUMNS.items():
+        for function, args in (
+            ("get_population_stats", (cols, test_type, ALL_SEGMENT)),
+            ("get_population_stats", (cols, test_type, TEAM)),
+            ("get_team_average", (cols, test_type)),
+        ):
+            if not same(getattr(q, function)(*args), getattr(duck, function)(*args)):
+                failures += 1
+                print(f"FAIL {function}({test_type}, {args[-1]})")
+    return failures
+
+
+def raw_scan_sql(by_team: bool):
+    cols = SNAPSHOT_COLUMNS["tests_cmjr"]
+    parts = ", ".join(f"AVG({col}), STDDEV_POP({col})" for col in cols)
+    where = " WHERE athlete_teams::jsonb ? :segment" if by_team else ""
+    return text(f"SELECT {parts} FROM tests_cmjr{where}")
+
+
+def fetch_all(query, params=None):
+    with get_engine().connect() as conn:
+        return conn.execute(query, params or {}).fetchall()
+
+
+def time_ms(call, rounds: int = ROUNDS) -> float:
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> int:
+    trials = int(sys.argv[1]) if len(sys.argv) > 1 else TRIALS
+    use_bench_schema()
+    print(f"build {trials} + {trials // 10} trials: {build(trials):.1f} s")
+    query_cache.enabled = False
+
+    duck = DuckDBAnalytics(":memory:", parquet_dir="", sync_seconds=math.inf)
+    started = time.perf_counter()
+    for test_type in SNAPSHOT_COLUMNS:
+        duck.sync(test_type)
+    fill_s = time.perf_counter() - started
+
+    failures = parity(duck)
+    print(f"parity: {'ok' if not failures else f'{failures} mismatches'}")
+
+    cols = SNAPSHOT_COLUMNS["tests_cmjr"]
+    rows = [
+        (
+            "population stats, all",
+            lambda: q.get_population_stats(cols, "tests_cmjr", ALL_SEGMENT),
+            lambda: fetch_all(raw_scan_sql(False)),
+            lambda: duck.get_population_stats(cols, "tests_cmjr", ALL_SEGMENT),
+        ),
+        (
+            f"population stats, {TEAM}",
+            lambda: q.get_population_stats(cols, "tests_cmjr", TEAM),
+            lambda: fetch_all(raw_scan_sql(True), {"segment": TEAM}),
+            lambda: duck.get_population_stats(cols, "tests_cmjr", TEAM),
+        ),
+        (
+            "team average",
+            lambda: q.get_team_average(cols, "tests_cmjr"),
+            None,
+            lambda: duck.get_team_average(cols, "tests_cmjr"),
+        ),
+        (
+            "monthly average per athlete",
+            None,
+            lambda: fetch_all(MONTHLY_POSTGRES),
+            lambda: duck.execute(MONTHLY_DUCKDB, tables=["tests_cmjr"]),
+        ),
+    ]
+    print(f"\ntests_cmjr, median of {ROUNDS} calls, ms")
+    print(f"{'query':<30} {'pg stored':>10} {'pg scan':>10} {'duckdb':>10}")
+    for label, stored, scan, duckdb_call in rows:
+        cells = [f"{time_ms(call):>10.2f}" if call else f"{'-':>10}" for call in (stored, scan, duckdb_call)]
+        print(f"{label:<30} {' '.join(cells)}")
+
+    with get_engine().begin() as conn:
+        # Touches every athlete's rollup rows, beyond the request timeout
+        conn.exec_driver_sql("SET LOCAL statement_timeout = 0")
+        conn.execute(text(insert_sql(
+            "tests_cmjr", trials + 1, trials + APPEND_TRIALS, SPAN_SECONDS // trials
+        )))
+    started = time.perf_counter()
+    duck.sync("tests_cmjr")
+    append_ms = (time.perf_counter() - started) * 1000
+    failures += parity(duck)
+
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        duck.export_parquet(directory)
+        export_s = time.perf_counter() - started
+        started = time.perf_counter()
+        cold = DuckDBAnalytics(":memory:", parquet_dir=directory, sync_seconds=math.inf)
+        cold.get_population_stats(cols, "tests_cmjr")
+        cold.get_population_stats(SNAPSHOT_COLUMNS["tests_cmj"], "tests_cmj")
+        cold_s = time.perf_counter() - started
+        failures += parity(cold)
+
+    print(f"\nfill DuckDB from Postgres: {fill_s:.1f} s")
+    print(f"append {APPEND_TRIALS} trials: {append_ms:.1f} ms")
+    print(f"export Parquet: {export_s:.2f} s, cold start from Parquet: {cold_s:.2f} s")
+
+    with get_engine().begin() as conn:
+        conn.exec_driver_sql(f"DROP SCHEMA {SCHEMA} CASCADE")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
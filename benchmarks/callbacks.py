@@ -0,0 +1,225 @@
+"""End-to-end callback benchmark through Dash's /_dash-update-component route.
+
+Query timings miss what a callback costs on top of its queries: building
+figures and Patch objects, formatting, and serialising the response.
+This drives the real callbacks of athlete.py and football.py through a
+Flask test client, the way the browser does, over a matrix of athletes
+(ATHLETES spread over the roster) and dates (the newest, middle and oldest
+of each athlete, taken from the date dropdown callback's own response).
+
+Per callback it reports:
+
+  * latency of the whole request, p50/p95 (ms);
+  * the share spent inside the callback function, the rest being Dash's
+    request handling and JSON serialisation;
+  * bytes on the wire (response body);
+  * SQL statements issued (instrumentation.py).
+
+Two modes: cold clears the query cache and session snapshots before every
+request; warm repeats each request with them kept, as when one dropdown
+change fires several callbacks. Each page runs in its own interpreter,
+since both register callbacks on the same component IDs.
+
+Run from the repository root against a seeded database, or build the
+synthetic one of benchmarks/dataset.py first with --synthetic SIZE:
+    DATABASE_URL=postgresql+psycopg://... python -m benchmarks.callbacks \\
+        [--synthetic small] [--output callbacks.json]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+PAGES = ("athlete", "football")
+CALLBACKS = (
+    "update_date_dropdown",
+    "update_gauges",
+    "update_zscore_bars",
+    "update_bars",
+    "update_injury_chart",
+    "update_injury_data",
+    "update_trends",
+)
+ATHLETES = 5
+DATES = 3
+REPEATS = 5
+
+
+def request_body(key: str, spec: dict, values: dict) -> dict:
+    """The JSON the Dash renderer posts for callback key with input values."""
+    declared = spec["output"] if isinstance(spec["output"], list) else [spec["output"]]
+    outputs = [
+        {"id": output.component_id, "property": output.component_property}
+        for output in declared
+    ]
+
+    def fill(dependencies):
+        return [{**dep, "value": values.get(dep["id"])} for dep in dependencies]
+
+    return {
+        "output": key,
+        "outputs": outputs if key.startswith("..") else outputs[0],
+        "inputs": fill(spec["inputs"]),
+        "state": fill(spec["state"]),
+        "changedPropIds": [f"{dep['id']}.{dep['property']}" for dep in spec["inputs"][:1]],
+    }
+
+
+def callback_totals(name: str) -> tuple[float, int]:
+    """(ms spent in, statements run by) callback name so far."""
+    from models.instrumentation import sql_metrics
+
+    entry = sql_metrics.histograms()["callbacks"].get(name)
+    if entry is None:
+        return 0.0, 0
+    _calls, statements, latency, _payload = entry
+    return latency.total, statements
+
+
+def run_page(page_name: str) -> dict:
+    """Time the page's callbacks over the athlete/date matrix (in this interpreter)."""
+    import importlib
+
+    from dash import Dash
+
+    import models.queries as q
+    from models.cache import query_cache
+
+    page = importlib.import_module(page_name)
+    app = Dash(page_name)
+    app.layout = page.serve_layout
+    client = app.server.test_client()
+    client.get("/")  # Dash attaches the registered callbacks on the first request
+
+    specs = {
+        spec["callback"].__name__: (key, spec)
+        for key, spec in app.callback_map.items()
+        if spec["callback"].__name__ in CALLBACKS
+    }
+
+    def post(name: str, values: dict):
+        key, spec = specs[name]
+        body = request_body(key, spec, values)
+        before_ms, before_statements = callback_totals(f"{page_name}.{name}")
+        started = time.perf_counter()
+        response = client.post("/_dash-update-component", json=body)
+        elapsed = (time.perf_counter() - started) * 1000
+        after_ms, after_statements = callback_totals(f"{page_name}.{name}")
+        if response.status_code not in (200, 204):
+            raise RuntimeError(f"{name}: HTTP {response.status_code}: {response.data[:200]!r}")
+        return response, {
+            "ms": elapsed,
+            "callback_ms": after_ms - before_ms,
+            "bytes": len(response.data),
+            "statements": after_statements - before_statements,
+        }
+
+    roster = list(page.dropdown_names.value)
+    spread = np.linspace(0, len(roster) - 1, min(ATHLETES, len(roster))).astype(int)
+    athletes = [roster[i] for i in spread]
+    base = {"team-dropdown": getattr(page, "default_team", None)}
+    matrix = []
+    for athlete in dict.fromkeys(athletes):
+        response, _ = post("update_date_dropdown", {**base, "athlete-dropdown": athlete})
+        options = response.get_json()["response"]["date-dropdown"]["options"]
+        picks = sorted({0, len(options) // 2, len(options) - 1}) if options else []
+        for index in picks[:DATES]:
+            date = options[index]["value"]
+            matrix.append({**base, "athlete-dropdown": athlete, "date-dropdown": date})
+
+    samples = {mode: {name: [] for name in specs} for mode in ("cold", "warm")}
+    for values in matrix:
+        for name in specs:
+            query_cache.enabled = False
+            q.clear_session_snapshots()
+            samples["cold"][name].append(post(name, values)[1])
+        query_cache.enabled = True
+        for _ in range(REPEATS):
+            for name in specs:
+                samples["warm"][name].append(post(name, values)[1])
+
+    return {
+        "matrix": len(matrix),
+        "callbacks": {
+            mode: {name: summarize(runs) for name, runs in by_name.items()}
+            for mode, by_name in samples.items()
+        },
+    }
+
+
+def summarize(runs: list[dict]) -> dict:
+    ms = np.array([run["ms"] for run in runs])
+    callback_ms = np.array([run["callback_ms"] for run in runs])
+    return {
+        "n": len(runs),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "callback_ms": round(float(callback_ms.mean()), 3),
+        "overhead_ms": round(float((ms - callback_ms).mean()), 3),
+        "bytes": round(float(np.mean([run["bytes"] for run in runs]))),
+        "max_bytes": max(run["bytes"] for run in runs),
+        "statements": round(float(np.mean([run["statements"] for run in runs])), 2),
+        "max_statements": max(run["statements"] for run in runs),
+    }
+
+
+def report(results: dict) -> None:
+    for page, data in results["pages"].items():
+        for mode, callbacks in data["callbacks"].items():
+            print(f"\n{page} ({mode}, {data['matrix']} athlete/date pairs)")
+            print(
+                f"{'callback':<24} {'p50':>8} {'p95':>8} {'in cb':>8} {'dash':>8} "
+                f"{'bytes':>8} {'stmts':>6}"
+            )
+            for name, row in callbacks.items():
+                print(
+                    f"{name:<24} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+                    f"{row['callback_ms']:>8.2f} {row['overhead_ms']:>8.2f} "
+                    f"{row['bytes']:>8} {row['statements']:>6.1f}"
+                )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--synthetic", help="build a benchmarks/dataset.py size first")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_page(args.worker)))
+        return 0
+
+    if args.synthetic:
+        from benchmarks.dataset import load, use_bench_schema
+        from benchmarks.query_suite import SIZES
+
+        # Sets DATABASE_URL's search_path, which the page workers inherit
+        use_bench_schema()
+        load(*SIZES[args.synthetic])
+
+    results = {"synthetic": args.synthetic, "pages": {}}
+    for page in PAGES:
+        done = subprocess.run(
+            [sys.executable, "-m", "benchmarks.callbacks", "--worker", page],
+            capture_output=True, text=True,
+        )
+        if done.returncode:
+            print(done.stderr, file=sys.stderr)
+            return done.returncode
+        results["pages"][page] = json.loads(done.stdout.strip().splitlines()[-1])
+
+    report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nwrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
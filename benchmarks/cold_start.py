@@ -0,0 +1,130 @@
+"""Cold-start check: importing the pages and serving a first layout need no database.
+
+Each phase runs in a fresh interpreter so nothing is already imported:
+
+- down: DATABASE_URL points at a closed port. Imports athlete and football,
+  checks no engine was created, renders both layouts (which must come back
+  in their loading state without waiting) and checks the readiness probe
+  answers 503.
+- up: the real DATABASE_URL. Imports the pages, warms the refresher and
+  times until the probe answers 200, then renders the layouts with their
+  rosters.
+- sqlite: the same against a SQLite file built by benchmarks/dataset.py
+  (SQLITE_SIZE athletes x dates) on the portable backend, where there is
+  no data_watermarks table.
+
+Prints the timings and exits non-zero when a check fails.
+
+Run from the repository root against a seeded database:
+    DATABASE_URL=postgresql://... python -m benchmarks.cold_start
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+UNREACHABLE_URL = "postgresql+psycopg://nobody@127.0.0.1:1/none"
+READY_TIMEOUT_S = 60
+SQLITE_SIZE = (30, 5)
+
+CHILD = """
+import json, sys, time
+
+started = time.perf_counter()
+import athlete, football
+imported = time.perf_counter() - started
+
+from models.db import engine_manager
+from models.refresher import readiness_probe, refresher
+
+result = {"import_ms": imported * 1000, "engine_at_import": engine_manager._engine is not None}
+if sys.argv[1] == "up":
+    started = time.perf_counter()
+    refresher.warm()
+    while readiness_probe()[1] != 200 and time.perf_counter() - started < %(timeout)s:
+        time.sleep(0.005)
+    result["ready_ms"] = (time.perf_counter() - started) * 1000
+
+layouts = []
+for page in (athlete, football):
+    started = time.perf_counter()
+    layout = page.serve_layout()
+    elapsed = time.perf_counter() - started
+    dropdown = next(
+        c for c in layout._traverse() if getattr(c, "id", None) == "athlete-dropdown"
+    )
+    layouts.append({
+        "page": page.__name__,
+        "layout_ms": elapsed * 1000,
+        "loading": bool(dropdown.disabled),
+        "athletes": len(dropdown.options),
+    })
+result["layouts"] = layouts
+result["probe"] = readiness_probe()[1]
+refresher.stop()
+print(json.dumps(result))
+""" % {"timeout": READY_TIMEOUT_S}
+
+
+def run(phase: str, url: str) -> dict:
+    # An empty QUERY_BACKEND picks the default for the URL's dialect
+    env = {**os.environ, "DATABASE_URL": url, "QUERY_BACKEND": ""}
+    done = subprocess.run(
+        [sys.executable, "-c", CHILD, phase],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=READY_TIMEOUT_S * 2,
+    )
+    return json.loads(done.stdout.strip().splitlines()[-1])
+
+
+def build_sqlite(directory: str) -> str:
+    """URL of a fresh SQLite file filled by benchmarks/dataset.py."""
+    url = f"sqlite:///{os.path.join(directory, 'cold_start.sqlite')}"
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.dataset", *map(str, SQLITE_SIZE)],
+        env={**os.environ, "DATABASE_URL": url},
+        capture_output=True,
+        check=True,
+    )
+    return url
+
+
+def main() -> int:
+    failures = []
+    down = run("down", UNREACHABLE_URL)
+    up = run("up", os.environ["DATABASE_URL"])
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite = run("up", build_sqlite(directory))
+
+    for phase, result in (("down", down), ("up", up), ("sqlite", sqlite)):
+        print(f"{phase}: import athlete + football {result['import_ms']:.0f} ms")
+        if result["engine_at_import"]:
+            failures.append(f"{phase}: importing the pages created an engine")
+        for layout in result["layouts"]:
+            state = "loading" if layout["loading"] else f"{layout['athletes']} athletes"
+            print(f"{phase}: {layout['page']}.serve_layout {layout['layout_ms']:.1f} ms ({state})")
+    for phase, result in (("up", up), ("sqlite", sqlite)):
+        print(f"{phase}: ready after {result['ready_ms']:.0f} ms")
+
+    if down["probe"] != 503:
+        failures.append(f"down: probe answered {down['probe']}, expected 503")
+    if not all(layout["loading"] for layout in down["layouts"]):
+        failures.append("down: a layout was not in its loading state")
+    for phase, result in (("up", up), ("sqlite", sqlite)):
+        if result["probe"] != 200:
+            failures.append(f"{phase}: probe answered {result['probe']}, expected 200")
+        if any(layout["loading"] or not layout["athletes"] for layout in result["layouts"]):
+            failures.append(f"{phase}: a layout had no roster after ready")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
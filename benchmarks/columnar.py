@@ -0,0 +1,146 @@
+"""Columnar backend benchmark: Postgres query path vs in-memory NumPy copy.
+
+Checks that ColumnarStore answers every routed query function like the
+Postgres path (floats compared to 1e-9 relative), then times each function
+both ways: Postgres with the query cache off, Postgres through the warm
+watermark cache, and the columnar store. Also times loading the store and
+appending a batch of trials to it. Exits non-zero on any parity mismatch.
+
+Run from the repository root after `python -m models.migrations`:
+    DATABASE_URL=postgresql://... python -m benchmarks.columnar
+"""
+
+import math
+import statistics
+import sys
+import time
+
+import numpy as np
+
+import models.queries as q
+from models.cache import query_cache
+from models.columnar import ColumnarStore, _Trials
+from models.config import ALL_SEGMENT, FOOTBALL_TEAM_ID, SNAPSHOT_COLUMNS
+
+ROUNDS = 200
+APPEND_TRIALS = 1000
+
+
+def same(a, b) -> bool:
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(same(a[k], b[k]) for k in a)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    if isinstance(a, float) or isinstance(b, float):
+        return a is not None and b is not None and math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-12)
+    return a == b
+
+
+def cases() -> dict[str, tuple]:
+    """(function name, args) for one call of every routed query function."""
+    name = q.get_athlete_names()[0]
+    date = q.get_test_dates(name)[0]["value"]
+    cmj_name = q.get_football_athlete_names()[0]
+    cmj_date = q.get_cmj_test_dates(cmj_name)[0]["value"]
+    cols = SNAPSHOT_COLUMNS["tests_cmjr"]
+    return {
+        "get_athlete_names": ("get_athlete_names",),
+        "get_team_athlete_names": ("get_team_athlete_names", FOOTBALL_TEAM_ID, "tests_cmj"),
+        "get_dates": ("get_dates", "tests_cmjr", name),
+        "get_date_metrics": ("get_date_metrics", "tests_cmjr", cols, name, date),
+        "get_baseline_metrics": ("get_baseline_metrics", "tests_cmjr", cols, name),
+        "get_last5_metrics": ("get_last5_metrics", "tests_cmjr", cols, name),
+        "get_alltime_metrics": ("get_alltime_metrics", "tests_cmjr", cols, name),
+        "get_trend_metrics": ("get_trend_metrics", "tests_cmjr", cols, name),
+        "get_team_average": ("get_team_average", cols, "tests_cmjr"),
+        "get_population_stats": ("get_population_stats", cols, "tests_cmjr", ALL_SEGMENT),
+        "fetch_session_snapshot[tests_cmjr]": ("fetch_session_snapshot", "tests_cmjr", name, date),
+        "fetch_session_snapshot[tests_cmj]": ("fetch_session_snapshot", "tests_cmj", cmj_name, cmj_date),
+    }
+
+
+def parity(store: ColumnarStore) -> int:
+    """Compare every athlete and date of both tables; returns the mismatch count."""
+    failures = 0
+
+    def check(function: str, *args) -> None:
+        nonlocal failures
+        q.clear_session_snapshots()
+        if not same(getattr(q, function)(*args), getattr(store, function)(*args)):
+            failures += 1
+            print(f"FAIL {function}{args[:1] + args[2:]}")
+
+    check("get_athlete_names")
+    for test_type, names in (
+        ("tests_cmjr", q.get_athlete_names()),
+        ("tests_cmj", q.get_football_athlete_names()),
+    ):
+        cols = SNAPSHOT_COLUMNS[test_type]
+        for team_id in store._table(test_type).team_athletes:
+            check("get_team_athlete_names", team_id, test_type)
+            check("get_team_average", cols, test_type, team_id)
+            check("get_population_stats", cols, test_type, team_id)
+        check("get_team_average", cols, test_type)
+        check("get_population_stats", cols, test_type)
+        for name in names:
+            check("get_dates", test_type, name)
+            check("get_last5_metrics", test_type, cols, name)
+            check("get_alltime_metrics", test_type, cols, name)
+            check("get_trend_metrics", test_type, cols, name)
+            for date in q.get_dates(test_type, name):
+                check("fetch_session_snapshot", test_type, name, date["value"])
+    return failures
+
+
+def time_us(call) -> float:
+    samples = []
+    for _ in range(ROUNDS):
+        q.clear_session_snapshots()
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(samples)
+
+
+def main() -> int:
+    store = ColumnarStore()
+    started = time.perf_counter()
+    for test_type in SNAPSHOT_COLUMNS:
+        store.sync(test_type)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    query_cache.enabled = False
+    failures = parity(store)
+    print(f"parity: {'ok' if not failures else f'{failures} mismatches'}")
+
+    print(f"\nmedian of {ROUNDS} calls, microseconds")
+    print(f"{'function':<34} {'postgres':>9} {'cached':>9} {'columnar':>9}")
+    for label, (function, *args) in cases().items():
+        query_cache.enabled = False
+        postgres = time_us(lambda: getattr(q, function)(*args))
+        query_cache.enabled = True
+        cached = time_us(lambda: getattr(q, function)(*args))
+        columnar = time_us(lambda: getattr(store, function)(*args))
+        print(f"{label:<34} {postgres:>9.1f} {cached:>9.1f} {columnar:>9.1f}")
+
+    table = store._tables["tests_cmjr"]
+    cols = SNAPSHOT_COLUMNS["tests_cmjr"]
+    rng = np.random.default_rng(0)
+    names = list(table.ranges)
+    rows = [
+        (names[i % len(names)], np.datetime64("2031-01-01") + i % 7, ["team"], 1.9e9 + i)
+        + tuple(rng.normal(10, 3, len(cols)).tolist())
+        for i in range(APPEND_TRIALS)
+    ]
+    started = time.perf_counter()
+    table.append(_Trials(rows, len(cols)), table.position)
+    append_ms = (time.perf_counter() - started) * 1000
+
+    groups = sum(len(t.names) for t in store._tables.values())
+    print(f"\nload both tables: {load_ms:.1f} ms ({groups} athlete-date rows)")
+    print(f"append {APPEND_TRIALS} trials: {append_ms:.1f} ms")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""Deterministic synthetic trials for tests_cmj and tests_cmjr.
+
+generate() yields ATHLETES x DATES x TRIALS_PER_DATE trials per table from
+a fixed seed, so every run (and every machine) gets the same rows:
+
+  * each athlete tests on DATES weekly sessions, TRIALS_PER_DATE trials a
+    session a few seconds apart, in the afternoon of their team's local
+    timezone;
+  * a third of the athletes are on the football team (FOOTBALL_TEAM_ID),
+    the rest spread over other teams; a few have no team array at all;
+  * every metric has a plausible scale taken from its name, a per-athlete
+    level, a slow improvement over the sessions and per-trial noise;
+    left/right asymmetry indexes (lr_*) are signed percentages around 0;
+    about 2% of values are NULL.
+
+load() writes them into a fresh set of tables: on Postgres into SCHEMA
+(dropped and rebuilt, then migrated like the real tables), anywhere else
+(SQLite, DuckDB) into the portable tables of models/portable.py.
+
+Run from the repository root:
+    DATABASE_URL=postgresql+psycopg://... python -m benchmarks.dataset [ATHLETES DATES]
+    DATABASE_URL=sqlite:///bench.sqlite python -m benchmarks.dataset 200 40
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.engine import make_url
+
+from models.config import DEFAULT_TIMEZONE, FOOTBALL_TEAM_ID, SNAPSHOT_COLUMNS, TEAM_TIMEZONES
+from models.db import get_engine
+from models.migrations import upgrade
+from models.portable import TRIAL_TABLES, metadata
+
+SCHEMA = "queries_bench"
+ATHLETES = 200
+DATES = 40
+TRIALS_PER_DATE = 3
+SEED = 20240101
+OTHER_TEAMS = 5
+NULL_RATE = 0.02
+FIRST_SESSION = datetime(2023, 1, 2, 15, 0)
+
+# (name fragment, typical value, coefficient of variation), first match wins
+_SCALES = [
+    ("weight_n", 800.0, 0.15),
+    ("_ms", 250.0, 0.2),
+    ("rsi", 0.5, 0.25),
+    ("ratio", 1.1, 0.15),
+    ("power_w_kg", 45.0, 0.2),
+    ("impulse_n_s_kg", 2.5, 0.15),
+    ("momentum", 230.0, 0.2),
+    ("velocity_m_s", 2.6, 0.12),
+    ("force", 1800.0, 0.2),
+    ("_m", 0.35, 0.2),
+]
+
+
+def metric_profile(col: str) -> tuple[float, float, bool]:
+    """(typical value, spread, is an asymmetry index) for a metric column."""
+    if col.startswith("lr_") or "_lr_" in col:
+        # Signed left/right difference in percent
+        return 0.0, 6.0, True
+    for fragment, scale, cv in _SCALES:
+        if fragment in col:
+            return scale, scale * cv, False
+    return 10.0, 2.0, False
+
+
+def athlete_teams(index: int, rng: np.random.Generator):
+    """Team array of athlete index (or None, like a few real rows)."""
+    if rng.random() < 0.02:
+        return None
+    if index % 3 == 0:
+        return [FOOTBALL_TEAM_ID]
+    return [f"team_{index % OTHER_TEAMS:02d}"]
+
+
+def generate(test_type: str, athletes: int = ATHLETES, dates: int = DATES, seed: int = SEED):
+    """Trial rows (dicts) of test_type, in timestamp order per athlete."""
+    cols = SNAPSHOT_COLUMNS[test_type]
+    rng = np.random.default_rng([seed, list(SNAPSHOT_COLUMNS).index(test_type)])
+    profiles = [metric_profile(col) for col in cols]
+    typical = np.array([p[0] for p in profiles])
+    spread = np.array([p[1] for p in profiles])
+    asymmetry = np.array([p[2] for p in profiles])
+    rows = []
+    for index in range(athletes):
+        teams = athlete_teams(index, rng)
+        team = teams[0] if teams else None
+        tz = ZoneInfo(TEAM_TIMEZONES.get(team, DEFAULT_TIMEZONE))
+        level = typical + rng.normal(0, 1, len(cols)) * spread
+        # Most athletes improve a little session over session
+        improvement = np.where(asymmetry, 0.0, rng.normal(0.002, 0.002, len(cols)) * typical)
+        offset_days = int(rng.integers(0, 3))
+        for session in range(dates):
+            start = (FIRST_SESSION + timedelta(days=7 * session + offset_days)).replace(tzinfo=tz)
+            session_level = level + improvement * session
+            for trial in range(TRIALS_PER_DATE):
+                values = session_level + rng.normal(0, 0.3, len(cols)) * spread
+                missing = rng.random(len(cols)) < NULL_RATE
+                rows.append({
+                    "athlete_name": f"Athlete {index:04d}",
+                    "timestamp": int(start.timestamp()) + 45 * trial,
+                    "athlete_teams": teams,
+                    **{
+                        col: None if missing[i] else round(float(values[i]), 4)
+                        for i, col in enumerate(cols)
+                    },
+                })
+    return rows
+
+
+def use_bench_schema(schema: str = SCHEMA) -> None:
+    """Point a Postgres DATABASE_URL at schema (call before the engine exists)."""
+    url = make_url(os.environ["DATABASE_URL"])
+    if url.get_backend_name() == "postgresql":
+        url = url.update_query_dict({"options": f"-csearch_path={schema}"})
+        os.environ["DATABASE_URL"] = url.render_as_string(hide_password=False)
+
+
+def load(athletes: int = ATHLETES, dates: int = DATES, seed: int = SEED) -> dict:
+    """Replace the trial tables of the engine's database with generated ones.
+
+    Returns {test_type: trials written, "seconds": elapsed}.
+    """
+    started = time.perf_counter()
+    engine = get_engine()
+    counts = {}
+    if engine.dialect.name == "postgresql":
+        schema = SCHEMA
+        with engine.begin() as conn:
+            conn.exec_driver_sql("SET LOCAL statement_timeout = 0")
+            conn.exec_driver_sql(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+            conn.exec_driver_sql(f"CREATE SCHEMA {schema}")
+            for test_type, cols in SNAPSHOT_COLUMNS.items():
+                metric_defs = ", ".join(f"{col} double precision" for col in cols)
+                conn.exec_driver_sql(
+                    f"CREATE TABLE {schema}.{test_type} (id bigserial PRIMARY KEY, "
+                    f"athlete_name text, timestamp bigint, athlete_teams json, {metric_defs})"
+                )
+    else:
+        metadata.drop_all(engine, tables=list(TRIAL_TABLES.values()))
+        metadata.create_all(engine, tables=list(TRIAL_TABLES.values()))
+    for test_type in SNAPSHOT_COLUMNS:
+        rows = generate(test_type, athletes, dates, seed)
+        with engine.begin() as conn:
+            conn.execute(insert(TRIAL_TABLES[test_type]), rows)
+        counts[test_type] = len(rows)
+    if engine.dialect.name == "postgresql":
+        # Rollups, moments, watermarks and memberships are backfilled here
+        upgrade()
+    counts["seconds"] = time.perf_counter() - started
+    return counts
+
+
+def main() -> int:
+    athletes = int(sys.argv[1]) if len(sys.argv) > 1 else ATHLETES
+    dates = int(sys.argv[2]) if len(sys.argv) > 2 else DATES
+    use_bench_schema()
+    counts = load(athletes, dates)
+    for test_type in SNAPSHOT_COLUMNS:
+        print(f"{test_type}: {counts[test_type]} trials")
+    print(f"loaded in {counts['seconds']:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""EXPLAIN checks: per-athlete queries must be served by index scans.
+
+Calls each per-athlete query function in models/queries.py once, captures the
+SQL it sends, and re-runs it under EXPLAIN (FORMAT JSON). Sequential scans are
+disabled for the check so a small seed table can't hide a missing index: if a
+plan still contains a Seq Scan on a test or rollup table, no index can serve it.
+Exits non-zero when any query fails.
+
+Run from the repository root after `python -m models.migrations`:
+    DATABASE_URL=postgresql://... python -m benchmarks.explain_index_scans
+"""
+
+import sys
+
+from sqlalchemy import event
+
+import models.queries as q
+from models.cache import query_cache
+from models.config import GAUGE_COLUMNS, ROLLUP_TABLES
+from models.db import get_engine
+from models.migrations import TEST_TABLES
+
+SCANNED_TABLES = set(TEST_TABLES) | set(ROLLUP_TABLES.values()) | {
+    "population_moments",
+    "athlete_team_members",
+}
+
+
+def capture(call) -> list[tuple[str, object]]:
+    """Run call() and return the (statement, parameters) pairs it executed."""
+    captured = []
+
+    def record(_conn, _cursor, statement, parameters, _context, _executemany):
+        captured.append((statement, parameters))
+
+    event.listen(get_engine(), "before_cursor_execute", record)
+    try:
+        query_cache.clear()
+        call()
+    finally:
+        event.remove(get_engine(), "before_cursor_execute", record)
+    return captured
+
+
+def plan_nodes(plan: dict):
+    """Yield every node of an EXPLAIN (FORMAT JSON) plan tree."""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def explain(statement: str, parameters) -> list[tuple[str, str | None]]:
+    """(node type, relation) for each plan node, with seq scans disabled."""
+    with get_engine().connect() as conn:
+        conn.exec_driver_sql("SET enable_seqscan = off")
+        result = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        plan = result.scalar()[0]["Plan"]
+        conn.rollback()
+    return [(node["Node Type"], node.get("Relation Name")) for node in plan_nodes(plan)]
+
+
+def main() -> int:
+    name = q.get_athlete_names()[0]
+    date = q.get_test_dates(name)[0]["value"]
+    cmj_name = q.get_football_athlete_names()[0]
+    cmj_date = q.get_cmj_test_dates(cmj_name)[0]["value"]
+
+    checks = {
+        "get_test_dates": lambda: q.get_test_dates(name),
+        "get_test_data": lambda: q.get_test_data(name, date),
+        "get_baseline_data": lambda: q.get_baseline_data(name),
+        "get_athlete_average": lambda: q.get_athlete_average(name),
+        "get_trend_data": lambda: q.get_trend_data(name),
+        "get_cmjr_baseline_asymmetry": lambda: q.get_cmjr_baseline_asymmetry(name),
+        "get_cmjr_date_asymmetry": lambda: q.get_cmjr_date_asymmetry(name, date),
+        "get_injury_data": lambda: q.get_injury_data(name, date),
+        "get_cmj_test_dates": lambda: q.get_cmj_test_dates(cmj_name),
+        "get_cmj_test_data": lambda: q.get_cmj_test_data(cmj_name, cmj_date),
+        "get_cmj_baseline_data": lambda: q.get_cmj_baseline_data(cmj_name),
+        "get_cmj_athlete_average": lambda: q.get_cmj_athlete_average(cmj_name),
+        "get_cmj_baseline_asymmetry": lambda: q.get_cmj_baseline_asymmetry(cmj_name),
+        "get_cmj_date_asymmetry": lambda: q.get_cmj_date_asymmetry(cmj_name, cmj_date),
+        "get_football_injury_data": lambda: q.get_football_injury_data(cmj_name, cmj_date),
+        "get_football_athlete_names": q.get_football_athlete_names,
+        "get_population_stats": lambda: q.get_population_stats(
+            GAUGE_COLUMNS, "tests_cmjr"
+        ),
+        "fetch_session_snapshot[tests_cmjr]": lambda: q.fetch_session_snapshot(
+            "tests_cmjr", name, date
+        ),
+        "fetch_session_snapshot[tests_cmj]": lambda: q.fetch_session_snapshot(
+            "tests_cmj", cmj_name, cmj_date
+        ),
+    }
+
+    failures = 0
+    for label, call in checks.items():
+        scans = set()
+        for statement, parameters in capture(call):
+            for node_type, relation in explain(statement, parameters):
+                if relation in SCANNED_TABLES:
+                    scans.add(node_type)
+        ok = bool(scans) and "Seq Scan" not in scans
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {label:<36} {', '.join(sorted(scans))}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
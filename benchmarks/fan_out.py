@@ -0,0 +1,84 @@
+"""Latency benchmark: sequential queries vs queries.fan_out vs the snapshot.
+
+Times the query set of the old update_bars callback (test data, last-5
+average, baseline) and of the athlete.py startup globals, run one after
+another and through q.fan_out. A simulated network round trip is added to
+every statement (sleeping in a before_cursor_execute hook, which releases
+the GIL like a real socket wait), so a local Postgres behaves like a remote one.
+
+Run from the repository root against a seeded database:
+    DATABASE_URL=postgresql://... python -m benchmarks.fan_out
+"""
+
+import statistics
+import time
+
+from sqlalchemy import event
+
+import models.queries as q
+from models.cache import query_cache
+from models.config import BAR_COLUMNS, GAUGE_COLUMNS
+from models.db import get_engine
+
+ROUNDS = 30
+LATENCIES_MS = (0, 2, 10)
+
+
+def bar_calls(name: str, date: str) -> list[tuple]:
+    return [
+        (q.get_test_data, name, date),
+        (q.get_athlete_average, name),
+        (q.get_baseline_data, name),
+    ]
+
+
+def startup_calls() -> list[tuple]:
+    return [
+        (q.get_athlete_names,),
+        (q.get_population_stats, GAUGE_COLUMNS, "tests_cmjr"),
+        (q.get_team_average, BAR_COLUMNS, "tests_cmjr"),
+    ]
+
+
+def sequential(calls: list[tuple]) -> list:
+    return [func(*args) for func, *args in calls]
+
+
+def time_ms(run) -> float:
+    samples = []
+    for _ in range(ROUNDS):
+        q.clear_session_snapshots()
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    name = q.get_athlete_names()[0]
+    date = q.get_test_dates(name)[0]["value"]
+    query_cache.enabled = False
+
+    print(f"median of {ROUNDS} rounds, ms")
+    print(f"{'latency':>8} {'bars seq':>9} {'bars fan':>9} {'snapshot':>9} {'start seq':>10} {'start fan':>10}")
+    for latency_ms in LATENCIES_MS:
+
+        def delay(*_args, latency=latency_ms / 1000):
+            time.sleep(latency)
+
+        event.listen(get_engine(), "before_cursor_execute", delay)
+        try:
+            row = [
+                time_ms(lambda: sequential(bar_calls(name, date))),
+                time_ms(lambda: q.fan_out(*bar_calls(name, date))),
+                time_ms(lambda: q.get_session_snapshot("tests_cmjr", name, date)),
+                time_ms(lambda: sequential(startup_calls())),
+                time_ms(lambda: q.fan_out(*startup_calls())),
+            ]
+        finally:
+            event.remove(get_engine(), "before_cursor_execute", delay)
+        print(f"{latency_ms:>6}ms " + " ".join(f"{v:>9.2f}" for v in row[:3]) + " " + " ".join(f"{v:>10.2f}" for v in row[3:]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Figure-builder micro-benchmark.
+
+The chart builders of athlete.py, football.py and summary.py return plain
+figure dicts, which Dash serializes without plotly's property validation.
+For each builder over a set of data shapes (empty, partial, typical and
+long inputs) this times building the dict, wrapping it in go.Figure (the
+validation the dicts skip) and serializing it with plotly's encoder, the
+one Dash sends figures with (median of ROUNDS calls, microseconds), and
+reports the serialized size and how much of it is the layout template.
+
+tests/test_figures.py checks the same shapes serialize unchanged through
+go.Figure.
+
+Run from the repository root (the pages import, no query runs):
+    python -m benchmarks.figures [--rounds 200]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import plotly.graph_objects as go
+from plotly.io.json import to_json_plotly
+
+import athlete
+import football
+import summary
+from models.config import FOOTBALL_INJURY_CONFIG, INJURY_CONFIG
+
+ROUNDS = 200
+
+
+def trend_shape(n: int):
+    dates = [date(2024, 1, 1) + timedelta(days=7 * i) for i in range(n)]
+    values = [round(30 + 2 * np.sin(i) + 0.3 * i, 3) for i in range(n)]
+    return dates, values, "Jump Height (cm)"
+
+
+def injury_row(config, scale: float, missing: bool = False) -> dict:
+    return {
+        col: None if missing and i % 2 else round(scale * (i - 2) * 4.7, 2)
+        for i, (_, _, col) in enumerate(config)
+    }
+
+
+# (label, builder, [(shape, args), ...])
+CASES = [
+    ("athlete.create_gauge", athlete.create_gauge, [
+        ("default", (50, "Jump Height")),
+        ("baseline", (73.4, "RSI", 41.2)),
+        ("clamped", (0.0, "Peak Power", 100.0)),
+    ]),
+    ("athlete.create_bar_chart", athlete.create_bar_chart, [
+        ("zeros", (0, 0, 0, 0, "—", "")),
+        ("missing", (None, 31.2, None, None, "Jump Height", "cm")),
+        ("typical", (34.567, 33.1, 30.04, 29.9, "Jump Height", "cm")),
+    ]),
+    ("athlete.create_diverging_chart", athlete.create_diverging_chart, [
+        ("empty", ({}, {})),
+        ("baseline only", (injury_row(INJURY_CONFIG, 1), {})),
+        ("both", (injury_row(INJURY_CONFIG, 1), injury_row(INJURY_CONFIG, 2.5))),
+        ("partial", (injury_row(INJURY_CONFIG, 1, True), injury_row(INJURY_CONFIG, 6, True))),
+    ]),
+    ("athlete.create_trend_chart", athlete.create_trend_chart, [
+        ("empty", trend_shape(0)),
+        ("1 test", trend_shape(1)),
+        ("2 tests", trend_shape(2)),
+        ("7 tests", trend_shape(7)),
+        ("60 tests", trend_shape(60)),
+    ]),
+    ("football.create_bar_chart", football.create_bar_chart, [
+        ("zeros", (0, 0, 0, 0, "—", "")),
+        ("typical", (1812.5, 1790.25, 1702.0, None, "Peak Force", "N")),
+    ]),
+    ("football.create_zscore_bar", football.create_zscore_bar, [
+        ("zeros", (0, 0, "RSI")),
+        ("missing", (None, None, "RSI")),
+        ("typical", (61.2, 47.5, "Jump Height")),
+    ]),
+    ("football.create_diverging_chart", football.create_diverging_chart, [
+        ("empty", ({}, {})),
+        ("both", (injury_row(FOOTBALL_INJURY_CONFIG, 1),
+                  injury_row(FOOTBALL_INJURY_CONFIG, 3))),
+    ]),
+    ("summary.create_grip_comparison_bar", summary.create_grip_comparison_bar, [
+        ("close", ("Peak Force", 55.1, 52.0)),
+        ("apart", ("Time to Peak Force", 12.4, 88.6)),
+    ]),
+    ("summary.create_asymmetry_chart", summary.create_asymmetry_chart, [
+        ("empty", ({},)),
+        ("mock", (summary.ASYMMETRY_DATA,)),
+        ("20 metrics", ({f"Metric {i}": (i - 10) * 3.3 for i in range(20)},)),
+    ]),
+]
+
+
+def timed(function, rounds: int) -> float:
+    """Median microseconds per call."""
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1e6
+
+
+def run(rounds: int) -> int:
+    print(
+        f"{'builder':<36} {'shape':<14} {'build':>7} {'go.Figure':>9} "
+        f"{'ser':>8} {'bytes':>7} {'tmpl%':>6}"
+    )
+    for label, builder, shapes in CASES:
+        for shape, args in shapes:
+            figure = builder(*args)
+            payload = to_json_plotly(figure)
+            template = len(
+                json.dumps(figure["layout"].get("template", {}), separators=(",", ":"))
+            )
+            print(
+                f"{label:<36} {shape:<14} "
+                f"{timed(lambda: builder(*args), rounds):>7.1f} "
+                f"{timed(lambda: go.Figure(figure), rounds):>9.1f} "
+                f"{timed(lambda: to_json_plotly(figure), rounds):>8.1f} "
+                f"{len(payload):>7} {100 * template / len(payload):>6.1f}"
+            )
+    print("\nmicroseconds, median per call: build = dict builder, go.Figure = validating it,")
+    print("ser = plotly JSON encoding as Dash does it; tmpl% = share of bytes in layout.template")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    args = parser.parse_args()
+    return run(args.rounds)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,393 @@
+"""Concurrent-user load test of a dashboard page under each serving mode.
+
+Starts the page's Dash app in a subprocess under each MODES entry, waits
+for its /ready probe, then runs closed-loop virtual users against it for
+DURATION seconds at each concurrency level. Every user replays browsing
+sessions the way the Dash renderer issues requests:
+
+  1. load the page: GET /, /_dash-layout and /_dash-dependencies;
+  2. pick a random athlete from the layout's dropdown, which fires every
+     callback whose first input is the athlete dropdown (date dropdown,
+     trends) at once;
+  3. page through DATES_PER_SESSION of that athlete's dates, each firing
+     the date-driven callbacks at once (up to BROWSER_CONNECTIONS in
+     flight, as a browser does per host), then THINK_SECONDS of reading
+     (printing a page is client-side and adds no requests).
+
+Per level it reports sessions and requests per second, request latency
+p50/p95/p99 and errors. The breaking point of a mode is the first level
+whose p95 exceeds --slo-ms, whose error rate passes 1%, or whose
+throughput grew less than 10% over the level before.
+
+Modes: dev is the standalone `app.run(debug=True)` (reloader off), threaded
+is Werkzeug with debug off, single is Werkzeug serving one request at a
+time, and gunicorn (when installed) runs WORKERS processes of WEB_THREADS
+threads.
+
+Run from the repository root against a seeded local database:
+    DATABASE_URL=postgresql+psycopg://... python -m benchmarks.load_test \\
+        [--page athlete] [--modes dev,threaded] [--levels 1,2,4,8,16] \\
+        [--duration 20] [--output load.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+MODES = ("dev", "threaded", "single", "gunicorn")
+LEVELS = (1, 2, 4, 8, 16, 32)
+DURATION = 20
+DATES_PER_SESSION = 3
+BROWSER_CONNECTIONS = 6
+THINK_SECONDS = 0.0
+SLO_MS = 2000
+WORKERS = 2
+READY_TIMEOUT_S = 60
+
+
+# ---------------- Server side ----------------
+def create_app(page_name: str):
+    """page_name's standalone Dash app, set up as its __main__ block does."""
+    import importlib
+
+    from dash import Dash
+
+    import models.metrics as metrics
+    from models.refresher import readiness_probe, refresher
+
+    page = importlib.import_module(page_name)
+    app = Dash(page_name)
+    app.layout = page.serve_layout
+    app.server.add_url_rule("/ready", "ready", readiness_probe)
+    metrics.install(app.server)
+    refresher.warm()
+    return app
+
+
+def create_server(page_name: str):
+    """The Flask server of page_name's app (the gunicorn factory)."""
+    return create_app(page_name).server
+
+
+def serve(page_name: str, mode: str, port: int) -> None:
+    app = create_app(page_name)
+    if mode == "dev":
+        # What `python athlete.py` runs, minus the reloader's second process
+        app.run(port=port, debug=True, use_reloader=False)
+    else:
+        app.run(port=port, debug=False, threaded=mode == "threaded")
+
+
+def start(page_name: str, mode: str, port: int, log) -> subprocess.Popen | None:
+    """Start the server process for mode, or None if the mode isn't available."""
+    if mode == "gunicorn":
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            print("gunicorn not installed: skipping")
+            return None
+        from models.config import WEB_THREADS
+
+        command = [
+            sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{port}",
+            "--workers", str(WORKERS), "--threads", str(WEB_THREADS),
+            f"benchmarks.load_test:create_server('{page_name}')",
+        ]
+    else:
+        command = [
+            sys.executable, "-m", "benchmarks.load_test",
+            "--serve", page_name, "--mode", mode, "--port", str(port),
+        ]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=log)
+    deadline = time.monotonic() + READY_TIMEOUT_S
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/ready", timeout=1).status_code == 200:
+                return process
+        except requests.ConnectionError:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.2)
+    process.kill()
+    process.wait()
+    log.seek(0)
+    raise RuntimeError(f"{mode} server did not become ready:\n{log.read()[-2000:]}")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# ---------------- Client side ----------------
+def find_component(tree, component_id: str):
+    """The props of component_id in a /_dash-layout tree."""
+    if isinstance(tree, dict):
+        props = tree.get("props", {})
+        if props.get("id") == component_id:
+            return props
+        for value in props.values():
+            found = find_component(value, component_id)
+            if found is not None:
+                return found
+    elif isinstance(tree, list):
+        for item in tree:
+            found = find_component(item, component_id)
+            if found is not None:
+                return found
+    return None
+
+
+def parse_outputs(output: str) -> list[dict]:
+    parts = output.strip(".").split("...") if output.startswith("..") else [output]
+    outputs = []
+    for part in parts:
+        component_id, prop = part.rsplit(".", 1)
+        outputs.append({"id": component_id, "property": prop})
+    return outputs
+
+
+def request_body(dependency: dict, values: dict) -> dict:
+    outputs = parse_outputs(dependency["output"])
+
+    def fill(items):
+        return [{**item, "value": values.get(item["id"])} for item in items]
+
+    return {
+        "output": dependency["output"],
+        "outputs": outputs if dependency["output"].startswith("..") else outputs[0],
+        "inputs": fill(dependency["inputs"]),
+        "state": fill(dependency["state"]),
+        "changedPropIds": [f"{dep['id']}.{dep['property']}" for dep in dependency["inputs"][:1]],
+    }
+
+
+class Recorder:
+    """Request latencies and errors of one load level, from every user thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies_ms: list[float] = []
+        self.errors = 0
+        self.sessions = 0
+
+    def request(self, session: requests.Session, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=60, **kwargs)
+            ok = response.status_code in (200, 204)
+        except requests.RequestException:
+            response, ok = None, False
+        elapsed = (time.perf_counter() - started) * 1000
+        with self.lock:
+            self.latencies_ms.append(elapsed)
+            self.errors += not ok
+        return response if ok else None
+
+
+class User:
+    """One virtual staff member replaying browsing sessions."""
+
+    def __init__(self, base: str, recorder: Recorder, seed: int):
+        self.base = base
+        self.recorder = recorder
+        self.random = random.Random(seed)
+        self.local = threading.local()
+        self.pool = ThreadPoolExecutor(BROWSER_CONNECTIONS)
+
+    def session(self) -> requests.Session:
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def get(self, path: str):
+        return self.recorder.request(self.session(), "GET", self.base + path)
+
+    def fire(self, dependencies: list[dict], values: dict) -> list:
+        """Post the callbacks at once, like the renderer after one input change."""
+
+        def post(dependency):
+            return self.recorder.request(
+                self.session(), "POST", self.base + "/_dash-update-component",
+                json=request_body(dependency, values),
+            )
+
+        return list(self.pool.map(post, dependencies))
+
+    def browse(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            self.get("/")
+            layout = self.get("/_dash-layout")
+            dependencies = self.get("/_dash-dependencies")
+            if layout is None or dependencies is None:
+                continue
+            dependencies = dependencies.json()
+            dropdown = find_component(layout.json(), "athlete-dropdown") or {}
+            team = (find_component(layout.json(), "team-dropdown") or {}).get("value")
+            names = [option["value"] for option in dropdown.get("options") or []]
+            if not names:
+                time.sleep(0.5)  # roster still loading
+                continue
+            values = {"athlete-dropdown": self.random.choice(names), "team-dropdown": team}
+
+            def first_input(component_id):
+                return [
+                    dep for dep in dependencies
+                    if dep["inputs"] and dep["inputs"][0]["id"] == component_id
+                ]
+
+            responses = self.fire(first_input("athlete-dropdown"), values)
+            dates = []
+            for response in responses:
+                if response is not None and response.status_code == 200:
+                    body = response.json().get("response", {})
+                    dates = body.get("date-dropdown", {}).get("options") or dates
+            for option in self.random.sample(dates, min(DATES_PER_SESSION, len(dates))):
+                values["date-dropdown"] = option["value"]
+                date_driven = [
+                    dep for dep in dependencies
+                    if any(item["id"] == "date-dropdown" for item in dep["inputs"])
+                ]
+                self.fire(date_driven, values)
+                if stop.wait(THINK_SECONDS):
+                    break
+            with self.recorder.lock:
+                self.recorder.sessions += 1
+
+
+def run_level(base: str, users: int, duration: float) -> dict:
+    recorder = Recorder()
+    stop = threading.Event()
+    crowd = [User(base, recorder, seed) for seed in range(users)]
+    threads = [threading.Thread(target=user.browse, args=(stop,)) for user in crowd]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    for user in crowd:
+        user.pool.shutdown()
+    latencies = np.array(recorder.latencies_ms or [0.0])
+    p50, p95, p99 = np.percentile(latencies, (50, 95, 99))
+    requests_made = len(recorder.latencies_ms)
+    return {
+        "users": users,
+        "sessions_per_s": round(recorder.sessions / elapsed, 3),
+        "requests_per_s": round(requests_made / elapsed, 2),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "requests": requests_made,
+        "errors": recorder.errors,
+    }
+
+
+def breaking_point(levels: list[dict], slo_ms: float) -> dict | None:
+    """The first level that misses the SLO, errors, or stops adding throughput."""
+    previous = None
+    for level in levels:
+        reasons = []
+        if level["p95_ms"] > slo_ms:
+            reasons.append(f"p95 {level['p95_ms']:.0f} ms > {slo_ms:.0f} ms")
+        if level["requests"] and level["errors"] / level["requests"] > 0.01:
+            reasons.append(f"{level['errors']} errors")
+        if previous and level["requests_per_s"] < previous["requests_per_s"] * 1.1:
+            reasons.append("throughput flat")
+        if reasons:
+            return {"users": level["users"], "reasons": reasons}
+        previous = level
+    return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page", default="athlete", choices=("athlete", "football"))
+    parser.add_argument("--modes", default="dev,threaded,single,gunicorn")
+    parser.add_argument("--levels", default=",".join(map(str, LEVELS)))
+    parser.add_argument("--duration", type=float, default=DURATION)
+    parser.add_argument("--slo-ms", type=float, default=SLO_MS)
+    parser.add_argument("--synthetic", help="build a benchmarks/dataset.py size first")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--serve", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.mode, args.port)
+        return 0
+
+    modes = [mode for mode in args.modes.split(",") if mode]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(unknown)}")
+    levels = [int(level) for level in args.levels.split(",") if level]
+
+    if args.synthetic:
+        from benchmarks.dataset import load, use_bench_schema
+        from benchmarks.query_suite import SIZES
+
+        # Sets DATABASE_URL's search_path, which the servers inherit
+        use_bench_schema()
+        load(*SIZES[args.synthetic])
+
+    results = {
+        "page": args.page,
+        "synthetic": args.synthetic,
+        "duration_s": args.duration,
+        "cpus": os.cpu_count(),
+        "modes": {},
+    }
+    for mode in modes:
+        port = free_port()
+        with tempfile.TemporaryFile("w+") as log:
+            process = start(args.page, mode, port, log)
+        if process is None:
+            continue
+        try:
+            runs = []
+            print(f"\n{mode}")
+            print(f"{'users':>6} {'sess/s':>8} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7}")
+            for users in levels:
+                level = run_level(f"http://127.0.0.1:{port}", users, args.duration)
+                runs.append(level)
+                print(
+                    f"{users:>6} {level['sessions_per_s']:>8.2f} {level['requests_per_s']:>8.1f} "
+                    f"{level['p50_ms']:>8.1f} {level['p95_ms']:>8.1f} {level['p99_ms']:>8.1f} "
+                    f"{level['errors']:>7}"
+                )
+        finally:
+            process.terminate()
+            process.wait()
+        broken = breaking_point(runs, args.slo_ms)
+        if broken:
+            print(f"breaking point: {broken['users']} users ({'; '.join(broken['reasons'])})")
+        else:
+            print("no breaking point within the levels tried")
+        results["modes"][mode] = {"levels": runs, "breaking_point": broken}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nwrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Percentile scoring check: PercentileIndex ranks vs a brute-force count.
+
+For every SNAPSHOT_COLUMNS metric of both tables, over ALL_SEGMENT and the
+football team, ranks the first PROBES trial values (plus values below, above
+and at the median) with an exact PercentileIndex and a sketch-only one
+(exact_limit=0), and compares them with the mid-rank computed by counting
+the fetched values. Prints the worst sketch error, load times and the cost
+of scoring one gauge callback's values. Exits non-zero when an exact rank
+differs from the count.
+
+Run from the repository root after `python -m models.migrations`, or
+against a SQLite / DuckDB file (the portable backend serves the values):
+    DATABASE_URL=postgresql://... python -m benchmarks.percentiles
+"""
+
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from models.config import ALL_SEGMENT, FOOTBALL_TEAM_ID, GAUGE_COLUMNS, SNAPSHOT_COLUMNS
+from models.db import get_engine
+from models.percentiles import PercentileIndex
+from models.portable import statement
+
+PROBES = 50
+ROUNDS = 1000
+
+
+def fetch_values(test_type: str, segment: str) -> list:
+    shape = "values" if segment == ALL_SEGMENT else "team_values"
+    query = statement(test_type, shape, SNAPSHOT_COLUMNS[test_type])
+    with get_engine().connect() as conn:
+        return conn.execute(query, {"segment": segment}).fetchall()
+
+
+def mid_rank(values: np.ndarray, probe: float) -> float:
+    return 100 * ((values < probe).sum() + 0.5 * (values == probe).sum()) / len(values)
+
+
+def main() -> int:
+    exact, sketch = PercentileIndex(), PercentileIndex(exact_limit=0)
+    failures, worst = 0, 0.0
+    for test_type, cols in SNAPSHOT_COLUMNS.items():
+        for segment in (ALL_SEGMENT, FOOTBALL_TEAM_ID):
+            for index, label in ((exact, "exact"), (sketch, "sketch")):
+                started = time.perf_counter()
+                index.distributions(test_type, segment)
+                elapsed = (time.perf_counter() - started) * 1000
+                print(f"load {label:<6} {test_type} {segment}: {elapsed:.1f} ms")
+            rows = fetch_values(test_type, segment)
+            for i, col in enumerate(cols):
+                values = np.array([row[i] for row in rows if row[i] is not None])
+                if not len(values):
+                    continue
+                probes = values[:PROBES].tolist()
+                probes += [values.min() - 1, values.max() + 1, float(np.median(values))]
+                found = exact.score(test_type, {col: probes}, segment)[col]
+                approx = sketch.score(test_type, {col: probes}, segment)[col]
+                for probe, rank, estimate in zip(probes, found, approx):
+                    if abs(rank - mid_rank(values, probe)) > 1e-9:
+                        failures += 1
+                        print(f"FAIL {test_type} {segment} {col} at {probe}")
+                    worst = max(worst, abs(rank - estimate))
+
+    gauge_values = {col: [1.0, 2.0] for col in GAUGE_COLUMNS}
+    samples = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        exact.score("tests_cmjr", gauge_values)
+        samples.append((time.perf_counter() - started) * 1e6)
+
+    print(f"exact ranks: {'ok' if not failures else f'{failures} mismatches'}")
+    print(f"worst sketch error: {worst:.3f} percentile points")
+    print(f"score {len(GAUGE_COLUMNS)} gauges x 2 values: {statistics.median(samples):.1f} us")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
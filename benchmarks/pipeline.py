@@ -0,0 +1,176 @@
+"""Latency benchmark: statements one by one vs queries.batch (pipeline mode).
+
+Routes the engine through a local TCP proxy that holds every chunk of bytes
+for half the simulated round-trip time in each direction, so a local
+Postgres behaves like a remote one. Unlike a per-statement sleep, the proxy
+delays the wire itself: pipelined statements that travel together pay the
+round trip once.
+
+Compares the session snapshot's two statements, and the eight statements of
+the old per-callback flow (update_gauges, update_bars, update_injury_chart,
+update_injury_data), run one after another on one connection and as one
+batch. Needs the psycopg (3) driver for the batch to pipeline.
+
+Run from the repository root against a seeded database:
+    DATABASE_URL=postgresql+psycopg://... python -m benchmarks.pipeline
+"""
+
+import os
+import socket
+import statistics
+import threading
+import time
+from collections import deque
+
+from sqlalchemy.engine import make_url
+
+import models.queries as q
+from models.config import (
+    ALL_SEGMENT,
+    ASYMMETRY_COLUMNS,
+    BAR_COLUMNS,
+    GAUGE_COLUMNS,
+    INJURY_DATA,
+    SNAPSHOT_COLUMNS,
+)
+from models.db import get_engine
+from models.registry import statement
+
+ROUNDS = 30
+RTTS_MS = (0, 2, 10, 30)
+
+
+class LatencyProxy:
+    """TCP proxy adding a fixed one-way delay to every chunk in both directions."""
+
+    def __init__(self, upstream: tuple):
+        self.delay = 0.0
+        self.upstream = upstream
+        self._listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self._listener.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _connect_upstream(self) -> socket.socket:
+        if self.upstream[0] == "unix":
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.upstream[1])
+            return sock
+        return socket.create_connection(self.upstream[1:])
+
+    def _accept(self) -> None:
+        while True:
+            client, _ = self._listener.accept()
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            server = self._connect_upstream()
+            self._pump(client, server)
+            self._pump(server, client)
+
+    def _pump(self, source: socket.socket, sink: socket.socket) -> None:
+        pending = deque()
+        ready = threading.Condition()
+
+        def read():
+            while chunk := source.recv(65536):
+                with ready:
+                    pending.append((time.monotonic() + self.delay, chunk))
+                    ready.notify()
+            with ready:
+                pending.append((time.monotonic() + self.delay, b""))
+                ready.notify()
+
+        def write():
+            while True:
+                with ready:
+                    while not pending:
+                        ready.wait()
+                    due, chunk = pending.popleft()
+                time.sleep(max(0.0, due - time.monotonic()))
+                if not chunk:
+                    sink.close()
+                    return
+                sink.sendall(chunk)
+
+        threading.Thread(target=read, daemon=True).start()
+        threading.Thread(target=write, daemon=True).start()
+
+
+def route_through_proxy() -> LatencyProxy:
+    """Start a proxy to DATABASE_URL's server and point DATABASE_URL at it."""
+    url = make_url(os.environ["DATABASE_URL"])
+    socket_dir = url.query.get("host")
+    if socket_dir:
+        upstream = ("unix", f"{socket_dir}/.s.PGSQL.{url.port or 5432}")
+    else:
+        upstream = ("tcp", url.host or "localhost", url.port or 5432)
+    proxy = LatencyProxy(upstream)
+    proxied = url.difference_update_query(["host"]).set(host="127.0.0.1", port=proxy.port)
+    os.environ["DATABASE_URL"] = proxied.render_as_string(hide_password=False)
+    return proxy
+
+
+def snapshot_queries(name: str, date: str) -> list[tuple]:
+    cols = SNAPSHOT_COLUMNS["tests_cmjr"]
+    return [
+        (statement("tests_cmjr", "snapshot", cols), {"name": name, "test_date": date}),
+        (
+            q.POPULATION_STATS_QUERY,
+            {"test_type": "tests_cmjr", "segment": ALL_SEGMENT, "metrics": cols},
+        ),
+    ]
+
+
+def legacy_queries(name: str, date: str) -> list[tuple]:
+    on_date = {"name": name, "test_date": date}
+    athlete = {"name": name}
+    return [
+        (statement("tests_cmjr", "date", GAUGE_COLUMNS + BAR_COLUMNS), on_date),
+        (statement("tests_cmjr", "baseline", GAUGE_COLUMNS + BAR_COLUMNS), athlete),
+        (statement("tests_cmjr", "date", GAUGE_COLUMNS + BAR_COLUMNS), on_date),
+        (statement("tests_cmjr", "last5", BAR_COLUMNS), athlete),
+        (statement("tests_cmjr", "baseline", GAUGE_COLUMNS + BAR_COLUMNS), athlete),
+        (statement("tests_cmjr", "baseline", ASYMMETRY_COLUMNS), athlete),
+        (statement("tests_cmjr", "date", ASYMMETRY_COLUMNS), on_date),
+        (statement("tests_cmjr", "date", INJURY_DATA), on_date),
+    ]
+
+
+def one_by_one(queries: list[tuple]) -> list[list[dict]]:
+    with get_engine().connect() as conn:
+        return [
+            [dict(row) for row in conn.execute(query, params).mappings()]
+            for query, params in queries
+        ]
+
+
+def time_ms(run) -> float:
+    samples = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    proxy = route_through_proxy()
+    name = q.get_athlete_names()[0]
+    date = q.get_test_dates(name)[0]["value"]
+    snapshot = snapshot_queries(name, date)
+    legacy = legacy_queries(name, date)
+    assert q.batch(legacy) == one_by_one(legacy)
+
+    print(f"driver {get_engine().dialect.driver}, median of {ROUNDS} rounds, ms")
+    print(f"{'rtt':>5} {'snap 1x1':>9} {'snap batch':>11} {'8q 1x1':>9} {'8q batch':>9}")
+    for rtt_ms in RTTS_MS:
+        proxy.delay = rtt_ms / 2000
+        row = [
+            time_ms(lambda: one_by_one(snapshot)),
+            time_ms(lambda: q.batch(snapshot)),
+            time_ms(lambda: one_by_one(legacy)),
+            time_ms(lambda: q.batch(legacy)),
+        ]
+        print(f"{rtt_ms:>5} {row[0]:>9.2f} {row[1]:>11.2f} {row[2]:>9.2f} {row[3]:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Dialect parity check: the portable query layer on Postgres, SQLite and DuckDB.
+
+Copies the trial tables from DATABASE_URL into a SQLite and a DuckDB file
+(portable.copy_trials), then checks that PortableQueries answers every
+routed query function, for every athlete and date of both tables, like the
+Postgres rollup path in queries.py does: on the Postgres tables themselves
+and on both copies (floats compared to 1e-9 relative). Also prints the
+median latency of each function per backend. Exits non-zero on any
+mismatch. DuckDB needs the duckdb and duckdb-engine packages; it is skipped
+without them.
+
+Run from the repository root after `python -m models.migrations`:
+    DATABASE_URL=postgresql+psycopg://... python -m benchmarks.portable
+"""
+
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+import models.queries as q
+from benchmarks.columnar import cases, same
+from models.cache import query_cache
+from models.config import ALL_SEGMENT, PERCENTILE_SKETCH_POINTS, SNAPSHOT_COLUMNS
+from models.db import get_engine
+from models.portable import PortableQueries, copy_trials
+
+ROUNDS = 50
+# Quantiles of a percentile sketch, as percentiles.py asks for them
+FRACTIONS = [i / (PERCENTILE_SKETCH_POINTS - 1) for i in range(PERCENTILE_SKETCH_POINTS)]
+
+
+def local_engines(directory: Path) -> dict:
+    engines = {"sqlite": create_engine(f"sqlite:///{directory / 'trials.sqlite'}")}
+    try:
+        import duckdb_engine  # noqa: F401
+    except ImportError:
+        print("duckdb-engine not installed: skipping DuckDB")
+    else:
+        engines["duckdb"] = create_engine(f"duckdb:///{directory / 'trials.duckdb'}")
+    return engines
+
+
+def parity(label: str, backend: PortableQueries) -> int:
+    """Compare every athlete and date of both tables; returns the mismatch count."""
+    failures = 0
+
+    def check(function: str, *args) -> None:
+        nonlocal failures
+        q.clear_session_snapshots()
+        if not same(getattr(q, function)(*args), getattr(backend, function)(*args)):
+            failures += 1
+            print(f"FAIL {label} {function}{args[:1] + args[2:]}")
+
+    check("get_athlete_names")
+    for test_type, names in (
+        ("tests_cmjr", q.get_athlete_names()),
+        ("tests_cmj", q.get_football_athlete_names()),
+    ):
+        cols = SNAPSHOT_COLUMNS[test_type]
+        check("get_team_average", cols, test_type)
+        check("get_population_stats", cols, test_type)
+        for segment in {ALL_SEGMENT} | _teams(test_type):
+            # Every value, then a quantile sketch
+            check("get_value_distributions", test_type, segment, 10**9, FRACTIONS)
+            check("get_value_distributions", test_type, segment, 0, FRACTIONS)
+        for segment in _teams(test_type):
+            check("get_population_stats", cols, test_type, segment)
+            check("get_team_athlete_names", segment, test_type)
+            check("get_team_average", cols, test_type, segment)
+        for name in names:
+            check("get_dates", test_type, name)
+            check("get_baseline_metrics", test_type, cols, name)
+            check("get_last5_metrics", test_type, cols, name)
+            check("get_alltime_metrics", test_type, cols, name)
+            check("get_trend_metrics", test_type, cols, name)
+            for date in q.get_dates(test_type, name):
+                check("get_date_metrics", test_type, cols, name, date["value"])
+                check("fetch_session_snapshot", test_type, name, date["value"])
+    return failures
+
+
+def _teams(test_type: str) -> set:
+    """Team IDs with population_moments rows for test_type."""
+    with get_engine().connect() as conn:
+        return set(
+            conn.execute(
+                text(
+                    "SELECT DISTINCT segment FROM population_moments "
+                    "WHERE test_type = :test_type AND segment <> :all"
+                ),
+                {"test_type": test_type, "all": ALL_SEGMENT},
+            ).scalars()
+        )
+
+
+def time_us(call) -> float:
+    samples = []
+    for _ in range(ROUNDS):
+        q.clear_session_snapshots()
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(samples)
+
+
+def main() -> int:
+    query_cache.enabled = False
+    with tempfile.TemporaryDirectory() as directory:
+        backends = {"postgres": PortableQueries(get_engine())}
+        for name, engine in local_engines(Path(directory)).items():
+            started = time.perf_counter()
+            copied = copy_trials(get_engine(), engine)
+            print(f"copy to {name}: {sum(copied.values())} trials in {time.perf_counter() - started:.1f} s")
+            backends[name] = PortableQueries(engine)
+
+        failures = 0
+        for label, backend in backends.items():
+            found = parity(label, backend)
+            print(f"parity, portable on {label}: {'ok' if not found else f'{found} mismatches'}")
+            failures += found
+
+        print(f"\nmedian of {ROUNDS} calls, microseconds")
+        print(f"{'function':<34} {'rollups':>9}" + "".join(f" {label:>9}" for label in backends))
+        for label, (function, *args) in cases().items():
+            row = [time_us(lambda: getattr(q, function)(*args))]
+            row += [time_us(lambda: getattr(b, function)(*args)) for b in backends.values()]
+            print(f"{label:<34}" + "".join(f" {us:>9.1f}" for us in row))
+
+        for backend in backends.values():
+            if backend._engine is not get_engine():
+                backend._engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""Latency suite for every public query function of models/queries.py.
+
+For each dataset size (ATHLETES x DATES x 3 trials per table, built by
+benchmarks/dataset.py) times every get_* function of models.queries, for
+both test tables where it takes a test_type, over ROUNDS calls on randomly
+picked athletes and dates (fixed seed). Two modes per function:
+
+  * uncached: the query cache disabled and the session-snapshot memo
+    cleared before each call, so every call reaches the backend;
+  * cached: the query cache on and warmed, as in production (backends
+    other than Postgres bypass the cache, so both modes match there).
+
+Each size runs in a fresh interpreter, so no copy or cache carries over.
+Prints p50/p95/p99 (ms) and writes the results, with the commit, backend
+and dialect they came from, as JSON. --compare BASELINE.json prints the
+p50 ratio against an earlier run and exits non-zero when any function got
+slower than the threshold.
+
+The database at DATABASE_URL is only written in its queries_bench schema
+on Postgres; a SQLite or DuckDB DATABASE_URL is rebuilt outright, so point
+it at a scratch file. QUERY_BACKEND picks the backend as usual.
+
+Run from the repository root:
+    DATABASE_URL=postgresql+psycopg://... python -m benchmarks.query_suite \\
+        [--sizes small,medium] [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import inspect
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+SIZES = {
+    "small": (50, 20),
+    "medium": (200, 40),
+    "large": (1000, 60),
+}
+ROUNDS = 200
+SAMPLED_ATHLETES = 50
+SEED = 7
+QUANTILES = (50, 95, 99)
+RESULTS_DIR = os.path.join("benchmarks", "results")
+REGRESSION_THRESHOLD = 0.25
+
+
+def table_of(name: str, parameters) -> list[str]:
+    """Tables to time a function on: both if it takes test_type."""
+    if "test_type" in parameters:
+        return ["tests_cmjr", "tests_cmj"]
+    # The pre-registry wrappers are named after their table
+    return ["tests_cmj" if "cmj_" in name or "football" in name else "tests_cmjr"]
+
+
+def cases():
+    """(label, function, test_type, required params, takes_type) per query function."""
+    import models.queries as q
+
+    found = []
+    for name, function in sorted(vars(q).items()):
+        if not name.startswith("get_") or getattr(function, "__module__", None) != q.__name__:
+            continue
+        parameters = inspect.signature(function).parameters
+        required = [p for p, spec in parameters.items() if spec.default is inspect.Parameter.empty]
+        for test_type in table_of(name, parameters):
+            label = f"{name}[{test_type}]" if "test_type" in parameters else name
+            found.append((label, function, test_type, required, "test_type" in parameters))
+    return found
+
+
+def arguments(parameters, test_type: str, athlete: str, date: str, takes_type: bool) -> dict:
+    from models.config import FOOTBALL_TEAM_ID, SNAPSHOT_COLUMNS
+
+    values = {
+        "test_type": test_type,
+        "metrics": SNAPSHOT_COLUMNS[test_type],
+        "column_metrics": SNAPSHOT_COLUMNS[test_type],
+        "athlete_name": athlete,
+        "test_date_iso": date,
+        "team_id": FOOTBALL_TEAM_ID,
+    }
+    chosen = {p: values[p] for p in parameters}
+    if takes_type:
+        chosen["test_type"] = test_type
+    return chosen
+
+
+def quantiles(samples: list[float]) -> dict:
+    points = np.percentile(samples, QUANTILES)
+    return {
+        **{f"p{q}_ms": round(float(v), 4) for q, v in zip(QUANTILES, points)},
+        "mean_ms": round(float(np.mean(samples)), 4),
+        "n": len(samples),
+    }
+
+
+def run_size(size: str, rounds: int) -> dict:
+    """Build one dataset and time every function on it (in this interpreter)."""
+    from benchmarks.dataset import load, use_bench_schema
+
+    use_bench_schema()
+    import models.queries as q
+    from models.cache import query_cache
+
+    athletes, dates = SIZES[size]
+    counts = load(athletes, dates)
+    rng = np.random.default_rng(SEED)
+
+    # Untimed: the athletes and dates the timed calls pick from
+    query_cache.enabled = False
+    names = [f"Athlete {i:04d}" for i in rng.choice(athletes, SAMPLED_ATHLETES, replace=False)]
+    sessions = {
+        test_type: [
+            (name, date["value"])
+            for name in names
+            for date in q.get_dates(test_type, name)
+        ]
+        for test_type in ("tests_cmjr", "tests_cmj")
+    }
+
+    functions = {}
+    for label, function, test_type, parameters, takes_type in cases():
+        picks = rng.integers(0, len(sessions[test_type]), rounds)
+        calls = [
+            arguments(parameters, test_type, *sessions[test_type][pick], takes_type)
+            for pick in picks
+        ]
+        results = {}
+        for mode in ("uncached", "cached"):
+            query_cache.enabled = mode == "cached"
+            if mode == "cached":
+                for kwargs in calls:
+                    function(**kwargs)
+            samples = []
+            for kwargs in calls:
+                if mode == "uncached":
+                    q.clear_session_snapshots()
+                started = time.perf_counter()
+                function(**kwargs)
+                samples.append((time.perf_counter() - started) * 1000)
+            results[mode] = quantiles(samples)
+        functions[label] = results
+    return {
+        "athletes": athletes,
+        "dates": dates,
+        "trials": {t: counts[t] for t in ("tests_cmjr", "tests_cmj")},
+        "build_s": round(counts["seconds"], 2),
+        "functions": functions,
+    }
+
+
+def metadata(rounds: int) -> dict:
+    from sqlalchemy.engine import make_url
+
+    from models.config import QUERY_BACKEND
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "dialect": make_url(os.environ["DATABASE_URL"]).get_backend_name(),
+        "query_backend": QUERY_BACKEND,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "rounds": rounds,
+        "seed": SEED,
+    }
+
+
+def report(results: dict) -> None:
+    for size, data in results["sizes"].items():
+        trials = data["trials"]["tests_cmjr"] + data["trials"]["tests_cmj"]
+        print(f"\n{size}: {data['athletes']} athletes x {data['dates']} dates, {trials} trials")
+        print(f"{'function':<46} {'p50':>8} {'p95':>8} {'p99':>8} {'cached p50':>11}")
+        for label, modes in data["functions"].items():
+            cold, warm = modes["uncached"], modes["cached"]
+            print(
+                f"{label:<46} {cold['p50_ms']:>8.3f} {cold['p95_ms']:>8.3f} "
+                f"{cold['p99_ms']:>8.3f} {warm['p50_ms']:>11.3f}"
+            )
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> int:
+    """Print p50 ratios against baseline; returns the number of regressions."""
+    regressions = 0
+    print(f"\nvs {baseline['meta'].get('commit')} (p50 ratio, >{1 + threshold:.2f} flagged)")
+    for size, data in results["sizes"].items():
+        before = baseline["sizes"].get(size, {}).get("functions", {})
+        for label, modes in data["functions"].items():
+            for mode, now in modes.items():
+                then = before.get(label, {}).get(mode)
+                if not then or not then["p50_ms"]:
+                    continue
+                ratio = now["p50_ms"] / then["p50_ms"]
+                flag = ratio > 1 + threshold
+                regressions += flag
+                if flag or ratio < 1 / (1 + threshold):
+                    kind = "REGRESSION" if flag else "faster"
+                    print(f"{kind:<10} {size:<7} {label:<46} {mode:<8} {ratio:.2f}x")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="small,medium", help=f"of {', '.join(SIZES)}")
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--output", help="JSON path (default benchmarks/results/...)")
+    parser.add_argument("--compare", help="earlier JSON output to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_size(args.worker, args.rounds)))
+        return 0
+
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(unknown)}")
+    results = {"meta": metadata(args.rounds), "sizes": {}}
+    for size in sizes:
+        done = subprocess.run(
+            [sys.executable, "-m", "benchmarks.query_suite", "--worker", size,
+             "--rounds", str(args.rounds)],
+            capture_output=True, text=True,
+        )
+        if done.returncode:
+            print(done.stderr, file=sys.stderr)
+            return done.returncode
+        results["sizes"][size] = json.loads(done.stdout.strip().splitlines()[-1])
+
+    report(results)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"query_suite-{results['meta']['commit'] or 'local'}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nwrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        return 1 if compare(results, baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
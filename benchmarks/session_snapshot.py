@@ -0,0 +1,112 @@
+"""Query-count benchmark: legacy per-callback queries vs get_session_snapshot.
+
+Replays the queries that one athlete/date change triggers in athlete.py
+(update_gauges, update_bars, update_injury_chart, update_injury_data) and the
+football.py equivalents, first with the old per-metric-set functions (bypassing
+the query cache) and then through get_session_snapshot, counting statements
+and wall time. A new snapshot reads its table's watermark, then sends its
+two statements (rollup slots and population moments) as one pipelined
+batch on psycopg 3: two round trips, which the other callbacks of the
+change share.
+
+Run from the repository root against a seeded database:
+    DATABASE_URL=postgresql://... python -m benchmarks.session_snapshot
+"""
+
+import time
+
+from sqlalchemy import event
+
+import models.queries as q
+from models.cache import query_cache
+from models.db import get_engine
+
+ROUNDS = 20
+
+
+def legacy_cmjr(name: str, date: str) -> None:
+    # update_gauges
+    q.get_test_data(name, date)
+    q.get_baseline_data(name)
+    # update_bars
+    q.get_test_data(name, date)
+    q.get_athlete_average(name)
+    q.get_baseline_data(name)
+    # update_injury_chart
+    q.get_cmjr_baseline_asymmetry(name)
+    q.get_cmjr_date_asymmetry(name, date)
+    # update_injury_data
+    q.get_injury_data(name, date)
+
+
+def legacy_cmj(name: str, date: str) -> None:
+    # update_zscore_bars
+    q.get_cmj_test_data(name, date)
+    q.get_cmj_baseline_data(name)
+    # update_bars
+    q.get_cmj_test_data(name, date)
+    q.get_cmj_athlete_average(name)
+    q.get_cmj_baseline_data(name)
+    # update_injury_chart
+    q.get_cmj_baseline_asymmetry(name)
+    q.get_cmj_date_asymmetry(name, date)
+    # update_injury_data
+    q.get_football_injury_data(name, date)
+
+
+def snapshot_flow(test_type: str):
+    def run(name: str, date: str) -> None:
+        # One call per callback; the first one queries, the rest share it
+        for _callback in range(4):
+            q.get_session_snapshot(test_type, name, date)
+
+    return run
+
+
+def measure(label: str, flow, cases: list[tuple[str, str]]) -> None:
+    statements = 0
+
+    def count(*_args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(get_engine(), "before_cursor_execute", count)
+    try:
+        started = time.perf_counter()
+        for _ in range(ROUNDS):
+            for name, date in cases:
+                q.clear_session_snapshots()
+                flow(name, date)
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(get_engine(), "before_cursor_execute", count)
+
+    changes = ROUNDS * len(cases)
+    print(
+        f"{label:<22} {statements / changes:5.1f} statements/change "
+        f"{elapsed / changes * 1000:8.2f} ms/change"
+    )
+
+
+def main() -> None:
+    cmjr_cases = [
+        (name, dates[0]["value"])
+        for name in q.get_athlete_names()[:10]
+        if (dates := q.get_test_dates(name))
+    ]
+    cmj_cases = [
+        (name, dates[0]["value"])
+        for name in q.get_football_athlete_names()[:10]
+        if (dates := q.get_cmj_test_dates(name))
+    ]
+
+    query_cache.enabled = False
+    print(f"{ROUNDS} rounds x {len(cmjr_cases)} CMJR / {len(cmj_cases)} CMJ athletes")
+    measure("athlete.py legacy", legacy_cmjr, cmjr_cases)
+    measure("athlete.py snapshot", snapshot_flow("tests_cmjr"), cmjr_cases)
+    measure("football.py legacy", legacy_cmj, cmj_cases)
+    measure("football.py snapshot", snapshot_flow("tests_cmj"), cmj_cases)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Cold-start benchmark: booting the in-process copies from Postgres vs a snapshot.
+
+Builds the synthetic analytics_bench schema of benchmarks/analytics.py
+(TRIALS trials in tests_cmjr, TRIALS // 10 in tests_cmj), writes a snapshot
+(snapshot.py) and times the first query of both tables in a fresh columnar
+store loaded from Postgres, from the current snapshot, and from the
+snapshot after APPEND_TRIALS newer trials were inserted (so it catches up),
+plus a DuckDB copy seeded from the snapshot. Checks every booted copy
+against one freshly loaded from Postgres. Exits non-zero on any mismatch.
+
+Run from the repository root:
+    DATABASE_URL=postgresql+psycopg://... python -m benchmarks.snapshot [TRIALS]
+"""
+
+import math
+import sys
+import tempfile
+import time
+
+from sqlalchemy import text
+
+from benchmarks.analytics import (
+    APPEND_TRIALS,
+    SCHEMA,
+    SPAN_SECONDS,
+    TRIALS,
+    build,
+    insert_sql,
+    same,
+    use_bench_schema,
+)
+from models.analytics import DuckDBAnalytics
+from models.columnar import ColumnarStore
+from models.config import ALL_SEGMENT, FOOTBALL_TEAM_ID, SNAPSHOT_COLUMNS
+from models.db import get_engine
+from models.snapshot import write_snapshot
+
+
+def boot(snapshot_dir: str) -> tuple[ColumnarStore, float]:
+    """A new store with both tables loaded, and the seconds that took."""
+    started = time.perf_counter()
+    store = ColumnarStore(sync_seconds=math.inf, snapshot_dir=snapshot_dir)
+    store.get_athlete_names()
+    store.get_team_athlete_names(FOOTBALL_TEAM_ID, "tests_cmj")
+    return store, time.perf_counter() - started
+
+
+def differences(store: ColumnarStore, reference: ColumnarStore) -> int:
+    """Tables of store whose state differs from reference's."""
+    failures = 0
+    for test_type in SNAPSHOT_COLUMNS:
+        a, b = store._table(test_type), reference._table(test_type)
+        matches = (
+            a.position == b.position
+            and a.team_athletes == b.team_athletes
+            and a.moments.keys() == b.moments.keys()
+            and all(
+                (getattr(a, attr) == getattr(b, attr)).all()
+                for attr in ("names", "dates", "counts")
+            )
+            # Appended partials are summed in a different order
+            and math.isclose(abs(a.sums - b.sums).max(initial=0), 0, abs_tol=1e-6)
+        )
+        if not matches:
+            failures += 1
+            print(f"FAIL {test_type}")
+    return failures
+
+
+def duckdb_differences(duck: DuckDBAnalytics, reference: ColumnarStore) -> int:
+    failures = 0
+    for test_type, cols in SNAPSHOT_COLUMNS.items():
+        for function, args in (
+            ("get_population_stats", (cols, test_type, ALL_SEGMENT)),
+            ("get_team_average", (cols, test_type)),
+        ):
+            if not same(getattr(duck, function)(*args), getattr(reference, function)(*args)):
+                failures += 1
+                print(f"FAIL duckdb {function}({test_type})")
+    return failures
+
+
+def main() -> int:
+    trials = int(sys.argv[1]) if len(sys.argv) > 1 else TRIALS
+    use_bench_schema()
+    print(f"build {trials} + {trials // 10} trials: {build(trials):.1f} s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        write_snapshot(directory)
+        write_s = time.perf_counter() - started
+
+        from_db, db_s = boot("")
+        current, current_s = boot(directory)
+        failures = differences(current, from_db)
+
+        with get_engine().begin() as conn:
+            # Touches every athlete's rollup rows, beyond the request timeout
+            conn.exec_driver_sql("SET LOCAL statement_timeout = 0")
+            conn.execute(text(insert_sql(
+                "tests_cmjr", trials + 1, trials + APPEND_TRIALS, SPAN_SECONDS // trials
+            )))
+        from_db, _ = boot("")
+        stale, stale_s = boot(directory)
+        failures += differences(stale, from_db)
+
+        started = time.perf_counter()
+        duck = DuckDBAnalytics(":memory:", parquet_dir=directory, sync_seconds=math.inf)
+        for test_type, cols in SNAPSHOT_COLUMNS.items():
+            duck.get_team_average(cols, test_type)
+        duck_s = time.perf_counter() - started
+        failures += duckdb_differences(duck, from_db)
+
+    print(f"parity: {'ok' if not failures else f'{failures} mismatches'}")
+    print(f"\nwrite snapshot: {write_s:.2f} s")
+    print(f"columnar boot from Postgres: {db_s * 1000:.0f} ms")
+    print(f"columnar boot from snapshot: {current_s * 1000:.0f} ms")
+    print(f"columnar boot from snapshot + {APPEND_TRIALS} newer trials: {stale_s * 1000:.0f} ms")
+    print(f"DuckDB boot from snapshot + {APPEND_TRIALS} newer trials: {duck_s * 1000:.0f} ms")
+
+    with get_engine().begin() as conn:
+        conn.exec_driver_sql(f"DROP SCHEMA {SCHEMA} CASCADE")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
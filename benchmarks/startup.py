@@ -0,0 +1,262 @@
+"""Startup profile: where a worker's time goes before it can serve.
+
+Starts each page in a fresh interpreter under `python -X importtime`, RUNS
+times (after one untimed run that writes the bytecode caches), and splits
+the time from spawning the process to the readiness probe answering 200
+into wall-clock phases:
+
+  interpreter   process spawn until the first line of the child runs
+  libraries     numpy, plotly, dash, flask and sqlalchemy
+  models        the models package the pages import
+  page          the page module body: defining callbacks and layouts...
+    figures     ...of which the figure builders and go.Figure calls it and
+                views/components.py make (FIGURE_TEMPLATE, _default_bars, ...)
+  app           Dash(), layout, readiness route and metrics endpoint
+  db            refresher.warm() until every startup value is loaded
+                (engine, first connection and the roster queries)
+  first layout  serve_layout() serialized, as the first page view does
+
+and adds up the `-X importtime` self time per top-level package, to show
+which imports the libraries and page phases are paying for. figures is
+timed with a profile hook during the page import, which slows that import
+a little.
+
+Writes the medians, with the commit they came from, as JSON.
+--compare BASELINE.json flags every phase (and the total) that got slower
+than the threshold and by more than MIN_DELTA_MS, and exits non-zero
+when any did, so startup regressions are caught commit to commit.
+
+Run from the repository root against a seeded database:
+    DATABASE_URL=postgresql+psycopg://... python -m benchmarks.startup \\
+        [--pages athlete,football,summary] [--runs 5] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from benchmarks.query_suite import RESULTS_DIR, metadata
+
+PAGES = ("athlete", "football", "summary")
+RUNS = 5
+TOP_PACKAGES = 12
+READY_TIMEOUT_S = 60
+REGRESSION_THRESHOLD = 0.2
+MIN_DELTA_MS = 20
+PHASES = (
+    "interpreter_ms",
+    "libraries_ms",
+    "models_ms",
+    "page_ms",
+    "figures_ms",
+    "app_ms",
+    "db_ms",
+    "first_layout_ms",
+    "ready_ms",
+)
+
+CHILD = """
+import sys, time
+
+spawned = float(sys.argv[2])
+spans = {"interpreter_ms": (time.time() - spawned) * 1000}
+page_name = sys.argv[1]
+
+
+def span(name, started):
+    spans[name] = (time.perf_counter() - started) * 1000
+
+
+started = time.perf_counter()
+import numpy, plotly.graph_objects, dash, flask, sqlalchemy
+span("libraries_ms", started)
+
+started = time.perf_counter()
+import models.metrics, models.queries, models.refresher, models.instrumentation
+span("models_ms", started)
+
+# Builder calls made by the page's module body (or its comprehensions), or
+# the shared components module it imports
+figures = {"seconds": 0.0, "open": []}
+MODULE_FRAMES = ("<module>", "<dictcomp>", "<listcomp>", "<genexpr>")
+FIGURE_MODULES = (page_name, "views.components")
+
+
+def profile(frame, event, _arg):
+    if event == "call":
+        caller = frame.f_back
+        if (
+            caller is not None
+            and caller.f_code.co_name in MODULE_FRAMES
+            and caller.f_globals.get("__name__") in FIGURE_MODULES
+            and (frame.f_code.co_name.startswith("create_") or "plotly" in frame.f_code.co_filename)
+        ):
+            figures["open"].append((frame, time.perf_counter()))
+    elif event == "return" and figures["open"] and figures["open"][-1][0] is frame:
+        figures["seconds"] += time.perf_counter() - figures["open"].pop()[1]
+
+
+import importlib
+
+started = time.perf_counter()
+sys.setprofile(profile)
+page = importlib.import_module(page_name)
+sys.setprofile(None)
+span("page_ms", started)
+spans["figures_ms"] = figures["seconds"] * 1000
+
+from dash import Dash
+from models.refresher import readiness_probe, refresher
+
+started = time.perf_counter()
+app = Dash(page_name)
+app.layout = page.serve_layout
+app.server.add_url_rule("/ready", "ready", readiness_probe)
+models.metrics.install(app.server)
+span("app_ms", started)
+
+started = time.perf_counter()
+refresher.warm()
+while readiness_probe()[1] != 200:
+    if time.perf_counter() - started > %(timeout)s:
+        sys.exit("not ready after %(timeout)s s")
+    time.sleep(0.002)
+span("db_ms", started)
+
+from plotly.io.json import to_json_plotly
+
+started = time.perf_counter()
+to_json_plotly(page.serve_layout())
+span("first_layout_ms", started)
+
+spans["ready_ms"] = (time.time() - spawned) * 1000
+refresher.stop()
+print("SPANS " + __import__("json").dumps(spans))
+""" % {"timeout": READY_TIMEOUT_S}
+
+
+def parse_importtime(stderr: str) -> dict[str, float]:
+    """Self time (ms) per top-level package from `-X importtime` output."""
+    totals = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _cumulative, module = line[len("import time:"):].split("|")
+        totals[module.strip().split(".")[0]] += int(self_us) / 1000
+    return totals
+
+
+def run_once(page: str) -> tuple[dict, dict]:
+    done = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD, page, repr(time.time())],
+        capture_output=True, text=True,
+    )
+    line = next(
+        (line for line in done.stdout.splitlines() if line.startswith("SPANS ")), None
+    )
+    if done.returncode or line is None:
+        raise RuntimeError(f"{page} startup failed:\n{done.stderr[-3000:]}")
+    return json.loads(line[len("SPANS "):]), parse_importtime(done.stderr)
+
+
+def profile_page(page: str, runs: int) -> dict:
+    run_once(page)  # writes any stale bytecode caches
+    spans, imports = [], []
+    for _ in range(runs):
+        measured, packages = run_once(page)
+        spans.append(measured)
+        imports.append(packages)
+    packages = {name for run in imports for name in run}
+    by_package = {
+        name: round(statistics.median(run.get(name, 0.0) for run in imports), 2)
+        for name in packages
+    }
+    top = sorted(by_package.items(), key=lambda item: -item[1])[:TOP_PACKAGES]
+    return {
+        "phases": {
+            phase: round(statistics.median(run[phase] for run in spans), 2) for phase in PHASES
+        },
+        "import_self_ms": dict(top),
+        "import_total_ms": round(
+            statistics.median(sum(run.values()) for run in imports), 2
+        ),
+    }
+
+
+def report(results: dict) -> None:
+    for page, data in results["pages"].items():
+        phases = data["phases"]
+        print(f"\n{page}: ready in {phases['ready_ms']:.0f} ms (median of {results['meta']['rounds']})")
+        for phase in PHASES[:-1]:
+            indent = "  " if phase == "figures_ms" else ""
+            label = indent + phase[: -len("_ms")].replace("_", " ")
+            print(f"  {label:<16} {phases[phase]:>8.1f} ms")
+        print(f"  imports, self time by package ({data['import_total_ms']:.0f} ms in all):")
+        for name, ms in data["import_self_ms"].items():
+            print(f"    {name:<20} {ms:>8.1f} ms")
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> int:
+    """Print the phases that moved against baseline; returns the regressions."""
+    regressions = 0
+    print(
+        f"\nvs {baseline['meta'].get('commit')} "
+        f"(>{1 + threshold:.2f}x and >{MIN_DELTA_MS} ms flagged)"
+    )
+    for page, data in results["pages"].items():
+        before = baseline["pages"].get(page, {}).get("phases", {})
+        for phase, now in data["phases"].items():
+            then = before.get(phase)
+            if not then:
+                continue
+            ratio, delta = now / then, now - then
+            slower = ratio > 1 + threshold and delta > MIN_DELTA_MS
+            faster = ratio < 1 / (1 + threshold) and -delta > MIN_DELTA_MS
+            regressions += slower
+            if slower or faster:
+                kind = "REGRESSION" if slower else "faster"
+                print(f"{kind:<10} {page:<9} {phase:<16} {then:>8.1f} -> {now:>8.1f} ms")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", default=",".join(PAGES))
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("--output", help="JSON path (default benchmarks/results/...)")
+    parser.add_argument("--compare", help="earlier JSON output to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    pages = [page for page in args.pages.split(",") if page]
+    unknown = [page for page in pages if page not in PAGES]
+    if unknown:
+        parser.error(f"unknown pages: {', '.join(unknown)}")
+
+    results = {"meta": metadata(args.runs), "pages": {}}
+    for page in pages:
+        results["pages"][page] = profile_page(page, args.runs)
+
+    report(results)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"startup-{results['meta']['commit'] or 'local'}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nwrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        return 1 if compare(results, baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,2 @@
-import os
-
-from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
-
-DATABASE_URL = os.environ["DATABASE_URL"]
-
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
-
-
-class Base(DeclarativeBase):
-    pass
+# Kept for older imports; the engine now lives in models/db.py and is created lazily
+from models.db import Base, Session, engine_manager, get_engine
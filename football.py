@@ -1,16 +1,21 @@
-import numpy as np
-import plotly.graph_objects as go
-from dash import Dash, Input, Output, Patch, callback, dcc, html
+from dash import Dash, Input, Output, Patch, State, callback, dcc, html
+from dash.exceptions import PreventUpdate
 
+import models.metrics as metrics
 import models.queries as q
 
 from models.config import (
     FOOTBALL_INJURY_CONFIG,
+    GAUGE_SCORING,
     OUTPUT_METRICS_CONFIG,
-    FOOTBALL_OUTPUT_METRICS,
-    FOOTBALL_MOVEMENT_ANALYSIS_COLUMNS,
     FOOTBALL_MOVEMENT_ANALYSIS_CONFIG,
+    STARTUP_POLL_MS,
+    TEAMS,
 )
+from models.instrumentation import traced
+from models.percentiles import percentile_index
+from models.refresher import readiness_probe, refresher
+from views.components import FIGURE_TEMPLATE, line_shape, line_label
 
 
 # ====================== Z-Score helper function =====================================
@@ -29,7 +34,6 @@ def scale_to_z_score(
     return max(0.0, min(100.0, round(scaled, 1)))
 
 
-# ====================== Bar Graph Helper Function ===================================
 def create_bar_chart(
     athlete_value: float | None,
     athlete_avg: float | None,
@@ -37,56 +41,46 @@ def create_bar_chart(
     baseline: float | None,
     title: str,
     unit: str,
-) -> go.Figure:
+) -> dict:
     """Create a grouped bar chart with 3 bars and a team avg line overlay."""
     bar_values = [
         athlete_value if athlete_value is not None else 0,
         athlete_avg if athlete_avg is not None else 0,
         baseline if baseline is not None else 0,
     ]
-    bar_labels = ["Current Test", "Last 5 Avg", "Baseline"]
-    bar_colors = ["#4a90d9", "#7ec67e", "#f0ad4e"]
-
     team_avg_val = team_avg if team_avg is not None else 0
-
-    fig = go.Figure(
-        data=[
-            go.Bar(
-                x=bar_labels,
-                y=bar_values,
-                marker_color=bar_colors,
-                text=[f"{v:.2f}" for v in bar_values],
-                textposition="inside",
-                insidetextanchor="middle",
-                textfont=dict(size=16, color="white", family="Arial Black"),
-            )
-        ]
-    )
-
-    # Team avg as a horizontal line spanning the full chart
-    fig.add_hline(
-        y=team_avg_val,
-        line_dash="dash",
-        line_color="#d9534f",
-        line_width=2,
-        annotation_text=f"Team Avg: {team_avg_val:.2f}",
-        annotation_position="top right",
-        annotation_font_size=12,
-        annotation_font_color="#d9534f",
-    )
-
-    fig.update_layout(
-        title=dict(text=title, x=0.5, xanchor="center", font=dict(size=13)),
-        height=160,
-        margin=dict(l=25, r=8, t=30, b=20),
-        yaxis=dict(title=unit, gridcolor="lightgray", tickfont=dict(size=10)),
-        xaxis=dict(tickfont=dict(size=10)),
-        showlegend=False,
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        bargap=0.2,
-    )
-    return fig
+    return {
+        "data": [
+            {
+                "type": "bar",
+                "x": ["Current Test", "Last 5 Avg", "Baseline"],
+                "y": bar_values,
+                "marker": {"color": ["#4a90d9", "#7ec67e", "#f0ad4e"]},
+                "text": [f"{v:.2f}" for v in bar_values],
+                "textposition": "inside",
+                "insidetextanchor": "middle",
+                "textfont": {"size": 16, "color": "white", "family": "Arial Black"},
+            }
+        ],
+        "layout": {
+            "template": FIGURE_TEMPLATE,
+            "shapes": [line_shape("y", team_avg_val, "#d9534f", "dash")],
+            "annotations": [
+                line_label(team_avg_val, f"Team Avg: {team_avg_val:.2f}", "#d9534f", 12)
+            ],
+            "title": {"text": title, "x": 0.5, "xanchor": "center", "font": {"size": 13}},
+            "height": 160,
+            "margin": {"l": 25, "r": 8, "t": 30, "b": 20},
+            "yaxis": {
+                "title": {"text": unit}, "gridcolor": "lightgray", "tickfont": {"size": 10}
+            },
+            "xaxis": {"tickfont": {"size": 10}},
+            "showlegend": False,
+            "paper_bgcolor": "rgba(0,0,0,0)",
+            "plot_bgcolor": "rgba(0,0,0,0)",
+            "bargap": 0.2,
+        },
+    }
 
 
 _default_bar = create_bar_chart(0, 0, 0, 0, "—", "")
@@ -97,95 +91,84 @@ _default_bars = {
 
 
 # ====================== Z-Score Bar Chart Helper Function =================================
+# Percentile boundaries converted to 0-100 scale via z-scores
+_P2 = 15.8  # 2nd percentile  (z ≈ -2.05)
+_P15 = 32.7  # 15th percentile (z ≈ -1.04)
+_P85 = 67.3  # 85th percentile (z ≈  1.04)
+_P98 = 84.2  # 98th percentile (z ≈  2.05)
+
+_ZSCORE_BANDS = [
+    (0, _P2, "rgba(217,83,79,0.3)"),  # 0-2nd: red
+    (_P2, _P15, "rgba(255,235,59,0.3)"),  # 2-15th: yellow
+    (_P15, _P85, "rgba(144,238,144,0.3)"),  # 16-84th: green
+    (_P85, _P98, "rgba(60,179,113,0.35)"),  # 85-97th: darker green
+    (_P98, 100, "rgba(34,120,60,0.4)"),  # 98-100th: dark green
+]
+
+
 def create_zscore_bar(
     z_current: float | None,
     z_baseline: float | None,
     title: str,
-) -> go.Figure:
+) -> dict:
     """Create a bar chart showing the current test z-score (0-100 scale)
     with a baseline z-score as an orange horizontal line."""
     bar_values = [z_current if z_current is not None else 0]
-    bar_labels = ["Current Test"]
-    bar_colors = ["#4a90d9"]
-
     baseline_val = z_baseline if z_baseline is not None else 0
-
-    fig = go.Figure(
-        data=[
-            go.Bar(
-                x=bar_labels,
-                y=bar_values,
-                marker_color=bar_colors,
-                text=[f"{v:.1f}" for v in bar_values],
-                textposition="inside",
-                insidetextanchor="middle",
-                textfont=dict(size=16, color="white", family="Arial Black"),
-                width=[0.4],
-            )
-        ]
-    )
-
-    # Baseline as an orange horizontal line
-    fig.add_hline(
-        y=baseline_val,
-        line_dash="dash",
-        line_color="#c07d20",
-        line_width=2,
-        annotation_text=f"Baseline: {baseline_val:.1f}",
-        annotation_position="top right",
-        annotation_font_size=12,
-        annotation_font_color="#c07d20",
-    )
-
-    # Team average z-score is always 50 (population mean = team mean)
-    fig.add_hline(
-        y=50,
-        line_dash="longdashdot",
-        line_color="#d9534f",
-        line_width=2,
-    )
-
-    fig.update_layout(
-        title=dict(text=title, x=0.5, xanchor="center", font=dict(size=12)),
-        height=160,
-        margin=dict(l=25, r=8, t=30, b=20),
-        yaxis=dict(title="Z-Score", gridcolor="lightgray", range=[0, 100], tickfont=dict(size=10)),
-        xaxis=dict(tickfont=dict(size=10), visible=False),
-        showlegend=False,
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        bargap=0.2,
-    )
-
-    # Percentile reference bands (appended after hlines so shapes[0] and [1] stay intact)
-    # Percentile boundaries converted to 0-100 scale via z-scores
-    p2 = 15.8  # 2nd percentile  (z ≈ -2.05)
-    p15 = 32.7  # 15th percentile (z ≈ -1.04)
-    p85 = 67.3  # 85th percentile (z ≈  1.04)
-    p98 = 84.2  # 98th percentile (z ≈  2.05)
-
-    bands = [
-        (0, p2, "rgba(217,83,79,0.3)"),  # 0-2nd: red
-        (p2, p15, "rgba(255,235,59,0.3)"),  # 2-15th: yellow
-        (p15, p85, "rgba(144,238,144,0.3)"),  # 16-84th: green
-        (p85, p98, "rgba(60,179,113,0.35)"),  # 85-97th: darker green
-        (p98, 100, "rgba(34,120,60,0.4)"),  # 98-100th: dark green
-    ]
-    for y0, y1, color in bands:
-        fig.add_shape(
-            type="rect",
-            xref="paper",
-            x0=0,
-            x1=1,
-            yref="y",
-            y0=y0,
-            y1=y1,
-            fillcolor=color,
-            line_width=0,
-            layer="below",
-        )
-
-    return fig
+    return {
+        "data": [
+            {
+                "type": "bar",
+                "x": ["Current Test"],
+                "y": bar_values,
+                "marker": {"color": ["#4a90d9"]},
+                "text": [f"{v:.1f}" for v in bar_values],
+                "textposition": "inside",
+                "insidetextanchor": "middle",
+                "textfont": {"size": 16, "color": "white", "family": "Arial Black"},
+                "width": [0.4],
+            }
+        ],
+        "layout": {
+            "template": FIGURE_TEMPLATE,
+            "shapes": [
+                line_shape("y", baseline_val, "#c07d20", "dash"),
+                line_shape("y", 50, "#d9534f", "longdashdot"),
+            ]
+            + [
+                {
+                    "type": "rect",
+                    "xref": "paper",
+                    "x0": 0,
+                    "x1": 1,
+                    "yref": "y",
+                    "y0": y0,
+                    "y1": y1,
+                    "fillcolor": color,
+                    "line": {"width": 0},
+                    "layer": "below",
+                }
+                for y0, y1, color in _ZSCORE_BANDS
+            ],
+            "annotations": [
+                line_label(baseline_val, f"Baseline: {baseline_val:.1f}", "#c07d20", 12)
+            ],
+            "title": {"text": title, "x": 0.5, "xanchor": "center", "font": {"size": 12}},
+            "height": 160,
+            "margin": {"l": 25, "r": 8, "t": 30, "b": 20},
+            "yaxis": {
+                "title": {"text": "Z-Score"},
+                "gridcolor": "lightgray",
+                "range": [0, 100],
+                "tickfont": {"size": 10},
+            },
+            "xaxis": {"tickfont": {"size": 10}, "visible": False},
+            "showlegend": False,
+            "paper_bgcolor": "rgba(0,0,0,0)",
+            "plot_bgcolor": "rgba(0,0,0,0)",
+            "bargap": 0.2,
+        },
+    }
 
 
 _default_zscore_bars = {
@@ -194,11 +177,7 @@ _default_zscore_bars = {
 }
 
 
-# ====================== Diverging Chart Helper Function ===================================
-def create_diverging_chart(
-    baseline_data: dict,
-    selected_data: dict,
-) -> go.Figure:
+def create_diverging_chart(baseline_data: dict, selected_data: dict) -> dict:
     """Create a horizontal diverging bar chart for injury risk asymmetry.
 
     Shows baseline vs selected test for each metric, overlaid.
@@ -206,104 +185,84 @@ def create_diverging_chart(
     """
     labels = [title for _, title, _ in FOOTBALL_INJURY_CONFIG]
     cols = [col for _, _, col in FOOTBALL_INJURY_CONFIG]
-
     baseline_vals = [float(baseline_data.get(c) or 0) for c in cols]
 
-    fig = go.Figure()
-
     if selected_data:
         selected_vals = [float(selected_data.get(c) or 0) for c in cols]
-        # Baseline trace (semi-transparent, behind)
-        fig.add_trace(
-            go.Bar(
-                y=labels,
-                x=baseline_vals,
-                orientation="h",
-                name="Baseline",
-                marker=dict(color="#f0ad4e", opacity=0.45),
-                text=[f"{v:.2f}" for v in baseline_vals],
-                textposition="auto",
-                textfont=dict(size=18),
-            )
-        )
-        # Selected test trace (solid, on top) — color by severity
-        selected_colors = []
-        for v in selected_vals:
-            abs_v = abs(v)
-            if abs_v < 11:
-                selected_colors.append("#7ec67e")
-            elif abs_v < 25:
-                selected_colors.append("#f5e642")
-            else:
-                selected_colors.append("#d9534f")
-        fig.add_trace(
-            go.Bar(
-                y=labels,
-                x=selected_vals,
-                orientation="h",
-                name="Current Test",
-                marker_color=selected_colors,
-                text=[f"{v:.2f}" for v in selected_vals],
-                textposition="auto",
-                textfont=dict(size=18),
-            )
-        )
+        selected_colors = [
+            "#7ec67e" if abs(v) < 11 else "#f5e642" if abs(v) < 25 else "#d9534f"
+            for v in selected_vals
+        ]
+        traces = [
+            ("Baseline", baseline_vals, {"color": "#f0ad4e", "opacity": 0.45}),
+            ("Current Test", selected_vals, {"color": selected_colors}),
+        ]
     else:
-        # No selected data or selected date is baseline — show baseline only
-        fig.add_trace(
-            go.Bar(
-                y=labels,
-                x=baseline_vals,
-                orientation="h",
-                name="Baseline (only test)",
-                marker_color="#f0ad4e",
-                text=[f"{v:.2f}" for v in baseline_vals],
-                textposition="auto",
-                textfont=dict(size=18),
-            )
-        )
+        selected_vals = []
+        traces = [("Baseline (only test)", baseline_vals, {"color": "#f0ad4e"})]
 
-    # Determine symmetric x-axis range
-    all_vals = baseline_vals + (
-        [float(selected_data.get(c) or 0) for c in cols] if selected_data else []
-    )
+    all_vals = baseline_vals + selected_vals
     max_abs = max(abs(v) for v in all_vals) if all_vals else 1
     x_range = max(max_abs * 1.3, 0.1)
 
-    fig.update_layout(
-        title=dict(text="Asymmetry Analysis", x=0.5, xanchor="center", font=dict(size=18)),
-        barmode="group",
-        height=360,
-        xaxis=dict(
-            range=[-x_range, x_range],
-            zeroline=True,
-            zerolinewidth=2,
-            zerolinecolor="black",
-            gridcolor="lightgray",
-            title="Asymmetry",
-            tickfont=dict(size=14),
-        ),
-        yaxis=dict(autorange="reversed", tickfont=dict(size=16)),
-        legend=dict(
-            orientation="h", x=0.5, xanchor="center", yanchor="bottom", y=-0.35,
-            font=dict(size=14),
-        ),
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        margin=dict(l=30, r=30, t=40, b=50),
-    )
-    return fig
+    return {
+        "data": [
+            {
+                "type": "bar",
+                "y": labels,
+                "x": values,
+                "orientation": "h",
+                "name": name,
+                "marker": marker,
+                "text": [f"{v:.2f}" for v in values],
+                "textposition": "auto",
+                "textfont": {"size": 18},
+            }
+            for name, values, marker in traces
+        ],
+        "layout": {
+            "template": FIGURE_TEMPLATE,
+            "title": {
+                "text": "Asymmetry Analysis", "x": 0.5, "xanchor": "center", "font": {"size": 18}
+            },
+            "barmode": "group",
+            "height": 360,
+            "xaxis": {
+                "range": [-x_range, x_range],
+                "zeroline": True,
+                "zerolinewidth": 2,
+                "zerolinecolor": "black",
+                "gridcolor": "lightgray",
+                "title": {"text": "Asymmetry"},
+                "tickfont": {"size": 14},
+            },
+            "yaxis": {"autorange": "reversed", "tickfont": {"size": 16}},
+            "legend": {
+                "orientation": "h",
+                "x": 0.5,
+                "xanchor": "center",
+                "yanchor": "bottom",
+                "y": -0.35,
+                "font": {"size": 14},
+            },
+            "paper_bgcolor": "rgba(0,0,0,0)",
+            "plot_bgcolor": "rgba(0,0,0,0)",
+            "margin": {"l": 30, "r": 30, "t": 40, "b": 50},
+        },
+    }
 
 
 _default_diverging = create_diverging_chart({}, {})
 
 
 # =============== Startup data ==================================
-dropdown_names = q.get_football_athlete_names()
-team_averages = q.get_team_average(
-    FOOTBALL_OUTPUT_METRICS + FOOTBALL_MOVEMENT_ANALYSIS_COLUMNS, "tests_cmj"
+default_team = next(iter(TEAMS))
+# Loaded in the background, reloaded when tests_cmj changes; layouts peek(), never wait
+dropdown_names = refresher.register(
+    "football_names",
+    lambda: tuple(q.get_team_athlete_names(default_team, "tests_cmj")),
+    "tests_cmj",
 )
-cmj_pop_stats = q.get_population_stats(FOOTBALL_OUTPUT_METRICS, "tests_cmj")
 
 # ====================== Styling ===================================
 CARD_STYLE = {
@@ -315,7 +274,8 @@ CARD_STYLE = {
 
 
 def serve_layout():
-    """Returns the page layout"""
+    """Returns the page layout; the roster fills in when loaded if it isn't yet"""
+    names = dropdown_names.peek()
     return html.Div(
         className="card-container",
         style={
@@ -338,14 +298,28 @@ def serve_layout():
                 children=[
                     html.H2("Athlete Profile"),
                     html.Img(src="assets/Images/profile.jpg", style={"width": "250px"}),
+                    html.P("Team"),
+                    dcc.Dropdown(
+                        id="team-dropdown",
+                        options=[
+                            {"label": label, "value": team_id}
+                            for team_id, label in TEAMS.items()
+                        ],
+                        value=default_team,
+                        clearable=False,
+                    ),
                     html.P("Name"),
                     dcc.Dropdown(
                         id="athlete-dropdown",
                         options=[
-                            {"label": name, "value": name} for name in dropdown_names
+                            {"label": name, "value": name} for name in names or ()
                         ],
                         clearable=False,
-                        placeholder="Select Athlete",
+                        placeholder="Select Athlete" if names is not None else "Loading…",
+                        disabled=names is None,
+                    ),
+                    dcc.Interval(
+                        id="startup-poll", interval=STARTUP_POLL_MS, disabled=names is not None
                     ),
                     html.P("Age: 17"),
                     html.P("Height: 5' 10''"),
@@ -353,7 +327,6 @@ def serve_layout():
                     html.Hr(),
                     html.P("Sport: Football"),
                     html.P("Position: OL"),
-                    html.P("Team: UPHS"),
                     html.P("Year: Sophomore"),
                     html.Hr(),
                     html.P("Test Date"),
@@ -659,12 +632,49 @@ def serve_layout():
 
 
 # ====================== Callbacks ===================================
+@callback(
+    Output("athlete-dropdown", "options", allow_duplicate=True),
+    Output("athlete-dropdown", "placeholder"),
+    Output("athlete-dropdown", "disabled"),
+    Output("startup-poll", "disabled"),
+    Input("startup-poll", "n_intervals"),
+    State("team-dropdown", "value"),
+    prevent_initial_call=True,
+)
+@traced
+def load_athlete_dropdown(_n_intervals, team_id):
+    """Fill in the roster once its background load finishes, then stop polling.
+
+    If another team was picked while loading, that team's roster goes in instead.
+    """
+    names = dropdown_names.peek()
+    if names is None:
+        raise PreventUpdate
+    if team_id != default_team:
+        names = q.get_team_athlete_names(team_id, "tests_cmj")
+    return [{"label": name, "value": name} for name in names], "Select Athlete", False, True
+
+
+@callback(
+    Output("athlete-dropdown", "options"),
+    Output("athlete-dropdown", "value"),
+    Input("team-dropdown", "value"),
+    prevent_initial_call=True,
+)
+@traced
+def update_athlete_dropdown(team_id):
+    """Show the selected team's roster; norms and averages follow the team too."""
+    names = q.get_team_athlete_names(team_id, "tests_cmj")
+    return [{"label": name, "value": name} for name in names], None
+
+
 @callback(
     Output("date-dropdown", "options"),
     Output("date-dropdown", "value"),
     Output("total-tests-text", "children"),
     Input("athlete-dropdown", "value"),
 )
+@traced
 def update_date_dropdown(selected_name):
     """Populate test date dropdown based on selected athlete.
 
@@ -684,18 +694,36 @@ def update_date_dropdown(selected_name):
     ],
     Input("athlete-dropdown", "value"),
     Input("date-dropdown", "value"),
+    State("team-dropdown", "value"),
 )
-def update_zscore_bars(selected_name, selected_date):
+@traced
+def update_zscore_bars(selected_name, selected_date, team_id):
     """Update Performance Output z-score bars when athlete or date changes."""
     defaults = [_default_zscore_bars[bar_id] for bar_id, _, _ in OUTPUT_METRICS_CONFIG]
     if not selected_name or not selected_date:
         return defaults
 
-    test_data = q.get_cmj_test_data(selected_name, selected_date)
-    baseline_data = q.get_cmj_baseline_data(selected_name)
+    snapshot = q.get_session_snapshot(
+        "tests_cmj", selected_name, selected_date, team_id
+    )
+    test_data = snapshot["current"]
+    baseline_data = snapshot["baseline"]
+    cmj_pop_stats = snapshot["population"]
     if not test_data:
         return defaults
 
+    ranks = None
+    if GAUGE_SCORING == "percentile":
+        # Current and baseline values of every bar, ranked within the team at once
+        ranks = percentile_index.score(
+            "tests_cmj",
+            {
+                col: [test_data.get(col), baseline_data.get(col) if baseline_data else None]
+                for _, _, col in OUTPUT_METRICS_CONFIG
+            },
+            team_id,
+        )
+
     figures = []
     for bar_id, title, col in OUTPUT_METRICS_CONFIG:
         raw_value = test_data.get(col)
@@ -704,15 +732,21 @@ def update_zscore_bars(selected_name, selected_date):
         mean = stats.get("mean")
         std = stats.get("std")
 
-        if raw_value is not None and mean is not None and std is not None:
-            z_current = scale_to_z_score(float(raw_value), mean, std)
+        if ranks is not None:
+            # Percentile ranks already sit on the 0-100 scale, median at 50
+            z_current, z_baseline = (
+                round(rank, 1) if rank is not None else 0 for rank in ranks[col]
+            )
         else:
-            z_current = 0
+            if raw_value is not None and mean is not None and std is not None:
+                z_current = scale_to_z_score(float(raw_value), mean, std)
+            else:
+                z_current = 0
 
-        if raw_baseline is not None and mean is not None and std is not None:
-            z_baseline = scale_to_z_score(float(raw_baseline), mean, std)
-        else:
-            z_baseline = 0
+            if raw_baseline is not None and mean is not None and std is not None:
+                z_baseline = scale_to_z_score(float(raw_baseline), mean, std)
+            else:
+                z_baseline = 0
 
         patched = Patch()
         patched["data"][0]["y"] = [z_current]
@@ -741,8 +775,10 @@ def update_zscore_bars(selected_name, selected_date):
     ],
     Input("athlete-dropdown", "value"),
     Input("date-dropdown", "value"),
+    State("team-dropdown", "value"),
 )
-def update_bars(selected_name, selected_date):
+@traced
+def update_bars(selected_name, selected_date, team_id):
     """Update all Movement Analysis bar charts when athlete or date changes."""
     default_pct_texts = ["" for _ in FOOTBALL_MOVEMENT_ANALYSIS_CONFIG]
     default_pct_styles = [
@@ -759,9 +795,14 @@ def update_bars(selected_name, selected_date):
             + default_pct_styles
         )
 
-    test_data = q.get_cmj_test_data(selected_name, selected_date)
-    athlete_avg = q.get_cmj_athlete_average(selected_name)
-    baseline_data = q.get_cmj_baseline_data(selected_name)
+    snapshot = q.get_session_snapshot(
+        "tests_cmj", selected_name, selected_date, team_id
+    )
+    test_data = snapshot["current"]
+    athlete_avg = snapshot["last5"]
+    baseline_data = snapshot["baseline"]
+    # Population means are the selected team's trial-weighted averages
+    team_averages = {col: stats["mean"] for col, stats in snapshot["population"].items()}
     figures = []
     pct_texts = []
     pct_styles = []
@@ -835,17 +876,22 @@ def update_bars(selected_name, selected_date):
     Output("injury-diverging-chart", "figure"),
     Input("athlete-dropdown", "value"),
     Input("date-dropdown", "value"),
+    State("team-dropdown", "value"),
 )
-def update_injury_chart(selected_name, selected_date):
+@traced
+def update_injury_chart(selected_name, selected_date, team_id):
     """Update the injury risk diverging chart when athlete or date changes."""
     if not selected_name or not selected_date:
         return _default_diverging
 
-    baseline_data = q.get_cmj_baseline_asymmetry(selected_name)
+    snapshot = q.get_session_snapshot(
+        "tests_cmj", selected_name, selected_date, team_id
+    )
+    baseline_data = snapshot["baseline"]
     if not baseline_data:
         return _default_diverging
 
-    selected_data = q.get_cmj_date_asymmetry(selected_name, selected_date)
+    selected_data = snapshot["current"]
     return create_diverging_chart(baseline_data, selected_data)
 
 
@@ -853,8 +899,10 @@ def update_injury_chart(selected_name, selected_date):
     Output("injury-data-display", "children"),
     Input("athlete-dropdown", "value"),
     Input("date-dropdown", "value"),
+    State("team-dropdown", "value"),
 )
-def update_injury_data(selected_name, selected_date):
+@traced
+def update_injury_data(selected_name, selected_date, team_id):
     """Update the injury data values below the diverging chart."""
     default = [
         html.P("Time to Stabilization: —"),
@@ -863,7 +911,9 @@ def update_injury_data(selected_name, selected_date):
     if not selected_name or not selected_date:
         return default
 
-    data = q.get_football_injury_data(selected_name, selected_date)
+    data = q.get_session_snapshot(
+        "tests_cmj", selected_name, selected_date, team_id
+    )["current"]
 
     tts = data.get("time_to_stabilization_ms")
     rplf = data.get("relative_peak_landing_force")
@@ -885,5 +935,8 @@ def update_injury_data(selected_name, selected_date):
 # ====================== Standalone App (for testing) ===================================
 if __name__ == "__main__":
     app = Dash(__name__)
-    app.layout = serve_layout()
+    app.layout = serve_layout
+    app.server.add_url_rule("/ready", "ready", readiness_probe)
+    metrics.install(app.server)
+    refresher.warm()
     app.run(debug=True, port=8051)
@@ -0,0 +1,301 @@
+"""Embedded DuckDB copy of the test tables for roster-wide aggregates.
+
+For ad-hoc roster analytics (DuckDBAnalytics.execute()) and benchmarks;
+needs the duckdb package. The dashboards never query it: their population
+and team figures come with the session snapshot (queries.py), so nothing
+routes here by default. A script that calls get_population_stats and
+get_team_average in bulk can opt in with enable_duckdb_analytics(), which
+runs them as column scans in DuckDB.
+
+Each table is copied on its first query and then kept in step the same way
+as the columnar store (see replica.py), at most every ANALYTICS_SYNC_SECONDS.
+A copy can instead start from Parquet files (ANALYTICS_PARQUET_DIR, one
+{test_type}.parquet per table, e.g. written by export_parquet) and catch up
+from there. With a file-backed ANALYTICS_DUCKDB_PATH the copy and its
+position survive restarts.
+"""
+
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from .backends import use_backend
+from .config import (
+    ALL_SEGMENT,
+    ANALYTICS_DUCKDB_PATH,
+    ANALYTICS_PARQUET_DIR,
+    ANALYTICS_SYNC_SECONDS,
+    SNAPSHOT_COLUMNS,
+)
+from .replica import TRIAL_COLUMNS, Position, fetch_changes, trial_columns
+from .stats import Moments, moments_to_stats
+
+try:
+    import duckdb
+except ImportError:  # optional dependency
+    duckdb = None
+
+
+def _metric_list(test_type: str, metrics) -> tuple[str, ...]:
+    """metrics as a tuple, checked against test_type's SNAPSHOT_COLUMNS."""
+    if test_type not in SNAPSHOT_COLUMNS:
+        raise ValueError(f"Unknown test type: {test_type!r}")
+    unknown = [col for col in metrics if col not in SNAPSHOT_COLUMNS[test_type]]
+    if unknown:
+        raise ValueError(f"Unknown {test_type} metrics: {', '.join(unknown)}")
+    return tuple(metrics)
+
+
+def _factorize(values, key=None) -> tuple[np.ndarray, list]:
+    """(codes, distinct) with distinct[codes[i]] == key(values[i])."""
+    index = {}
+    keys = values if key is None else map(key, values)
+    codes = np.fromiter(
+        (index.setdefault(value, len(index)) for value in keys), dtype=np.int32, count=len(values)
+    )
+    return codes, list(index)
+
+
+@lru_cache(maxsize=256)
+def _moments_sql(test_type: str, metrics: tuple[str, ...], by_team: bool) -> str:
+    parts = ", ".join(
+        f"count({col}), coalesce(avg({col}), 0), coalesce(var_pop({col}) * count({col}), 0)"
+        for col in metrics
+    )
+    where = " WHERE list_contains(athlete_teams, ?)" if by_team else ""
+    return f"SELECT {parts} FROM {test_type}{where}"
+
+
+@lru_cache(maxsize=256)
+def _team_average_sql(test_type: str, metrics: tuple[str, ...], by_team: bool) -> str:
+    averages = ", ".join(f"avg({col}) AS {col}" for col in metrics)
+    if by_team:
+        # Same rows as the team's population_moments: every trial tagged with it
+        return f"SELECT {averages} FROM {test_type} WHERE list_contains(athlete_teams, ?)"
+    # Same rows as the rollup tables: trials with an athlete and a date
+    return (
+        f"SELECT {averages} FROM {test_type} "
+        "WHERE athlete_name IS NOT NULL AND test_date IS NOT NULL"
+    )
+
+
+class DuckDBAnalytics:
+    """Query backend running the roster-wide aggregates on DuckDB.
+
+    Methods share names and arguments with the query functions in
+    queries.py, so use_backend() can route those calls here.
+    """
+
+    def __init__(
+        self,
+        path: str = ANALYTICS_DUCKDB_PATH,
+        parquet_dir: str = ANALYTICS_PARQUET_DIR,
+        sync_seconds: float = ANALYTICS_SYNC_SECONDS,
+    ):
+        if duckdb is None:
+            raise ImportError("The DuckDB analytics backend needs the duckdb package")
+        self.parquet_dir = parquet_dir
+        self.sync_seconds = sync_seconds
+        self._db = duckdb.connect(path)
+        self._lock = threading.Lock()
+        self._next_sync: dict[str, float] = {}
+        self._positions: dict[str, Position] = {}
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        for test_type, cols in SNAPSHOT_COLUMNS.items():
+            metric_defs = ", ".join(f"{col} DOUBLE" for col in cols)
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {test_type} ("
+                "athlete_name VARCHAR, test_date DATE, athlete_teams VARCHAR[], "
+                f"timestamp DOUBLE, {metric_defs})"
+            )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS replica_positions ("
+            "test_type VARCHAR PRIMARY KEY, trial_count BIGINT, max_timestamp DOUBLE, "
+            "version BIGINT, rewrites BIGINT)"
+        )
+        for test_type, count, newest, version, rewrites in self._db.execute(
+            "SELECT * FROM replica_positions"
+        ).fetchall():
+            watermark = (version, rewrites) if version is not None else None
+            self._positions[test_type] = Position(count, newest, watermark)
+
+    def _save_position(self, cursor, test_type: str, position: Position) -> None:
+        version, rewrites = position.watermark or (None, None)
+        cursor.execute(
+            "INSERT OR REPLACE INTO replica_positions VALUES (?, ?, ?, ?, ?)",
+            [test_type, position.trial_count, position.max_timestamp, version, rewrites],
+        )
+        self._positions[test_type] = position
+
+    # ---------------- keeping the copy current ----------------
+    def _ready(self, test_type: str) -> None:
+        if test_type not in SNAPSHOT_COLUMNS:
+            raise ValueError(f"Unknown test type: {test_type!r}")
+        if test_type not in self._positions:
+            with self._lock:
+                if test_type not in self._positions:
+                    parquet = os.path.join(self.parquet_dir, f"{test_type}.parquet")
+                    if self.parquet_dir and os.path.exists(parquet):
+                        self._load_parquet_file(test_type, parquet)
+                    self._sync(test_type)
+        elif time.monotonic() >= self._next_sync.get(test_type, 0) and self._lock.acquire(
+            blocking=False
+        ):
+            # One thread catches up; the others keep querying the current copy
+            try:
+                self._sync(test_type)
+            finally:
+                self._lock.release()
+
+    def sync(self, test_type: str) -> None:
+        """Bring the copy of test_type up to its Postgres watermark now."""
+        with self._lock:
+            self._sync(test_type)
+
+    def _sync(self, test_type: str) -> None:
+        self._next_sync[test_type] = time.monotonic() + self.sync_seconds
+        change = fetch_changes(test_type, self._positions.get(test_type))
+        if change is None:
+            return
+        appended, rows, position = change
+        cursor = self._db.cursor()
+        cursor.execute("BEGIN")
+        try:
+            if not appended:
+                cursor.execute(f"DELETE FROM {test_type}")
+            self._insert(cursor, test_type, rows)
+            self._save_position(cursor, test_type, position)
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+
+    def _insert(self, cursor, test_type: str, rows: list) -> None:
+        """Insert fetched trials through a NumPy scan (no per-row statements).
+
+        Names and team lists go in as integer codes into their distinct
+        values, passed as JSON: scanning NumPy string arrays, or binding
+        Python lists, is far slower than numbers and one string.
+        """
+        if not rows:
+            return
+        columns = list(zip(*rows))
+        name_codes, names = _factorize(columns[0])
+        team_codes, teams = _factorize(
+            columns[2], lambda value: tuple(map(str, value)) if isinstance(value, list) else ()
+        )
+        batch = {
+            "name_code": name_codes,
+            "test_date": np.array(columns[1], dtype="datetime64[D]").astype("datetime64[s]"),
+            "team_code": team_codes,
+            "timestamp": np.array(columns[3], dtype=float),
+        }
+        for col, values in zip(SNAPSHOT_COLUMNS[test_type], columns[len(TRIAL_COLUMNS):]):
+            batch[col] = np.array(values, dtype=float)
+        cursor.register("trial_batch", batch)
+        metrics = ", ".join(SNAPSHOT_COLUMNS[test_type])
+        cursor.execute(
+            f"INSERT INTO {test_type} SELECT "
+            "CAST(from_json(?, '[\"VARCHAR\"]') AS VARCHAR[])[name_code + 1], "
+            "CAST(test_date AS DATE), "
+            "CAST(from_json(?, '[[\"VARCHAR\"]]') AS VARCHAR[][])[team_code + 1], "
+            f"timestamp, {metrics} FROM trial_batch",
+            [json.dumps(names), json.dumps(teams)],
+        )
+        cursor.unregister("trial_batch")
+
+    def _load_parquet_file(self, test_type: str, path: str) -> None:
+        """Replace the copy with a Parquet file of the trial columns.
+
+        The file's "watermark" key-value metadata ([version, rewrites], as
+        written by export_parquet) is used when present.
+        """
+        columns = ", ".join(trial_columns(test_type))
+        cursor = self._db.cursor()
+        cursor.execute("BEGIN")
+        try:
+            cursor.execute(f"DELETE FROM {test_type}")
+            cursor.execute(f"INSERT INTO {test_type} SELECT {columns} FROM read_parquet(?)", [path])
+            count, newest = cursor.execute(
+                f"SELECT count(*), max(timestamp) FROM {test_type}"
+            ).fetchone()
+            stamp = cursor.execute(
+                "SELECT value FROM parquet_kv_metadata(?) WHERE key = 'watermark'", [path]
+            ).fetchone()
+            watermark = tuple(json.loads(stamp[0])) if stamp else None
+            self._save_position(cursor, test_type, Position(count, newest, watermark))
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+
+    def load_parquet(self, directory: str) -> None:
+        """Seed every table that has a {test_type}.parquet file in directory."""
+        with self._lock:
+            for test_type in SNAPSHOT_COLUMNS:
+                path = os.path.join(directory, f"{test_type}.parquet")
+                if os.path.exists(path):
+                    self._load_parquet_file(test_type, path)
+
+    def export_parquet(self, directory: str) -> None:
+        """Write each copied table to {test_type}.parquet, stamped with its watermark."""
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            for test_type, position in self._positions.items():
+                stamp = json.dumps(list(position.watermark)) if position.watermark else "null"
+                path = os.path.join(directory, f"{test_type}.parquet")
+                self._db.execute(
+                    f"COPY {test_type} TO '{path}' "
+                    f"(FORMAT parquet, KV_METADATA {{watermark: '{stamp}'}})"
+                )
+
+    # ---------------- query functions ----------------
+    def execute(self, sql: str, params=None, tables=tuple(SNAPSHOT_COLUMNS)) -> list[dict]:
+        """Run ad-hoc analytics SQL on the copies of tables, as dicts."""
+        for test_type in tables:
+            self._ready(test_type)
+        cursor = self._db.cursor()
+        result = cursor.execute(sql, params or [])
+        names = [column[0] for column in result.description]
+        return [dict(zip(names, row)) for row in result.fetchall()]
+
+    def get_population_stats(
+        self, column_metrics: list, test_type: str, segment: str = ALL_SEGMENT
+    ) -> dict:
+        metrics = _metric_list(test_type, column_metrics)
+        self._ready(test_type)
+        by_team = segment != ALL_SEGMENT
+        sql = _moments_sql(test_type, metrics, by_team)
+        row = self._db.cursor().execute(sql, [segment] if by_team else []).fetchone()
+        return {
+            col: moments_to_stats(Moments(*row[3 * i : 3 * i + 3]))
+            for i, col in enumerate(metrics)
+        }
+
+    def get_team_average(self, metrics: list, test_type: str, segment: str = ALL_SEGMENT) -> dict:
+        metrics = _metric_list(test_type, metrics)
+        self._ready(test_type)
+        by_team = segment != ALL_SEGMENT
+        sql = _team_average_sql(test_type, metrics, by_team)
+        result = self._db.cursor().execute(sql, [segment] if by_team else [])
+        return dict(zip(metrics, result.fetchone()))
+
+
+analytics_backend: DuckDBAnalytics | None = None
+
+
+def enable_duckdb_analytics(**options) -> DuckDBAnalytics:
+    """Route get_population_stats and get_team_average to a DuckDBAnalytics.
+
+    Nothing is copied until the first routed query.
+    """
+    global analytics_backend
+    analytics_backend = DuckDBAnalytics(**options)
+    use_backend(analytics_backend, ["get_population_stats", "get_team_average"])
+    return analytics_backend
@@ -0,0 +1,63 @@
+"""Pluggable backends for the query functions in queries.py.
+
+A backend is any object with methods named (and called) like the query
+functions it serves. Functions decorated with @routed check for a backend
+registered under their name and hand the call to it, skipping the Postgres
+path and the query cache; everything not routed keeps going to Postgres.
+Whichever serves it, the statements a routed call runs are tagged with the
+function's name for instrumentation.py.
+"""
+
+import threading
+from functools import wraps
+
+from .instrumentation import query_scope
+
+_routes: dict[str, object] = {}
+_routable: set[str] = set()
+_lock = threading.Lock()
+
+
+def routed(func):
+    """Let use_backend() take over calls to func."""
+    name = func.__name__
+    _routable.add(name)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        backend = _routes.get(name)
+        with query_scope(name):
+            if backend is None:
+                return func(*args, **kwargs)
+            return getattr(backend, name)(*args, **kwargs)
+
+    return wrapper
+
+
+def use_backend(backend, names=None) -> list[str]:
+    """Serve the named query functions from backend.
+
+    names defaults to every routed function the backend has a method for.
+    Returns the names now routed to it.
+    Raises ValueError for a name that isn't a routed function.
+    """
+    if names is None:
+        names = sorted(name for name in _routable if hasattr(backend, name))
+    unknown = [name for name in names if name not in _routable]
+    if unknown:
+        raise ValueError(f"Not routable query functions: {', '.join(unknown)}")
+    with _lock:
+        for name in names:
+            _routes[name] = backend
+    return list(names)
+
+
+def clear_backends() -> None:
+    """Send every query function back to Postgres."""
+    with _lock:
+        _routes.clear()
+
+
+def backend_for(name: str):
+    """The backend serving a query function, or None for Postgres."""
+    return _routes.get(name)
@@ -0,0 +1,173 @@
+"""Size-bounded LRU cache for query results, invalidated by data watermarks.
+
+Every cached answer is stored with the watermark (row count, max timestamp,
+version) of the data it was computed from: the athlete's rows for
+per-athlete queries, the whole table otherwise. Each lookup re-reads that
+watermark (a primary-key read on data_watermarks, kept current by
+triggers, or a count of the trials off Postgres) and only serves the
+cached answer if it is unchanged, so a new test invalidates the athlete's
+entries on the very next call.
+"""
+
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from sqlalchemy import text
+
+from .config import (
+    QUERY_CACHE_DEFAULT_TTL,
+    QUERY_CACHE_SIZE,
+    QUERY_CACHE_TTLS,
+)
+from .db import get_engine
+from .portable import watermark as portable_watermark
+
+# athlete_name of the watermark row covering a whole table
+TABLE_WIDE = ""
+
+
+class QueryCache:
+    """Thread-safe LRU of (expires_at, watermark, value) entries with counters."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        # False sends every call straight to the database (benchmarks)
+        self.enabled = True
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def _count(self, function: str, outcome: str) -> None:
+        counts = self._counters.setdefault(
+            function, {"hits": 0, "misses": 0, "stale": 0, "expired": 0}
+        )
+        counts[outcome] += 1
+
+    def get(self, key: tuple, watermark: tuple) -> tuple[bool, object]:
+        """Return (True, value) for a fresh entry, else (False, None)."""
+        function = key[0]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._count(function, "misses")
+                return False, None
+            expires_at, cached_watermark, value = entry
+            if cached_watermark != watermark:
+                del self._entries[key]
+                self._count(function, "stale")
+                return False, None
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._count(function, "expired")
+                return False, None
+            self._entries.move_to_end(key)
+            self._count(function, "hits")
+            return True, value
+
+    def put(self, key: tuple, watermark: tuple, value, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, watermark, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters overall and per query function, for sizing.
+
+        Misses are split into plain misses, "stale" (watermark changed) and
+        "expired" (TTL elapsed).
+        """
+        with self._lock:
+            functions = {name: dict(counts) for name, counts in self._counters.items()}
+            size = len(self._entries)
+        totals = {"hits": 0, "misses": 0, "stale": 0, "expired": 0}
+        for counts in functions.values():
+            for outcome, count in counts.items():
+                totals[outcome] += count
+        lookups = sum(totals.values())
+        return {
+            **totals,
+            "hit_ratio": totals["hits"] / lookups if lookups else 0.0,
+            "size": size,
+            "maxsize": self.maxsize,
+            "functions": functions,
+        }
+
+
+query_cache = QueryCache(QUERY_CACHE_SIZE)
+
+
+def get_watermark(test_type: str, athlete_name: str = TABLE_WIDE) -> tuple:
+    """Get (row_count, max_timestamp, version) for an athlete or a whole table.
+
+    data_watermarks only exists after the Postgres migrations; on other
+    dialects the watermark is counted from the trial table itself.
+    """
+    engine = get_engine()
+    if engine.dialect.name != "postgresql":
+        return portable_watermark(test_type, None if athlete_name == TABLE_WIDE else athlete_name)
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(
+                "SELECT row_count, max_timestamp, version FROM data_watermarks "
+                "WHERE test_type = :test_type AND athlete_name = :name"
+            ),
+            {"test_type": test_type, "name": athlete_name},
+        ).fetchone()
+        return tuple(row) if row is not None else (0, None, 0)
+
+
+def _freeze(value):
+    """Make list arguments (metric lists) usable in a cache key."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def cached(test_type: str | None = None):
+    """Cache a query function's results in query_cache.
+
+    test_type names the table the function reads; leave it None for
+    functions that take a test_type argument. Functions with an
+    athlete_name argument are validated against that athlete's watermark,
+    all others against the whole table's. The TTL comes from
+    QUERY_CACHE_TTLS. Cached values are shared, so treat them as read-only.
+    The undecorated function stays available as .uncached.
+    """
+
+    def decorate(func):
+        signature = inspect.signature(func)
+        ttl = QUERY_CACHE_TTLS.get(func.__name__, QUERY_CACHE_DEFAULT_TTL)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not query_cache.enabled:
+                return func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+            table = test_type or arguments["test_type"]
+            athlete_name = arguments.get("athlete_name", TABLE_WIDE)
+            key = (func.__name__,) + tuple(_freeze(v) for v in arguments.values())
+
+            # Read the watermark before querying: if a test lands in between,
+            # the entry is tagged older than its contents and just misses next time
+            watermark = get_watermark(table, athlete_name)
+            hit, value = query_cache.get(key, watermark)
+            if hit:
+                return value
+            value = func(*args, **kwargs)
+            query_cache.put(key, watermark, value, ttl)
+            return value
+
+        wrapper.uncached = func
+        return wrapper
+
+    return decorate
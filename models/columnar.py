@@ -0,0 +1,358 @@
+"""In-memory columnar copy of the test tables, served from NumPy arrays.
+
+Optional backend for the query functions (QUERY_BACKEND=columnar). The first
+query loads tests_cmj / tests_cmjr in one REPEATABLE READ snapshot and folds
+the trials into per-(athlete, date) partials: the same SUM / COUNT layout as
+the rollup tables, held as (rows x metrics) arrays sorted by athlete, then
+date. Each athlete maps to a contiguous row range whose dates are sorted,
+so a lookup is a dict hit plus a binary search. Population moments are kept
+per segment as count / mean / M2 arrays, one entry per metric.
+
+New trials are appended incrementally. At most every COLUMNAR_SYNC_SECONDS
+a query re-reads the table's watermark and, if it moved, fetches only the
+rows newer than the last timestamp seen; after updates, deletes or
+back-dated inserts the table is reloaded instead (see replica.py).
+
+With SNAPSHOT_DIR set, a table instead starts from its saved state
+(snapshot.py) and its first query fetches only the trials newer than that.
+
+Answers match the Postgres path up to float rounding in the sums.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from .backends import use_backend
+from .config import (
+    ALL_SEGMENT,
+    COLUMNAR_SYNC_SECONDS,
+    SNAPSHOT_COLUMNS,
+    SNAPSHOT_DIR,
+)
+from .replica import EMPTY_POSITION, Position, fetch_changes
+from .stats import EMPTY_MOMENTS, Moments, moments_to_stats
+
+LAST5_DATES = 5
+
+
+def _moments(values: np.ndarray) -> tuple:
+    """Per-column (n, mean, M2) of a (trials x metrics) array, ignoring NaN."""
+    present = ~np.isnan(values)
+    n = present.sum(axis=0)
+    total = np.where(present, values, 0.0).sum(axis=0)
+    mean = np.divide(total, n, out=np.zeros(n.shape), where=n > 0)
+    m2 = np.where(present, (values - mean) ** 2, 0.0).sum(axis=0)
+    return n, mean, m2
+
+
+def _merge(a: tuple, b: tuple) -> tuple:
+    """stats.merge_moments applied column-wise to (n, mean, M2) arrays."""
+    n = a[0] + b[0]
+    safe_n = np.where(n > 0, n, 1)
+    delta = b[1] - a[1]
+    mean = np.where(n > 0, a[1] + delta * b[0] / safe_n, 0.0)
+    m2 = np.where(
+        n > 0, np.maximum(a[2] + b[2] + delta * delta * a[0] * b[0] / safe_n, 0.0), 0.0
+    )
+    return n, mean, m2
+
+
+class _Trials:
+    """A batch of trials fetched from a test table, as NumPy columns."""
+
+    def __init__(self, rows: list, metric_count: int):
+        columns = list(zip(*rows)) or [()] * (4 + metric_count)
+        self.names = np.array(columns[0], dtype=object)
+        self.dates = np.array(columns[1], dtype="datetime64[D]")
+        self.teams = columns[2]
+        self.values = np.array(columns[4:], dtype=float).T.reshape(len(rows), metric_count)
+
+    def segments(self) -> dict[str, np.ndarray]:
+        """Row indices per population segment: ALL_SEGMENT plus each team ID."""
+        members = {ALL_SEGMENT: np.arange(len(self.names))}
+        by_team = {}
+        for row, teams in enumerate(self.teams):
+            if isinstance(teams, list):
+                for team_id in teams:
+                    by_team.setdefault(team_id, []).append(row)
+        members.update((team_id, np.array(rows)) for team_id, rows in by_team.items())
+        return members
+
+    def team_athletes(self) -> dict[str, set]:
+        athletes = {}
+        for name, teams in zip(self.names, self.teams):
+            if name is not None and isinstance(teams, list):
+                for team_id in teams:
+                    athletes.setdefault(team_id, set()).add(name)
+        return athletes
+
+
+class _Table:
+    """Immutable in-memory state of one test table; append() builds a new one."""
+
+    def __init__(self, test_type, names, dates, sums, counts, moments, team_athletes, position):
+        self.test_type = test_type
+        self.metrics = SNAPSHOT_COLUMNS[test_type]
+        self.column = {col: i for i, col in enumerate(self.metrics)}
+        self.names, self.dates, self.sums, self.counts = names, dates, sums, counts
+        self.moments = moments
+        self.team_athletes = team_athletes
+        self.position = position
+
+        rows = len(names)
+        starts = np.flatnonzero(np.r_[True, names[1:] != names[:-1]]) if rows else np.zeros(0, int)
+        stops = np.r_[starts[1:], rows].astype(int)
+        # athlete -> [start, stop) range of rows, dates ascending within it
+        self.ranges = dict(zip(names[starts].tolist(), zip(starts.tolist(), stops.tolist())))
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.means = sums / counts
+            # Trial-weighted mean over each row's date and the 4 dates before it
+            row_start = np.repeat(starts, stops - starts)
+            index = np.arange(rows)
+            sums5, counts5 = sums.copy(), counts.copy()
+            for back in range(1, LAST5_DATES):
+                # Add the row `back` places earlier where it is the same athlete's
+                inside = (index[back:] - back >= row_start[back:])[:, None]
+                sums5[back:] += np.where(inside, sums[:-back], 0.0)
+                counts5[back:] += np.where(inside, counts[:-back], 0)
+            self.last5 = sums5 / counts5
+            self.team_means = sums.sum(axis=0) / counts.sum(axis=0)
+
+    @classmethod
+    def empty(cls, test_type: str) -> "_Table":
+        metric_count = len(SNAPSHOT_COLUMNS[test_type])
+        return cls(
+            test_type,
+            np.array([], dtype=str),
+            np.array([], dtype="datetime64[D]"),
+            np.zeros((0, metric_count)),
+            np.zeros((0, metric_count), dtype=np.int64),
+            {},
+            {},
+            EMPTY_POSITION,
+        )
+
+    def append(self, trials: _Trials, position: Position) -> "_Table":
+        """New state with trials folded into the partials and moments."""
+        moments = dict(self.moments)
+        for segment, rows in trials.segments().items():
+            batch = _moments(trials.values[rows])
+            moments[segment] = _merge(moments[segment], batch) if segment in moments else batch
+
+        team_athletes = {team_id: set(names) for team_id, names in self.team_athletes.items()}
+        for team_id, names in trials.team_athletes().items():
+            team_athletes.setdefault(team_id, set()).update(names)
+
+        # Each trial with an athlete and date becomes a one-trial row, then
+        # rows of the same (athlete, date), old and new, are summed together
+        named = (trials.names != None) & ~np.isnat(trials.dates)  # noqa: E711
+        values = trials.values[named]
+        present = ~np.isnan(values)
+        names = np.concatenate([self.names, trials.names[named].astype(str)])
+        dates = np.concatenate([self.dates, trials.dates[named]])
+        sums = np.concatenate([self.sums, np.where(present, values, 0.0)])
+        counts = np.concatenate([self.counts, present.astype(np.int64)])
+
+        order = np.lexsort((dates, names))
+        names, dates, sums, counts = names[order], dates[order], sums[order], counts[order]
+        if len(names):
+            starts = np.flatnonzero(
+                np.r_[True, (names[1:] != names[:-1]) | (dates[1:] != dates[:-1])]
+            )
+            names, dates = names[starts], dates[starts]
+            sums = np.add.reduceat(sums, starts, axis=0)
+            counts = np.add.reduceat(counts, starts, axis=0)
+
+        return _Table(
+            self.test_type, names, dates, sums, counts, moments, team_athletes, position
+        )
+
+    def columns_of(self, metrics) -> list[int]:
+        unknown = [col for col in metrics if col not in self.column]
+        if unknown:
+            raise ValueError(f"Unknown {self.test_type} metrics: {', '.join(unknown)}")
+        return [self.column[col] for col in metrics]
+
+    def row_on(self, athlete_name: str, test_date_iso: str) -> int | None:
+        """Row of athlete_name's test_date_iso, or None."""
+        start, stop = self.ranges.get(athlete_name, (0, 0))
+        day = np.datetime64(test_date_iso, "D")
+        row = start + int(np.searchsorted(self.dates[start:stop], day))
+        return row if row < stop and self.dates[row] == day else None
+
+    def values(self, array: np.ndarray, row: int | None, metrics) -> dict:
+        """{metric: value} from one row of array, None for NaN; {} without a row."""
+        if row is None:
+            return {}
+        found = array[row, self.columns_of(metrics)].tolist()
+        return {col: None if value != value else value for col, value in zip(metrics, found)}
+
+
+class ColumnarStore:
+    """Query backend answering from in-memory copies of the test tables.
+
+    Methods share names and arguments with the query functions in
+    queries.py, so use_backend() can route those calls here. Each table is
+    loaded on its first query, from snapshot_dir when it holds the table.
+    """
+
+    def __init__(
+        self, sync_seconds: float = COLUMNAR_SYNC_SECONDS, snapshot_dir: str = SNAPSHOT_DIR
+    ):
+        self.sync_seconds = sync_seconds
+        self.snapshot_dir = snapshot_dir
+        self._tables: dict[str, _Table] = {}
+        self._next_sync: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _table(self, test_type: str) -> _Table:
+        if test_type not in SNAPSHOT_COLUMNS:
+            raise ValueError(f"Unknown test type: {test_type!r}")
+        if test_type not in self._tables:
+            with self._lock:
+                if test_type not in self._tables:
+                    self._boot(test_type)
+                    self.sync(test_type)
+        elif time.monotonic() >= self._next_sync[test_type] and self._lock.acquire(
+            blocking=False
+        ):
+            # One thread catches up; the others keep answering from the current state
+            try:
+                self.sync(test_type)
+            finally:
+                self._lock.release()
+        return self._tables[test_type]
+
+    def _boot(self, test_type: str) -> None:
+        # snapshot.py builds on this module
+        from .snapshot import read_table
+
+        table = read_table(test_type, self.snapshot_dir)
+        if table is not None:
+            self._tables[test_type] = table
+
+    def sync(self, test_type: str) -> None:
+        """Bring test_type up to its watermark: append new trials or reload."""
+        self._next_sync[test_type] = time.monotonic() + self.sync_seconds
+        table = self._tables.get(test_type)
+        change = fetch_changes(test_type, table.position if table is not None else None)
+        if change is None:
+            return
+        appended, rows, position = change
+        base = table if appended else _Table.empty(test_type)
+        trials = _Trials(rows, len(SNAPSHOT_COLUMNS[test_type]))
+        self._tables[test_type] = base.append(trials, position)
+
+    def reload(self, test_type: str) -> None:
+        """Drop test_type's state; its next query loads it again."""
+        with self._lock:
+            self._tables.pop(test_type, None)
+
+    # ---------------- query functions ----------------
+    def get_athlete_names(self) -> list[str]:
+        return sorted(self._table("tests_cmjr").ranges)
+
+    def get_team_athlete_names(self, team_id: str, test_type: str = "tests_cmj") -> list[str]:
+        return sorted(self._table(test_type).team_athletes.get(team_id, ()))
+
+    def get_dates(self, test_type: str, athlete_name: str) -> list[dict]:
+        table = self._table(test_type)
+        start, stop = table.ranges.get(athlete_name, (0, 0))
+        return [
+            {"label": day.strftime("%m-%d-%Y"), "value": day.isoformat()}
+            for day in reversed(table.dates[start:stop].tolist())
+        ]
+
+    def get_date_metrics(
+        self, test_type: str, metrics: list, athlete_name: str, test_date_iso: str
+    ) -> dict:
+        table = self._table(test_type)
+        return table.values(table.means, table.row_on(athlete_name, test_date_iso), metrics)
+
+    def get_baseline_metrics(self, test_type: str, metrics: list, athlete_name: str) -> dict:
+        table = self._table(test_type)
+        start, stop = table.ranges.get(athlete_name, (0, 0))
+        return table.values(table.means, start if stop else None, metrics)
+
+    def get_last5_metrics(self, test_type: str, metrics: list, athlete_name: str) -> dict:
+        table = self._table(test_type)
+        start, stop = table.ranges.get(athlete_name, (0, 0))
+        return table.values(table.last5, stop - 1 if stop else None, metrics)
+
+    def get_alltime_metrics(self, test_type: str, metrics: list, athlete_name: str) -> dict:
+        table = self._table(test_type)
+        start, stop = table.ranges.get(athlete_name, (0, 0))
+        columns = table.columns_of(metrics)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = table.sums[start:stop, columns].sum(axis=0) / table.counts[
+                start:stop, columns
+            ].sum(axis=0)
+        return {col: None if value != value else value for col, value in zip(metrics, means.tolist())}
+
+    def get_trend_metrics(self, test_type: str, metrics: list, athlete_name: str) -> list[dict]:
+        table = self._table(test_type)
+        start, stop = table.ranges.get(athlete_name, (0, 0))
+        days = table.dates[start:stop].tolist()
+        return [
+            {"test_date": day, **table.values(table.means, row, metrics)}
+            for day, row in zip(days, range(start, stop))
+        ]
+
+    def get_team_average(self, metrics: list, test_type: str, segment: str = ALL_SEGMENT) -> dict:
+        table = self._table(test_type)
+        columns = table.columns_of(metrics)
+        if segment == ALL_SEGMENT:
+            found = table.team_means[columns].tolist()
+        else:
+            n, mean, _ = table.moments.get(segment, (None, None, None))
+            found = [mean[i] if n is not None and n[i] else None for i in columns]
+        return {
+            col: None if value is None or value != value else float(value)
+            for col, value in zip(metrics, found)
+        }
+
+    def get_population_stats(
+        self, column_metrics: list, test_type: str, segment: str = ALL_SEGMENT
+    ) -> dict:
+        table = self._table(test_type)
+        n, mean, m2 = table.moments.get(segment, (None, None, None))
+        stats = {}
+        for col in column_metrics:
+            i = table.column.get(col)
+            if n is None or i is None:
+                stats[col] = moments_to_stats(EMPTY_MOMENTS)
+            else:
+                stats[col] = moments_to_stats(Moments(int(n[i]), float(mean[i]), float(m2[i])))
+        return stats
+
+    def fetch_session_snapshot(
+        self, test_type: str, athlete_name: str, test_date_iso: str, segment: str = ALL_SEGMENT
+    ) -> dict:
+        table = self._table(test_type)
+        start, stop = table.ranges.get(athlete_name, (0, 0))
+        cols = table.metrics
+        return {
+            "current": table.values(table.means, table.row_on(athlete_name, test_date_iso), cols),
+            "baseline": table.values(table.means, start if stop else None, cols),
+            "last5": table.values(table.last5, stop - 1 if stop else None, cols),
+            "population": self.get_population_stats(cols, test_type, segment),
+        }
+
+
+columnar_store: ColumnarStore | None = None
+
+
+def enable_columnar(
+    sync_seconds: float = COLUMNAR_SYNC_SECONDS, snapshot_dir: str = SNAPSHOT_DIR
+) -> ColumnarStore:
+    """Route every query function the store implements to a new ColumnarStore.
+
+    Nothing is loaded until the first routed query.
+    """
+    global columnar_store
+    columnar_store = ColumnarStore(sync_seconds, snapshot_dir)
+    use_backend(columnar_store)
+    return columnar_store
@@ -1,16 +1,26 @@
 import os
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+# ====================== Team Settings ========================================
+FOOTBALL_TEAM_ID = "ajTD7FpSJgRIjXzEBu3E"
 
-DATABASE_URL = os.environ["DATABASE_URL"]
+# Local timezone each team tests in, keyed by team ID. The generated test_date
+# column buckets trials into calendar days in this timezone (see migrations.py).
+TEAM_TIMEZONES = {
+    FOOTBALL_TEAM_ID: "America/New_York",
+}
+DEFAULT_TIMEZONE = "America/New_York"
 
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
+# Population-stats segment covering every row of a test table; the other
+# segments are the team IDs found in athlete_teams
+ALL_SEGMENT = "all"
 
-
-class Base(DeclarativeBase):
-    pass
+# Teams the pages can switch between, team ID -> label, first one shown by
+# default. Rosters, norms and averages are kept per team ID in the database
+# (athlete_team_members, population_moments), so serving another school is
+# one entry here.
+TEAMS = {
+    FOOTBALL_TEAM_ID: "UPHS Football",
+}
 
 
 # ====================== Query Metrics for queries.py ========================================
@@ -54,6 +64,18 @@ INJURY_DATA = [
     "system_weight_n",
 ]
 
+
+# Metrics for db query for the Trends container
+TREND_COLUMNS = (
+    GAUGE_COLUMNS
+    + BAR_COLUMNS
+    + [
+        "rebound_depth_m",
+        "time_to_stabilization_ms",
+        "relative_peak_landing_force",
+    ]
+)
+
 # ================ Graph Data Constants for athlete.py ===========================
 # Maps gauge ID suffix -> (display title, DB column)
 GAUGE_CONFIG = [
@@ -222,3 +244,149 @@ FOOTBALL_INJURY_CONFIG = [
         "lr_propulsive_impulse_index",
     ),
 ]
+
+# ================================== Session Snapshot ==================================================
+# Every metric a session snapshot averages, per test table (deduplicated, order kept)
+SNAPSHOT_COLUMNS = {
+    "tests_cmjr": list(
+        dict.fromkeys(GAUGE_COLUMNS + BAR_COLUMNS + ASYMMETRY_COLUMNS + INJURY_DATA)
+    ),
+    "tests_cmj": list(
+        dict.fromkeys(
+            FOOTBALL_OUTPUT_METRICS
+            + FOOTBALL_MOVEMENT_ANALYSIS_COLUMNS
+            + FOOTBALL_ASYMMETRY_METRICS
+            + FOOTBALL_INJURY_DATA_POINTS
+        )
+    ),
+}
+
+# Per-athlete-per-date rollup table maintained for each test table (see migrations.py)
+ROLLUP_TABLES = {
+    "tests_cmjr": "tests_cmjr_rollup",
+    "tests_cmj": "tests_cmj_rollup",
+}
+
+# Seconds a snapshot is shared between the callbacks fired by one dropdown change
+SNAPSHOT_TTL_SECONDS = 5
+# Seconds a shared snapshot is served before its table's watermark is read again,
+# so a newly landed test shows up within this long
+SNAPSHOT_WATERMARK_SECONDS = 1
+
+# Threads used by queries.fan_out to run independent queries concurrently.
+# Keep at or below the engine's pool size so fan-out never waits on a connection.
+QUERY_FAN_OUT_WORKERS = 4
+
+# ================================== Gauge Scoring ==================================================
+# "zscore" places a value by the population mean and std, which assumes a
+# normal distribution. "percentile" shows its empirical percentile rank in
+# the population instead (models/percentiles.py), right for skewed metrics
+# such as contact times.
+GAUGE_SCORING = os.environ.get("GAUGE_SCORING", "zscore")
+# Metrics with more values than this keep a quantile sketch, not every value
+PERCENTILE_EXACT_LIMIT = int(os.environ.get("PERCENTILE_EXACT_LIMIT", "100000"))
+# Quantiles in a sketch; 1001 resolves ranks to 0.1 percentile
+PERCENTILE_SKETCH_POINTS = int(os.environ.get("PERCENTILE_SKETCH_POINTS", "1001"))
+# Seconds between watermark checks of the loaded distributions
+PERCENTILE_REFRESH_SECONDS = float(os.environ.get("PERCENTILE_REFRESH_SECONDS", "60"))
+
+# ================================== Startup Data ==================================================
+# Seconds between the background refresher's watermark checks of the data
+# the pages build their layouts from (dropdown rosters; models/refresher.py)
+STARTUP_REFRESH_SECONDS = float(os.environ.get("STARTUP_REFRESH_SECONDS", "30"))
+# Seconds between retries while a first load is failing (database down at boot)
+STARTUP_RETRY_SECONDS = float(os.environ.get("STARTUP_RETRY_SECONDS", "5"))
+# How often (ms) a page rendered before its data was loaded polls for it
+STARTUP_POLL_MS = 1000
+
+# ================================== SQL Instrumentation ==================================================
+# Per-statement latency histograms, row counts and the slow-query log
+# (models/instrumentation.py), tagged with the query function and Dash callback
+SQL_INSTRUMENTATION = os.environ.get("SQL_INSTRUMENTATION", "1") == "1"
+# Upper bounds (ms) of the latency histogram buckets; slower ones land in +Inf
+SQL_LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# Statements at least this slow (ms) go to the slow-query log; 0 disables it
+SQL_SLOW_QUERY_MS = float(os.environ.get("SQL_SLOW_QUERY_MS", "250"))
+SQL_SLOW_QUERY_LOG = os.environ.get("SQL_SLOW_QUERY_LOG", "logs/slow_queries.log")
+SQL_SLOW_QUERY_LOG_BYTES = 5 * 1024 * 1024
+SQL_SLOW_QUERY_LOG_BACKUPS = 5
+# Characters of a slow statement's parameters kept in its log record; an
+# executemany logs only its row count
+SQL_SLOW_QUERY_PARAMETERS_CHARS = 2000
+# Re-run slow SELECTs under EXPLAIN (ANALYZE, BUFFERS) for the log (Postgres
+# only, off the request thread); the same statement at most once per interval
+SQL_SLOW_QUERY_EXPLAIN = os.environ.get("SQL_SLOW_QUERY_EXPLAIN", "1") == "1"
+SQL_SLOW_QUERY_EXPLAIN_INTERVAL = 300
+
+# ================================== Metrics Endpoint ==================================================
+# Prometheus text exposition of callback, SQL, pool and cache metrics
+# (models/metrics.py), served on the Flask server behind the Dash app
+METRICS_PATH = os.environ.get("METRICS_PATH", "/metrics")
+# Upper bounds (ms) of the callback latency buckets
+CALLBACK_LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Upper bounds (bytes) of the callback response size buckets
+RESPONSE_SIZE_BUCKETS_BYTES = tuple(1024 * 4**i for i in range(8))  # 1 KiB .. 16 MiB
+
+# ================================== Query Cache ==================================================
+# Maximum number of cached query results (least recently used evicted first)
+QUERY_CACHE_SIZE = 1024
+
+# Seconds a cached result may be served, per query function. Results are
+# also dropped as soon as the table's or athlete's watermark changes.
+QUERY_CACHE_TTLS = {
+    "get_athlete_names": 600,
+    "get_team_athlete_names": 600,
+    "get_population_stats": 600,
+    "get_team_average": 600,
+    "get_dates": 300,
+    "get_trend_metrics": 300,
+}
+QUERY_CACHE_DEFAULT_TTL = 120
+
+# ================================== Query Backend ==================================================
+# "postgres" answers every query from the database. "columnar" serves them
+# from in-memory NumPy copies of the test tables (models/columnar.py).
+# "portable" runs them as SQLAlchemy Core over the raw test tables
+# (models/portable.py), so a SQLite or DuckDB DATABASE_URL works without the
+# Postgres rollups; it is the default for any non-Postgres DATABASE_URL.
+QUERY_BACKEND = os.environ.get("QUERY_BACKEND") or (
+    "postgres"
+    if os.environ.get("DATABASE_URL", "postgresql").startswith("postgresql")
+    else "portable"
+)
+# Seconds between watermark checks of a columnar copy
+COLUMNAR_SYNC_SECONDS = float(os.environ.get("COLUMNAR_SYNC_SECONDS", "5"))
+# Directory of the cold-start snapshot written by `python -m models.snapshot`
+# ("" = none). An empty columnar or DuckDB copy starts from its files and
+# then fetches only the trials newer than the snapshot's watermark.
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", "")
+# The embedded DuckDB copy of models/analytics.py, for ad-hoc roster analytics
+# and benchmarks (the dashboards take their population figures from the
+# session snapshot). ":memory:" or a file, which keeps the copy across restarts
+ANALYTICS_DUCKDB_PATH = os.environ.get("ANALYTICS_DUCKDB_PATH", ":memory:")
+# Directory of {test_type}.parquet files to seed an empty copy from ("" = none)
+ANALYTICS_PARQUET_DIR = os.environ.get("ANALYTICS_PARQUET_DIR", SNAPSHOT_DIR)
+# Seconds between watermark checks of the DuckDB copy
+ANALYTICS_SYNC_SECONDS = float(os.environ.get("ANALYTICS_SYNC_SECONDS", "30"))
+
+# ================================== Database Engine ==================================================
+# The engine is created lazily by models/db.py on first use. DATABASE_URL is
+# read at that point, so importing the query modules never needs it.
+
+# Request threads per server process (gunicorn --threads / Flask threaded)
+WEB_THREADS = int(os.environ.get("WEB_THREADS", "8"))
+
+# Every request thread plus the fan-out pool can hold a connection at once
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", WEB_THREADS + QUERY_FAN_OUT_WORKERS))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "4"))
+# Seconds to wait for a free connection before raising
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))
+# Seconds after which a pooled connection is replaced
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+# Server-side per-statement limit (Postgres only); 0 disables it
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "5000"))
+# Executions of the same statement on a connection before psycopg prepares it
+# server-side (psycopg 3 only). Empty disables prepared statements, which
+# transaction-pooling PgBouncer setups need.
+DB_PREPARE_THRESHOLD = os.environ.get("DB_PREPARE_THRESHOLD", "1")
+DB_PREPARE_THRESHOLD = int(DB_PREPARE_THRESHOLD) if DB_PREPARE_THRESHOLD else None
@@ -0,0 +1,151 @@
+"""Lazily created, fork-safe SQLAlchemy engine shared by the query modules.
+
+Nothing connects (or reads DATABASE_URL) until get_engine() is first called,
+so importing models.queries is free. Pool sizing, pre-ping, the
+per-statement timeout and the prepared-statement threshold come from the
+Database Engine section of config.py; SQL_INSTRUMENTATION adds the timing
+listeners of instrumentation.py.
+"""
+
+import os
+import threading
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from .config import (
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_PREPARE_THRESHOLD,
+    DB_STATEMENT_TIMEOUT_MS,
+    SQL_INSTRUMENTATION,
+)
+from . import instrumentation
+from .dialects import install
+
+# Bound to the engine when it is created
+Session = sessionmaker()
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class EngineManager:
+    """Owns the process's engine: lazy creation, fork handling and pool metrics."""
+
+    def __init__(self, url: str | None = None):
+        self._url = url
+        self._engine = None
+        self._lock = threading.Lock()
+        # Separate from _lock, which is held while creating and disposing the engine
+        self._counters_lock = threading.Lock()
+        self._counters = {"connects": 0, "checkouts": 0, "invalidations": 0}
+
+    @property
+    def engine(self) -> Engine:
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    self._engine = self._create()
+        return self._engine
+
+    def _create(self) -> Engine:
+        url = make_url(self._url or os.environ["DATABASE_URL"])
+        connect_args = {}
+        if url.get_backend_name() == "postgresql" and DB_STATEMENT_TIMEOUT_MS:
+            # Keep any server options given in the URL (e.g. a search_path)
+            options = [url.query["options"]] if "options" in url.query else []
+            options.append(f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}")
+            connect_args["options"] = " ".join(options)
+        if url.get_driver_name() == "psycopg":
+            # registry.py hands out identical statement text, so these get reused
+            connect_args["prepare_threshold"] = DB_PREPARE_THRESHOLD
+        pool_args = {}
+        if issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+            # In-memory SQLite/DuckDB get a SingletonThreadPool, which rejects these
+            pool_args = {
+                "pool_size": DB_POOL_SIZE,
+                "max_overflow": DB_MAX_OVERFLOW,
+                "pool_timeout": DB_POOL_TIMEOUT,
+            }
+        engine = create_engine(
+            url,
+            **pool_args,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+            connect_args=connect_args,
+        )
+        install(engine)
+        if SQL_INSTRUMENTATION:
+            instrumentation.install(engine)
+        event.listen(engine.pool, "connect", lambda *_: self._bump("connects"))
+        event.listen(engine.pool, "checkout", lambda *_: self._bump("checkouts"))
+        event.listen(engine.pool, "invalidate", lambda *_: self._bump("invalidations"))
+        Session.configure(bind=engine)
+        return engine
+
+    def _bump(self, counter: str) -> None:
+        # Pool events fire on request threads; += alone can lose increments
+        with self._counters_lock:
+            self._counters[counter] += 1
+
+    def after_fork(self) -> None:
+        """Drop the parent's pooled connections in a forked child.
+
+        close=False leaves the sockets to the parent; the child opens fresh
+        connections on its next checkout.
+        """
+        if self._engine is not None:
+            self._engine.dispose(close=False)
+
+    def dispose(self) -> None:
+        """Close every pooled connection and forget the engine."""
+        with self._lock:
+            if self._engine is not None:
+                self._engine.dispose()
+                self._engine = None
+
+    def pool_stats(self) -> dict:
+        """Pool utilisation: connections in use vs capacity, plus event counters.
+
+        Only a QueuePool reports utilisation; before the engine exists, or
+        with another pool class, the in-use figures are zero.
+        """
+        capacity = DB_POOL_SIZE + DB_MAX_OVERFLOW
+        with self._counters_lock:
+            counters = dict(self._counters)
+        if self._engine is None or not isinstance(self._engine.pool, QueuePool):
+            return {
+                "size": DB_POOL_SIZE,
+                "capacity": capacity,
+                "checked_out": 0,
+                "checked_in": 0,
+                "overflow": 0,
+                "utilisation": 0.0,
+                **counters,
+            }
+        pool = self._engine.pool
+        checked_out = pool.checkedout()
+        return {
+            "size": pool.size(),
+            "capacity": capacity,
+            "checked_out": checked_out,
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "utilisation": checked_out / capacity if capacity else 0.0,
+            **counters,
+        }
+
+
+engine_manager = EngineManager()
+os.register_at_fork(after_in_child=engine_manager.after_fork)
+
+
+def get_engine() -> Engine:
+    """Get the shared engine, creating it on first use."""
+    return engine_manager.engine
@@ -0,0 +1,157 @@
+"""SQL constructs compiled per dialect, for queries that run on Postgres,
+SQLite and DuckDB alike.
+
+    trial_date(timestamp, athlete_teams)  calendar day of a trial in its
+        team's local timezone (TEAM_TIMEZONES), like the generated test_date
+        column of migrations.py
+    has_team(athlete_teams, team_id)      whether the JSON array holds team_id;
+        anything but an array holds no teams
+    var_pop(value)                        population variance aggregate
+
+SQLite has no timezone arithmetic and no variance aggregate, so trial_date
+and var_pop run as Python functions there; install() registers them on an
+engine's connections.
+"""
+
+import json
+from datetime import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import Boolean, Date, Float, Text, case, event, literal_column
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from .config import DEFAULT_TIMEZONE, TEAM_TIMEZONES
+
+
+class trial_date(FunctionElement):
+    type = Date()
+    name = "trial_date"
+    inherit_cache = True
+
+
+class has_team(FunctionElement):
+    type = Boolean()
+    name = "has_team"
+    inherit_cache = True
+
+
+class var_pop(FunctionElement):
+    type = Float()
+    name = "var_pop"
+    inherit_cache = True
+
+
+def _sql_string(value: str):
+    return literal_column("'" + value.replace("'", "''") + "'", Text)
+
+
+def _team_timezone(teams):
+    """CASE picking the timezone of the first TEAM_TIMEZONES team in teams."""
+    whens = [
+        (has_team(teams, _sql_string(team_id)), _sql_string(tz))
+        for team_id, tz in TEAM_TIMEZONES.items()
+    ]
+    if not whens:
+        return _sql_string(DEFAULT_TIMEZONE)
+    return case(*whens, else_=_sql_string(DEFAULT_TIMEZONE))
+
+
+# ---------------- trial_date ----------------
+@compiles(trial_date)
+def _trial_date_postgresql(element, compiler, **kw):
+    timestamp, teams = element.clauses
+    tz = compiler.process(_team_timezone(teams), **kw)
+    return f"CAST(to_timestamp({compiler.process(timestamp, **kw)}) AT TIME ZONE {tz} AS DATE)"
+
+
+@compiles(trial_date, "duckdb")
+def _trial_date_duckdb(element, compiler, **kw):
+    timestamp, teams = element.clauses
+    tz = compiler.process(_team_timezone(teams), **kw)
+    return f"CAST(timezone({tz}, to_timestamp({compiler.process(timestamp, **kw)})) AS DATE)"
+
+
+@compiles(trial_date, "sqlite")
+def _trial_date_sqlite(element, compiler, **kw):
+    return f"trial_date({compiler.process(element.clauses, **kw)})"
+
+
+# ---------------- has_team ----------------
+@compiles(has_team)
+def _has_team_postgresql(element, compiler, **kw):
+    teams, team_id = (compiler.process(clause, **kw) for clause in element.clauses)
+    return f"(CAST({teams} AS JSONB) @> jsonb_build_array(CAST({team_id} AS TEXT)))"
+
+
+@compiles(has_team, "duckdb")
+def _has_team_duckdb(element, compiler, **kw):
+    teams, team_id = (compiler.process(clause, **kw) for clause in element.clauses)
+    return (
+        f"(json_type({teams}) = 'ARRAY' AND list_contains("
+        f"CAST(json_extract_string({teams}, '$[*]') AS VARCHAR[]), {team_id}))"
+    )
+
+
+@compiles(has_team, "sqlite")
+def _has_team_sqlite(element, compiler, **kw):
+    teams, team_id = (compiler.process(clause, **kw) for clause in element.clauses)
+    return (
+        f"(json_type({teams}) = 'array' AND EXISTS "
+        f"(SELECT 1 FROM json_each({teams}) WHERE json_each.value = {team_id}))"
+    )
+
+
+# ---------------- var_pop ----------------
+@compiles(var_pop)
+def _var_pop(element, compiler, **kw):
+    return f"var_pop({compiler.process(element.clauses, **kw)})"
+
+
+# ---------------- SQLite functions ----------------
+@lru_cache(maxsize=1024)
+def _timezone_of(teams_json: str | None) -> ZoneInfo:
+    teams = json.loads(teams_json) if teams_json else None
+    if isinstance(teams, list):
+        for team_id, tz in TEAM_TIMEZONES.items():
+            if team_id in teams:
+                return ZoneInfo(tz)
+    return ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def _sqlite_trial_date(timestamp, teams_json):
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, _timezone_of(teams_json)).date().isoformat()
+
+
+class _SQLiteVarPop:
+    """var_pop aggregate, accumulated with Welford's algorithm."""
+
+    def __init__(self):
+        self.n, self.mean, self.m2 = 0, 0.0, 0.0
+
+    def step(self, value):
+        if value is None:
+            return
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def finalize(self):
+        return self.m2 / self.n if self.n else None
+
+
+def _register_sqlite_functions(dbapi_connection, connection_record) -> None:
+    dbapi_connection.create_function("trial_date", 2, _sqlite_trial_date, deterministic=True)
+    dbapi_connection.create_aggregate("var_pop", 1, _SQLiteVarPop)
+
+
+def install(engine) -> None:
+    """Make the constructs usable on engine's new connections (SQLite only)."""
+    if engine.dialect.name == "sqlite" and not event.contains(
+        engine, "connect", _register_sqlite_functions
+    ):
+        event.listen(engine, "connect", _register_sqlite_functions)
@@ -0,0 +1,457 @@
+"""Per-statement SQL timing, row counts and a slow-query log.
+
+install(engine) adds cursor-execute listeners to an engine (db.py does so
+for the shared one when SQL_INSTRUMENTATION is on). Every statement is
+tagged with the query function running it (set by @routed, backends.py)
+and the Dash callback it runs for (@traced on the callbacks), and recorded
+in sql_metrics:
+
+- a latency histogram with SQL_LATENCY_BUCKETS_MS buckets and the rows
+  returned, per (callback, query function)
+- per callback, the calls and the statements they ran, so a callback that
+  starts issuing more queries shows up, and a latency histogram of the
+  whole call (CALLBACK_LATENCY_BUCKETS_MS)
+
+metrics.py serves all of it in the Prometheus text format.
+
+Statements at least SQL_SLOW_QUERY_MS long are queued to a background
+thread that writes them, with their parameters (cut to
+SQL_SLOW_QUERY_PARAMETERS_CHARS; an executemany's row count) and an EXPLAIN
+(ANALYZE, BUFFERS) plan for Postgres SELECTs, to the rotating
+SQL_SLOW_QUERY_LOG.
+The plan comes from running the statement again on its own connection, so
+each distinct statement is explained at most once per
+SQL_SLOW_QUERY_EXPLAIN_INTERVAL. Nothing blocks the request thread; records
+are dropped when the queue is full.
+
+Tags live in context variables, which queries.fan_out copies into its
+worker threads. Statements with no tag (migrations, the refresher's
+watermark checks) are recorded under None.
+
+    @callback(Output("bar-chart", "figure"), Input("athlete-dropdown", "value"))
+    @traced
+    def update_bars(selected_name):
+        ...
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+
+from sqlalchemy import event
+
+from .config import (
+    CALLBACK_LATENCY_BUCKETS_MS,
+    RESPONSE_SIZE_BUCKETS_BYTES,
+    SQL_LATENCY_BUCKETS_MS,
+    SQL_SLOW_QUERY_EXPLAIN,
+    SQL_SLOW_QUERY_EXPLAIN_INTERVAL,
+    SQL_SLOW_QUERY_LOG,
+    SQL_SLOW_QUERY_LOG_BACKUPS,
+    SQL_SLOW_QUERY_LOG_BYTES,
+    SQL_SLOW_QUERY_MS,
+    SQL_SLOW_QUERY_PARAMETERS_CHARS,
+)
+
+logger = logging.getLogger(__name__)
+
+_query: ContextVar[str | None] = ContextVar("sql_query", default=None)
+_callback: ContextVar["_CallbackRun | None"] = ContextVar("sql_callback", default=None)
+
+
+class _CallbackRun:
+    """One call of a traced callback; counts the statements it runs."""
+
+    __slots__ = ("name", "statements")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.statements = 0
+
+
+@contextmanager
+def query_scope(name: str):
+    """Tag the statements run inside the block with query function name."""
+    token = _query.set(name)
+    try:
+        yield
+    finally:
+        _query.reset(token)
+
+
+def traced(func):
+    """Tag the statements a Dash callback runs with its module.name.
+
+    Goes under @callback, so Dash registers the tagged function. Also times
+    the call for the callback latency histogram.
+    """
+    name = f"{func.__module__}.{func.__name__}"
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        run = _CallbackRun(name)
+        token = _callback.set(run)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            _callback.reset(token)
+            sql_metrics.observe_callback(name, run.statements, elapsed_ms)
+            _last_callback.name = name
+
+    return wrapper
+
+
+# Name of the last traced callback finished on each thread, so the Flask
+# hook that sees the serialized response can attribute it (metrics.py)
+_last_callback = threading.local()
+
+
+def pop_last_callback() -> str | None:
+    """Name of the last traced callback this thread finished, then forget it."""
+    name = getattr(_last_callback, "name", None)
+    _last_callback.name = None
+    return name
+
+
+class Histogram:
+    """Observations in fixed buckets, plus their count, sum and maximum."""
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        # counts[i] holds values <= bounds[i]; the last one the rest
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding quantile q; inf past the last."""
+        if not self.count:
+            return None
+        target, seen = q * self.count, 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def copy(self) -> "Histogram":
+        copy = Histogram(self.bounds)
+        copy.counts = list(self.counts)
+        copy.count, copy.total, copy.max = self.count, self.total, self.max
+        return copy
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "max": self.max,
+            "buckets": dict(zip(self.bounds + (float("inf"),), self.counts)),
+        }
+
+
+class _CallbackStats:
+    __slots__ = ("calls", "statements", "max_statements", "latency", "payload")
+
+    def __init__(self):
+        self.calls = self.statements = self.max_statements = 0
+        self.latency = Histogram(CALLBACK_LATENCY_BUCKETS_MS)
+        self.payload = Histogram(RESPONSE_SIZE_BUCKETS_BYTES)
+
+
+class SQLMetrics:
+    """SQL statement and Dash callback metrics.
+
+    Per (callback, query function): statement latency and rows returned.
+    Per callback: calls, statements run, latency and response sizes.
+    Recording is a dict lookup and a bisect under one lock; the exports
+    (stats(), metrics.py) copy out under the same lock.
+    """
+
+    def __init__(self, bounds_ms=SQL_LATENCY_BUCKETS_MS):
+        self.bounds_ms = tuple(bounds_ms)
+        self._lock = threading.Lock()
+        # (callback, query) -> [latency Histogram (ms), rows]
+        self._statements: dict[tuple, list] = {}
+        self._callbacks: dict[str, _CallbackStats] = {}
+
+    def observe(self, callback: str | None, query: str | None, elapsed_ms: float, rows: int):
+        with self._lock:
+            entry = self._statements.get((callback, query))
+            if entry is None:
+                entry = self._statements[(callback, query)] = [Histogram(self.bounds_ms), 0]
+            entry[0].observe(elapsed_ms)
+            entry[1] += rows
+
+    def _callback_stats(self, callback: str) -> _CallbackStats:
+        stats = self._callbacks.get(callback)
+        if stats is None:
+            stats = self._callbacks[callback] = _CallbackStats()
+        return stats
+
+    def observe_callback(self, callback: str, statements: int, elapsed_ms: float) -> None:
+        with self._lock:
+            stats = self._callback_stats(callback)
+            stats.calls += 1
+            stats.statements += statements
+            stats.max_statements = max(stats.max_statements, statements)
+            stats.latency.observe(elapsed_ms)
+
+    def observe_payload(self, callback: str, size: int) -> None:
+        with self._lock:
+            self._callback_stats(callback).payload.observe(size)
+
+    def stats(self) -> dict:
+        """A copy of everything recorded so far.
+
+        {"statements": [{"callback", "query", "count", "total_ms", "max_ms",
+        "rows", "buckets"}, ...], "callbacks": {name: {"calls", "statements",
+        "max_statements", "latency", "payload"}}}; statements sorted by total
+        time, slowest first, and latency/payload as Histogram.as_dict().
+        """
+        with self._lock:
+            statements = []
+            for (callback, query), (histogram, rows) in self._statements.items():
+                latency = histogram.as_dict()
+                statements.append({
+                    "callback": callback,
+                    "query": query,
+                    "count": latency["count"],
+                    "total_ms": latency["total"],
+                    "max_ms": latency["max"],
+                    "rows": rows,
+                    "buckets": latency["buckets"],
+                })
+            callbacks = {
+                name: {
+                    "calls": stats.calls,
+                    "statements": stats.statements,
+                    "max_statements": stats.max_statements,
+                    "latency": stats.latency.as_dict(),
+                    "payload": stats.payload.as_dict(),
+                }
+                for name, stats in self._callbacks.items()
+            }
+        statements.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        return {"statements": statements, "callbacks": callbacks}
+
+    def histograms(self) -> dict:
+        """Histogram copies: {"statements": {(callback, query): (latency, rows)},
+        "callbacks": {name: (calls, statements, latency, payload)}}."""
+        with self._lock:
+            return {
+                "statements": {
+                    key: (histogram.copy(), rows)
+                    for key, (histogram, rows) in self._statements.items()
+                },
+                "callbacks": {
+                    name: (stats.calls, stats.statements, stats.latency.copy(), stats.payload.copy())
+                    for name, stats in self._callbacks.items()
+                },
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements.clear()
+            self._callbacks.clear()
+
+
+sql_metrics = SQLMetrics()
+
+
+class SlowQueryLog:
+    """Writes slow statements, with plans, to a rotating log from a background thread."""
+
+    def __init__(
+        self,
+        path: str = SQL_SLOW_QUERY_LOG,
+        max_bytes: int = SQL_SLOW_QUERY_LOG_BYTES,
+        backups: int = SQL_SLOW_QUERY_LOG_BACKUPS,
+        explain: bool = SQL_SLOW_QUERY_EXPLAIN,
+        explain_interval: float = SQL_SLOW_QUERY_EXPLAIN_INTERVAL,
+        parameters_chars: int = SQL_SLOW_QUERY_PARAMETERS_CHARS,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.parameters_chars = parameters_chars
+        self._queue: queue.Queue = queue.Queue(maxsize=64)
+        self._explained: dict[str, float] = {}
+        self._logger: logging.Logger | None = None
+        self._lock = threading.Lock()
+        self._pid = None
+        self.dropped = 0
+
+    def submit(self, engine, record: dict) -> None:
+        """Queue a slow statement for the log; never blocks."""
+        self._ensure_running()
+        try:
+            self._queue.put_nowait((engine, record))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """Wait until every queued record is written."""
+        self._queue.join()
+
+    def _ensure_running(self) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            threading.Thread(target=self._run, name="slow-query-log", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _run(self) -> None:
+        while True:
+            engine, record = self._queue.get()
+            try:
+                self._write(engine, record)
+            except Exception:
+                logger.exception("Writing the slow-query log failed")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, engine, record: dict) -> None:
+        plan = self._plan(engine, record) if self.explain else None
+        lines = [
+            f"{record['elapsed_ms']:.1f} ms, {record['rows']} rows, "
+            f"callback={record['callback']} query={record['query']}",
+            record["statement"],
+            f"parameters: {self._parameters(record)}",
+        ]
+        if plan:
+            lines.append("plan:")
+            lines.extend(f"  {line}" for line in plan)
+        self._get_logger().warning("\n".join(lines))
+
+    def _parameters(self, record: dict) -> str:
+        # A single record can't be split across log files, so keep it small
+        parameters = record["parameters"]
+        if record["executemany"]:
+            return f"{len(parameters)} rows (executemany)"
+        text = repr(parameters)
+        if len(text) > self.parameters_chars:
+            return f"{text[:self.parameters_chars]}... ({len(text)} chars)"
+        return text
+
+    def _plan(self, engine, record: dict) -> list[str] | None:
+        statement = record["statement"]
+        # ANALYZE executes the statement, so only ever re-run plain reads
+        if (
+            engine.dialect.name != "postgresql"
+            or record["executemany"]
+            or not statement.lstrip()[:6].upper() == "SELECT"
+        ):
+            return None
+        now = time.monotonic()
+        if now - self._explained.get(statement, -self.explain_interval) < self.explain_interval:
+            return None
+        # Forget statements whose interval is over, so distinct texts don't pile up
+        self._explained = {
+            seen: at for seen, at in self._explained.items() if now - at < self.explain_interval
+        }
+        self._explained[statement] = now
+        # A raw DBAPI connection, so the EXPLAIN isn't itself instrumented
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, record["parameters"])
+            return [row[0] for row in cursor.fetchall()]
+        except Exception as exc:
+            return [f"EXPLAIN failed: {exc}"]
+        finally:
+            connection.rollback()
+            connection.close()
+
+    def _get_logger(self) -> logging.Logger:
+        # Created on first write, so importing never touches the filesystem
+        if self._logger is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler = RotatingFileHandler(
+                self.path, maxBytes=self.max_bytes, backupCount=self.backups
+            )
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            slow_logger = logging.getLogger(f"{__name__}.slow")
+            slow_logger.addHandler(handler)
+            slow_logger.setLevel(logging.WARNING)
+            slow_logger.propagate = False
+            self._logger = slow_logger
+        return self._logger
+
+
+slow_query_log = SlowQueryLog()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Keyed by cursor: queries.batch pipelines several statements on one connection
+    conn.info.setdefault("sql_started", {})[id(cursor)] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["sql_started"].pop(id(cursor))) * 1000
+    rows = max(cursor.rowcount, 0)
+    query, run = _query.get(), _callback.get()
+    callback = run.name if run is not None else None
+    if run is not None:
+        run.statements += 1
+    sql_metrics.observe(callback, query, elapsed_ms, rows)
+    if SQL_SLOW_QUERY_MS and elapsed_ms >= SQL_SLOW_QUERY_MS:
+        slow_query_log.submit(
+            conn.engine,
+            {
+                "statement": statement,
+                "parameters": parameters,
+                "executemany": executemany,
+                "elapsed_ms": elapsed_ms,
+                "rows": rows,
+                "callback": callback,
+                "query": query,
+            },
+        )
+
+
+def _handle_error(exception_context) -> None:
+    # The failed statement never reaches after_cursor_execute. ExceptionContext
+    # leaves .cursor unset, so the cursor comes from the execution context
+    conn, context = exception_context.connection, exception_context.execution_context
+    cursor = getattr(context, "cursor", None)
+    if conn is not None and cursor is not None:
+        conn.info.get("sql_started", {}).pop(id(cursor), None)
+
+
+def _checkin(dbapi_connection, connection_record) -> None:
+    # Nothing runs on a pooled connection; drops the start times of a
+    # queries.batch pipeline that failed, which no listener above sees
+    if connection_record is not None:
+        connection_record.info.pop("sql_started", None)
+
+
+def install(engine) -> None:
+    """Record every statement engine runs in sql_metrics and the slow-query log."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    event.listen(engine, "checkin", _checkin)
@@ -0,0 +1,169 @@
+"""Prometheus metrics endpoint for the Flask server behind a Dash app.
+
+install(server) adds GET METRICS_PATH, which renders the current values in
+the Prometheus text format (version 0.0.4), and an after_request hook that
+records the size of every callback response. Everything is read from
+counters the app keeps anyway, so a scrape copies a few dicts and
+recording adds no work on the request path:
+
+    dash_callback_duration_seconds      histogram per callback (@traced)
+    dash_callback_response_bytes        histogram per callback
+    dash_callback_calls_total           counter per callback
+    dash_callback_sql_statements_total  counter per callback
+    sql_statement_duration_seconds      histogram per callback and query function
+    sql_statement_rows_total            counter per callback and query function
+    db_pool_connections                 gauge per state (checked_out, checked_in, overflow)
+    db_pool_capacity, db_pool_utilisation  gauges
+    db_pool_events_total                counter per event (connect, checkout, invalidation)
+    query_cache_lookups_total           counter per query function and outcome
+    query_cache_hit_ratio               gauge
+    query_cache_entries                 gauge
+
+Statements and callbacks without a tag are labelled "none".
+
+    app = Dash(__name__)
+    metrics.install(app.server)
+"""
+
+from flask import Response, request
+
+from .cache import query_cache
+from .config import METRICS_PATH
+from .db import engine_manager
+from .instrumentation import pop_last_callback, sql_metrics
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Dash posts every callback to this route, under any url_base_pathname
+_CALLBACK_ROUTE = "/_dash-update-component"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        f'{key}="{_escape(value if value is not None else "none")}"'
+        for key, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Family:
+    """Lines of one metric family, with its HELP and TYPE header."""
+
+    def __init__(self, name: str, kind: str, help_text: str):
+        self.name = name
+        self.lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+    def sample(self, value, suffix: str = "", **labels) -> None:
+        self.lines.append(f"{self.name}{suffix}{_labels(**labels)} {_number(value)}")
+
+    def histogram(self, histogram, scale: float = 1.0, **labels) -> None:
+        """Add a Histogram's cumulative buckets, sum and count, bounds times scale."""
+        cumulative = 0
+        bounds = histogram.bounds + (float("inf"),)
+        for bound, count in zip(bounds, histogram.counts):
+            cumulative += count
+            le = _number(bound * scale if scale != 1.0 else bound)
+            self.sample(cumulative, "_bucket", **labels, le=le)
+        self.sample(histogram.total * scale, "_sum", **labels)
+        self.sample(histogram.count, "_count", **labels)
+
+
+def render() -> str:
+    """Every metric in the Prometheus text format."""
+    recorded = sql_metrics.histograms()
+    families = []
+
+    duration = _Family(
+        "dash_callback_duration_seconds", "histogram", "Dash callback run time."
+    )
+    payload = _Family(
+        "dash_callback_response_bytes", "histogram", "Serialized callback response size."
+    )
+    calls = _Family("dash_callback_calls_total", "counter", "Dash callback calls.")
+    statements = _Family(
+        "dash_callback_sql_statements_total", "counter", "SQL statements run by callbacks."
+    )
+    for name, (count, statement_count, latency, sizes) in sorted(recorded["callbacks"].items()):
+        calls.sample(count, callback=name)
+        statements.sample(statement_count, callback=name)
+        if latency.count:
+            duration.histogram(latency, scale=0.001, callback=name)
+        if sizes.count:
+            payload.histogram(sizes, callback=name)
+    families += [duration, payload, calls, statements]
+
+    sql_duration = _Family(
+        "sql_statement_duration_seconds", "histogram", "SQL statement execution time."
+    )
+    sql_rows = _Family("sql_statement_rows_total", "counter", "Rows returned by SQL statements.")
+    for (callback, query), (latency, rows) in sorted(
+        recorded["statements"].items(), key=lambda item: tuple(map(str, item[0]))
+    ):
+        sql_duration.histogram(latency, scale=0.001, callback=callback, query=query)
+        sql_rows.sample(rows, callback=callback, query=query)
+    families += [sql_duration, sql_rows]
+
+    pool = engine_manager.pool_stats()
+    connections = _Family("db_pool_connections", "gauge", "Pooled database connections.")
+    for state in ("checked_out", "checked_in", "overflow"):
+        connections.sample(pool[state], state=state)
+    capacity = _Family("db_pool_capacity", "gauge", "Pool size plus max overflow.")
+    capacity.sample(pool["capacity"])
+    utilisation = _Family(
+        "db_pool_utilisation", "gauge", "Checked-out connections over capacity."
+    )
+    utilisation.sample(float(pool["utilisation"]))
+    events = _Family("db_pool_events_total", "counter", "Pool connection events.")
+    for event, counter in (
+        ("connect", "connects"),
+        ("checkout", "checkouts"),
+        ("invalidation", "invalidations"),
+    ):
+        events.sample(pool[counter], event=event)
+    families += [connections, capacity, utilisation, events]
+
+    cache = query_cache.stats()
+    lookups = _Family(
+        "query_cache_lookups_total", "counter", "Query cache lookups by outcome."
+    )
+    for function, counts in sorted(cache["functions"].items()):
+        for outcome, count in counts.items():
+            lookups.sample(count, function=function, outcome=outcome)
+    hit_ratio = _Family("query_cache_hit_ratio", "gauge", "Query cache hits over lookups.")
+    hit_ratio.sample(float(cache["hit_ratio"]))
+    entries = _Family("query_cache_entries", "gauge", "Cached query results.")
+    entries.sample(cache["size"])
+    families += [lookups, hit_ratio, entries]
+
+    return "\n".join(line for family in families for line in family.lines) + "\n"
+
+
+def _metrics_view():
+    return Response(render(), content_type=CONTENT_TYPE)
+
+
+def _record_payload(response):
+    if request.path.endswith(_CALLBACK_ROUTE):
+        name = pop_last_callback()
+        size = response.calculate_content_length()
+        if size is not None:
+            sql_metrics.observe_payload(name or "none", size)
+    return response
+
+
+def install(server, path: str = METRICS_PATH) -> None:
+    """Serve the metrics at path on a Flask server and record callback response sizes."""
+    server.add_url_rule(path, "metrics", _metrics_view)
+    server.after_request(_record_payload)
@@ -0,0 +1,510 @@
+"""Schema migrations for the tests_cmj / tests_cmjr tables.
+
+Each migration is a function that receives an open connection inside a
+transaction. Applied migration IDs are recorded in schema_migrations, so
+running this module again only applies what is new:
+    DATABASE_URL=postgresql://... python -m models.migrations
+"""
+
+from sqlalchemy import text
+
+from .config import (
+    ALL_SEGMENT,
+    DEFAULT_TIMEZONE,
+    ROLLUP_TABLES,
+    SNAPSHOT_COLUMNS,
+    TEAM_TIMEZONES,
+)
+from .db import get_engine
+
+TEST_TABLES = ("tests_cmj", "tests_cmjr")
+
+
+def team_timezone_sql() -> str:
+    """SQL expression choosing a row's local timezone from its athlete_teams.
+
+    Generated columns must be immutable, so the TEAM_TIMEZONES mapping is
+    baked into the expression. Changing it means dropping test_date and
+    re-running the migration.
+    """
+    whens = " ".join(
+        f"WHEN athlete_teams::jsonb ? '{team_id}' THEN '{tz}'"
+        for team_id, tz in TEAM_TIMEZONES.items()
+    )
+    if not whens:
+        return f"'{DEFAULT_TIMEZONE}'"
+    return f"CASE {whens} ELSE '{DEFAULT_TIMEZONE}' END"
+
+
+def _create_statement_triggers(conn, table: str, prefix: str, function: str) -> None:
+    """Attach function as AFTER INSERT/UPDATE/DELETE statement triggers on table.
+
+    Transition tables are exposed as new_rows / old_rows.
+    """
+    for event, transitions in (
+        ("INSERT", "NEW TABLE AS new_rows"),
+        ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+        ("DELETE", "OLD TABLE AS old_rows"),
+    ):
+        conn.exec_driver_sql(
+            f"CREATE OR REPLACE TRIGGER {prefix}_{event.lower()} "
+            f"AFTER {event} ON {table} REFERENCING {transitions} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION {function}()"
+        )
+
+
+# ================ Migrations ==========================================
+def add_test_date_columns(conn) -> None:
+    """Add an indexable test_date column and (athlete_name, test_date) indexes.
+
+    test_date replaces the to_timestamp(timestamp)::date expression, which
+    can't use an index. The indexes INCLUDE every snapshot metric, so the
+    per-athlete queries in queries.py can be answered by index-only scans.
+    """
+    tz = team_timezone_sql()
+    for table in TEST_TABLES:
+        conn.execute(
+            text(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS test_date date "
+                f"GENERATED ALWAYS AS ((to_timestamp(timestamp) AT TIME ZONE {tz})::date) STORED"
+            )
+        )
+        include_cols = ", ".join(SNAPSHOT_COLUMNS[table])
+        conn.execute(
+            text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_athlete_test_date "
+                f"ON {table} (athlete_name, test_date) INCLUDE ({include_cols})"
+            )
+        )
+        conn.execute(text(f"ANALYZE {table}"))
+
+
+def _rollup_refresh_sql(table: str) -> str:
+    """PL/pgSQL function recomputing the rollup rows for (athlete, date) pairs.
+
+    Only the touched groups are re-aggregated from the raw table (an
+    index-only scan over a handful of trials each). The last-5 means are then
+    re-windowed over the rollup rows of the touched athletes, from the
+    earliest touched date onward.
+    """
+    rollup = ROLLUP_TABLES[table]
+    cols = SNAPSHOT_COLUMNS[table]
+    sum_names = ", ".join(f"{col}_sum, {col}_n" for col in cols)
+    partials = ", ".join(f"SUM(s.{col}), COUNT(s.{col})" for col in cols)
+    upserts = ", ".join(
+        f"{col}_sum = EXCLUDED.{col}_sum, {col}_n = EXCLUDED.{col}_n" for col in cols
+    )
+    windowed = ", ".join(
+        f"SUM({col}_sum) OVER last5 / NULLIF(SUM({col}_n) OVER last5, 0) AS {col}_last5"
+        for col in cols
+    )
+    last5_sets = ", ".join(f"{col}_last5 = w.{col}_last5" for col in cols)
+    touched = (
+        "SELECT DISTINCT t.athlete_name, t.test_date "
+        "FROM unnest(names, dates) AS t(athlete_name, test_date) "
+        "WHERE t.athlete_name IS NOT NULL AND t.test_date IS NOT NULL"
+    )
+    return f"""
+        CREATE OR REPLACE FUNCTION {rollup}_refresh(names text[], dates date[])
+        RETURNS void LANGUAGE plpgsql AS $$
+        BEGIN
+            DELETE FROM {rollup} r
+            USING ({touched}) t
+            WHERE r.athlete_name = t.athlete_name AND r.test_date = t.test_date
+            AND NOT EXISTS (
+                SELECT 1 FROM {table} s
+                WHERE s.athlete_name = t.athlete_name AND s.test_date = t.test_date
+            );
+
+            INSERT INTO {rollup} (athlete_name, test_date, trials, {sum_names})
+            SELECT s.athlete_name, s.test_date, COUNT(*), {partials}
+            FROM {table} s
+            JOIN ({touched}) t
+            ON s.athlete_name = t.athlete_name AND s.test_date = t.test_date
+            GROUP BY s.athlete_name, s.test_date
+            ON CONFLICT (athlete_name, test_date) DO UPDATE
+            SET trials = EXCLUDED.trials, {upserts};
+
+            UPDATE {rollup} r SET {last5_sets}
+            FROM (
+                SELECT athlete_name, test_date, {windowed}
+                FROM {rollup}
+                WHERE athlete_name = ANY(names)
+                WINDOW last5 AS (
+                    PARTITION BY athlete_name ORDER BY test_date
+                    ROWS BETWEEN 4 PRECEDING AND CURRENT ROW
+                )
+            ) w, (
+                SELECT t.athlete_name, MIN(t.test_date) AS first_date
+                FROM ({touched}) t GROUP BY t.athlete_name
+            ) f
+            WHERE r.athlete_name = w.athlete_name AND r.test_date = w.test_date
+            AND r.athlete_name = f.athlete_name AND r.test_date >= f.first_date;
+        END;
+        $$
+    """
+
+
+def _rollup_trigger_sql(table: str) -> str:
+    """PL/pgSQL trigger function passing changed (athlete, date) pairs to the refresh."""
+    rollup = ROLLUP_TABLES[table]
+    return f"""
+        CREATE OR REPLACE FUNCTION {rollup}_sync()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        DECLARE
+            names text[];
+            dates date[];
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                SELECT array_agg(athlete_name), array_agg(test_date)
+                INTO names, dates FROM new_rows;
+            ELSIF TG_OP = 'DELETE' THEN
+                SELECT array_agg(athlete_name), array_agg(test_date)
+                INTO names, dates FROM old_rows;
+            ELSE
+                SELECT array_agg(athlete_name), array_agg(test_date) INTO names, dates
+                FROM (
+                    SELECT athlete_name, test_date FROM old_rows
+                    UNION SELECT athlete_name, test_date FROM new_rows
+                ) changed;
+            END IF;
+            IF names IS NOT NULL THEN
+                PERFORM {rollup}_refresh(names, dates);
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+    """
+
+
+def add_athlete_date_rollups(conn) -> None:
+    """Add per-athlete-per-date rollup tables kept current by triggers.
+
+    One rollup per test table (the two tests have different metric columns),
+    keyed by (athlete_name, test_date). Each metric keeps its SUM and COUNT
+    so the stored average equals AVG over the raw trials, plus a running
+    trial-weighted mean over the 5 most recent dates up to that one.
+    Statement-level triggers refresh only the groups an INSERT, UPDATE or
+    DELETE touched.
+    """
+    for table in TEST_TABLES:
+        rollup = ROLLUP_TABLES[table]
+        cols = SNAPSHOT_COLUMNS[table]
+        metric_defs = ", ".join(
+            f"{col}_sum double precision, "
+            f"{col}_n integer NOT NULL DEFAULT 0, "
+            f"{col} double precision GENERATED ALWAYS AS ({col}_sum / NULLIF({col}_n, 0)) STORED, "
+            f"{col}_last5 double precision"
+            for col in cols
+        )
+        conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {rollup} ("
+                "  athlete_name text NOT NULL, "
+                "  test_date date NOT NULL, "
+                "  trials integer NOT NULL, "
+                f"  {metric_defs}, "
+                "  PRIMARY KEY (athlete_name, test_date)"
+                ")"
+            )
+        )
+        conn.exec_driver_sql(_rollup_refresh_sql(table))
+        conn.exec_driver_sql(_rollup_trigger_sql(table))
+        _create_statement_triggers(conn, table, rollup, f"{rollup}_sync")
+        # Backfill every existing (athlete, date) group through the same path
+        conn.exec_driver_sql(
+            f"SELECT {rollup}_refresh(array_agg(athlete_name), array_agg(test_date)) "
+            f"FROM (SELECT DISTINCT athlete_name, test_date FROM {table}) groups"
+        )
+        conn.exec_driver_sql(f"ANALYZE {rollup}")
+
+
+def _moments_merge_sql(table: str, source: str, sign: int) -> str:
+    """Fold the rows of source into population_moments, added (+1) or removed (-1).
+
+    Each row counts towards the ALL_SEGMENT segment and one segment per team
+    ID in its athlete_teams. The batch's count/mean/M2 per segment and metric
+    are merged into the stored row with Chan's formula (see stats.merge_moments).
+    """
+    unpivot = ", ".join(
+        f"('{col}', r.{col}::double precision)" for col in SNAPSHOT_COLUMNS[table]
+    )
+    return f"""
+        INSERT INTO population_moments AS a (test_type, segment, metric, n, mean, m2)
+        SELECT '{table}', r.segment, v.metric,
+            {sign} * COUNT(v.value), AVG(v.value), {sign} * VAR_POP(v.value) * COUNT(v.value)
+        FROM (
+            SELECT '{ALL_SEGMENT}' AS segment, s.* FROM {source} s
+            UNION ALL
+            SELECT team.id AS segment, s.* FROM {source} s
+            CROSS JOIN LATERAL json_array_elements_text(
+                CASE WHEN json_typeof(s.athlete_teams) = 'array'
+                THEN s.athlete_teams ELSE '[]'::json END
+            ) AS team(id)
+        ) r
+        CROSS JOIN LATERAL (VALUES {unpivot}) AS v(metric, value)
+        WHERE v.value IS NOT NULL
+        GROUP BY r.segment, v.metric
+        ON CONFLICT (test_type, segment, metric) DO UPDATE SET
+            n = a.n + EXCLUDED.n,
+            mean = CASE WHEN a.n + EXCLUDED.n = 0 THEN 0
+                ELSE a.mean + (EXCLUDED.mean - a.mean) * EXCLUDED.n / (a.n + EXCLUDED.n) END,
+            m2 = CASE WHEN a.n + EXCLUDED.n = 0 THEN 0
+                ELSE GREATEST(a.m2 + EXCLUDED.m2
+                    + (EXCLUDED.mean - a.mean) ^ 2 * a.n * EXCLUDED.n / (a.n + EXCLUDED.n), 0) END
+    """
+
+
+def add_population_moments(conn) -> None:
+    """Add incrementally maintained count/mean/M2 accumulators per metric.
+
+    Replaces the AVG/STDDEV_POP scans of get_population_stats with a read of
+    one row per metric. Statement-level triggers merge every inserted batch
+    in (and remove deleted or updated rows), per ALL_SEGMENT and per team.
+    """
+    conn.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS population_moments ("
+            "  test_type text NOT NULL, "
+            "  segment text NOT NULL, "
+            "  metric text NOT NULL, "
+            "  n bigint NOT NULL, "
+            "  mean double precision NOT NULL, "
+            "  m2 double precision NOT NULL, "
+            "  PRIMARY KEY (test_type, segment, metric)"
+            ")"
+        )
+    )
+    for table in TEST_TABLES:
+        conn.exec_driver_sql(
+            f"""
+            CREATE OR REPLACE FUNCTION {table}_population_sync()
+            RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    {_moments_merge_sql(table, "old_rows", -1)};
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    {_moments_merge_sql(table, "new_rows", 1)};
+                END IF;
+                RETURN NULL;
+            END;
+            $$
+            """
+        )
+        _create_statement_triggers(
+            conn, table, f"{table}_population", f"{table}_population_sync"
+        )
+        # Backfill from the existing rows
+        conn.execute(
+            text("DELETE FROM population_moments WHERE test_type = :test_type"),
+            {"test_type": table},
+        )
+        conn.exec_driver_sql(_moments_merge_sql(table, table, 1))
+
+
+def _watermark_bump_sql(table: str, source: str, sign: int, rewrites: bool) -> str:
+    """Bump the per-athlete and whole-table watermarks for the rows in source.
+
+    With rewrites, removed rows (sign -1: updates and deletes) also count
+    towards the rewrites column added by 005_columnar_sync.
+    """
+    extra_col = ", rewrites" if rewrites else ""
+    extra_val = f", {1 if sign < 0 else 0}" if rewrites else ""
+    extra_set = ", rewrites = w.rewrites + EXCLUDED.rewrites" if rewrites else ""
+    return f"""
+        INSERT INTO data_watermarks AS w (test_type, athlete_name, row_count, max_timestamp, version{extra_col})
+        SELECT '{table}', athlete_name, {sign} * COUNT(*), MAX(timestamp), 1{extra_val}
+        FROM {source} WHERE athlete_name IS NOT NULL GROUP BY athlete_name
+        UNION ALL
+        SELECT '{table}', '', {sign} * COUNT(*), MAX(timestamp), 1{extra_val}
+        FROM {source} HAVING COUNT(*) > 0
+        ON CONFLICT (test_type, athlete_name) DO UPDATE SET
+            row_count = w.row_count + EXCLUDED.row_count,
+            max_timestamp = GREATEST(w.max_timestamp, EXCLUDED.max_timestamp),
+            version = w.version + 1{extra_set}
+    """
+
+
+def _create_watermark_sync(conn, table: str, rewrites: bool) -> None:
+    """(Re)create {table}_watermark_sync and its statement triggers."""
+    conn.exec_driver_sql(
+        f"""
+        CREATE OR REPLACE FUNCTION {table}_watermark_sync()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                {_watermark_bump_sql(table, "old_rows", -1, rewrites)};
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                {_watermark_bump_sql(table, "new_rows", 1, rewrites)};
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+        """
+    )
+    _create_statement_triggers(conn, table, f"{table}_watermark", f"{table}_watermark_sync")
+
+
+def add_data_watermarks(conn) -> None:
+    """Add per-athlete and whole-table watermarks for query cache invalidation.
+
+    Every statement that changes a test table bumps the version of each
+    athlete it touched and of the whole table (athlete_name ''), alongside
+    the row count and max timestamp. Reading a watermark is one primary-key
+    lookup, so models/cache.py can validate every cached answer against it.
+    """
+    conn.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS data_watermarks ("
+            "  test_type text NOT NULL, "
+            "  athlete_name text NOT NULL, "
+            "  row_count bigint NOT NULL, "
+            "  max_timestamp double precision, "
+            "  version bigint NOT NULL, "
+            "  PRIMARY KEY (test_type, athlete_name)"
+            ")"
+        )
+    )
+    for table in TEST_TABLES:
+        _create_watermark_sync(conn, table, rewrites=False)
+        conn.exec_driver_sql(_watermark_bump_sql(table, table, 1, rewrites=False))
+
+
+def add_columnar_sync(conn) -> None:
+    """Support incremental catch-up for copies of the test tables (columnar.py).
+
+    A copy may append the rows newer than the last timestamp it holds, which
+    is only correct while the table sees nothing but inserts. The rewrites
+    column counts update and delete statements so the copy knows when it must
+    reload instead; the timestamp index serves the newer-rows fetch.
+    """
+    conn.execute(
+        text(
+            "ALTER TABLE data_watermarks "
+            "ADD COLUMN IF NOT EXISTS rewrites bigint NOT NULL DEFAULT 0"
+        )
+    )
+    for table in TEST_TABLES:
+        _create_watermark_sync(conn, table, rewrites=True)
+        conn.execute(
+            text(f"CREATE INDEX IF NOT EXISTS ix_{table}_timestamp ON {table} (timestamp)")
+        )
+
+
+def _team_members_merge_sql(table: str, source: str, sign: int) -> str:
+    """Count the rows of source into athlete_team_members, added (+1) or removed (-1).
+
+    One count per (team ID in athlete_teams, athlete); rows without an
+    athlete or a JSON array of teams are not members of anything.
+    """
+    return f"""
+        INSERT INTO athlete_team_members AS m (test_type, team_id, athlete_name, trials)
+        SELECT '{table}', team.id, s.athlete_name, {sign} * COUNT(*)
+        FROM {source} s
+        CROSS JOIN LATERAL json_array_elements_text(
+            CASE WHEN json_typeof(s.athlete_teams) = 'array'
+            THEN s.athlete_teams ELSE '[]'::json END
+        ) AS team(id)
+        WHERE s.athlete_name IS NOT NULL
+        GROUP BY team.id, s.athlete_name
+        ON CONFLICT (test_type, team_id, athlete_name) DO UPDATE SET
+            trials = m.trials + EXCLUDED.trials
+    """
+
+
+def add_team_members(conn) -> None:
+    """Add a normalised (team, athlete) membership table kept current by triggers.
+
+    Roster queries read it by primary key (test_type, team_id, athlete_name)
+    instead of expanding every row's athlete_teams JSON. trials counts the
+    rows behind each membership, so a membership disappears with its last
+    trial.
+    """
+    conn.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS athlete_team_members ("
+            "  test_type text NOT NULL, "
+            "  team_id text NOT NULL, "
+            "  athlete_name text NOT NULL, "
+            "  trials bigint NOT NULL, "
+            "  PRIMARY KEY (test_type, team_id, athlete_name)"
+            ")"
+        )
+    )
+    for table in TEST_TABLES:
+        conn.exec_driver_sql(
+            f"""
+            CREATE OR REPLACE FUNCTION {table}_team_members_sync()
+            RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    {_team_members_merge_sql(table, "old_rows", -1)};
+                    DELETE FROM athlete_team_members
+                    WHERE test_type = '{table}' AND trials <= 0;
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    {_team_members_merge_sql(table, "new_rows", 1)};
+                END IF;
+                RETURN NULL;
+            END;
+            $$
+            """
+        )
+        _create_statement_triggers(
+            conn, table, f"{table}_team_members", f"{table}_team_members_sync"
+        )
+        # Backfill from the existing rows
+        conn.execute(
+            text("DELETE FROM athlete_team_members WHERE test_type = :test_type"),
+            {"test_type": table},
+        )
+        conn.exec_driver_sql(_team_members_merge_sql(table, table, 1))
+
+
+# (id, function) in the order they must be applied
+MIGRATIONS = [
+    ("001_test_date_columns", add_test_date_columns),
+    ("002_athlete_date_rollups", add_athlete_date_rollups),
+    ("003_population_moments", add_population_moments),
+    ("004_data_watermarks", add_data_watermarks),
+    ("005_columnar_sync", add_columnar_sync),
+    ("006_team_members", add_team_members),
+]
+
+
+def upgrade(bind=None) -> list[str]:
+    """Apply every migration not yet recorded in schema_migrations, in order.
+
+    Returns the IDs applied by this run.
+    """
+    applied = []
+    with (bind or get_engine()).begin() as conn:
+        # Backfills scan whole tables; lift the per-statement request timeout
+        if conn.dialect.name == "postgresql":
+            conn.exec_driver_sql("SET LOCAL statement_timeout = 0")
+        conn.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "  id text PRIMARY KEY, "
+                "  applied_at timestamptz NOT NULL DEFAULT now()"
+                ")"
+            )
+        )
+        done = {row[0] for row in conn.execute(text("SELECT id FROM schema_migrations"))}
+        for migration_id, migrate in MIGRATIONS:
+            if migration_id in done:
+                continue
+            migrate(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (id) VALUES (:id)"),
+                {"id": migration_id},
+            )
+            applied.append(migration_id)
+    return applied
+
+
+if __name__ == "__main__":
+    for migration_id in upgrade():
+        print(f"applied {migration_id}")
@@ -0,0 +1,154 @@
+"""Empirical percentile ranks of metric values within a population segment.
+
+The z-score gauges assume every metric is normally distributed, which
+skewed ones (contact times, braking impulses) are not. A PercentileIndex
+keeps, per (test_type, segment, metric), either every value sorted (up to
+PERCENTILE_EXACT_LIMIT values) or a sketch of PERCENTILE_SKETCH_POINTS
+evenly spaced quantiles, from queries.get_value_distributions (routed, so
+every query backend serves them; on Postgres percentile_cont computes the
+sketch, so large tables are never shipped whole). A rank is then a binary
+search, O(log n), and score() ranks any number of values per metric in one
+vectorised call.
+
+Distributions load on first use, one query per (test_type, segment), and are
+reloaded when the table's watermark moves, checked at most every
+PERCENTILE_REFRESH_SECONDS, so scoring a gauge costs no query of its own.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from .cache import get_watermark
+from .config import (
+    ALL_SEGMENT,
+    PERCENTILE_EXACT_LIMIT,
+    PERCENTILE_REFRESH_SECONDS,
+    PERCENTILE_SKETCH_POINTS,
+    SNAPSHOT_COLUMNS,
+)
+from .queries import get_value_distributions
+
+
+class EmpiricalCDF:
+    """Percentile ranks against a distribution of n values.
+
+    points holds every value sorted (fractions None), or the quantiles at
+    fractions (a sketch). Tied values rank at the middle of their run.
+    """
+
+    def __init__(self, points: np.ndarray, n: int, fractions: np.ndarray | None = None):
+        self.n = n
+        self.exact = fractions is None
+        if self.exact:
+            self.points = points
+        else:
+            # Collapse repeated quantiles to one point at their mean fraction
+            self.points, runs = np.unique(points, return_inverse=True)
+            self.fractions = np.bincount(runs, weights=fractions) / np.bincount(runs)
+
+    def rank(self, values) -> np.ndarray:
+        """Percentile ranks (0-100) of values; NaN for NaN values or no population."""
+        values = np.asarray(values, dtype=float)
+        if self.n == 0:
+            return np.full(values.shape, np.nan)
+        if self.exact:
+            below = np.searchsorted(self.points, values, "left")
+            through = np.searchsorted(self.points, values, "right")
+            ranks = 50.0 * (below + through) / self.n
+        else:
+            ranks = 100.0 * np.interp(values, self.points, self.fractions)
+        return np.where(np.isnan(values), np.nan, ranks)
+
+
+EMPTY_CDF = EmpiricalCDF(np.zeros(0), 0)
+
+
+class PercentileIndex:
+    """Distributions of every SNAPSHOT_COLUMNS metric, per test type and segment."""
+
+    def __init__(
+        self,
+        refresh_seconds: float = PERCENTILE_REFRESH_SECONDS,
+        exact_limit: int = PERCENTILE_EXACT_LIMIT,
+        sketch_points: int = PERCENTILE_SKETCH_POINTS,
+    ):
+        self.refresh_seconds = refresh_seconds
+        self.exact_limit = exact_limit
+        self.fractions = np.linspace(0.0, 1.0, sketch_points)
+        # (test_type, segment) -> (watermark, {metric: EmpiricalCDF})
+        self._entries: dict[tuple, tuple] = {}
+        self._next_check: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def distributions(self, test_type: str, segment: str = ALL_SEGMENT) -> dict:
+        """{metric: EmpiricalCDF} for test_type's SNAPSHOT_COLUMNS over segment."""
+        if test_type not in SNAPSHOT_COLUMNS:
+            raise ValueError(f"Unknown test type: {test_type!r}")
+        key = (test_type, segment)
+        if key not in self._entries:
+            with self._lock:
+                if key not in self._entries:
+                    self._refresh(key)
+        elif time.monotonic() >= self._next_check[key] and self._lock.acquire(blocking=False):
+            # One thread reloads; the others keep ranking against the current copy
+            try:
+                self._refresh(key)
+            finally:
+                self._lock.release()
+        return self._entries[key][1]
+
+    def _refresh(self, key: tuple) -> None:
+        test_type, segment = key
+        self._next_check[key] = time.monotonic() + self.refresh_seconds
+        # Read before loading: a test landing in between just reloads next time
+        watermark = get_watermark(test_type)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != watermark:
+            self._entries[key] = (watermark, self._load(test_type, segment))
+
+    def _load(self, test_type: str, segment: str) -> dict:
+        distributions = get_value_distributions(
+            test_type, segment, self.exact_limit, self.fractions.tolist()
+        )
+        cdfs = {}
+        for col, (n, points) in distributions.items():
+            points = np.array(points, dtype=float)
+            if n == 0 or not len(points):
+                cdfs[col] = EMPTY_CDF
+            elif n <= self.exact_limit:
+                cdfs[col] = EmpiricalCDF(points, len(points))
+            else:
+                cdfs[col] = EmpiricalCDF(points, n, self.fractions)
+        return cdfs
+
+    def score(self, test_type: str, values: dict, segment: str = ALL_SEGMENT) -> dict:
+        """Percentile ranks of many values per metric.
+
+        values maps metrics to sequences of raw values (None allowed).
+        Returns {metric: [rank 0-100 or None, ...]} in the same order.
+
+        Example:
+            ranks = percentile_index.score(
+                "tests_cmjr", {"cmj_jump_height_m": [current, baseline]}
+            )
+        """
+        cdfs = self.distributions(test_type, segment)
+        unknown = [col for col in values if col not in cdfs]
+        if unknown:
+            raise ValueError(f"Unknown {test_type} metrics: {', '.join(unknown)}")
+        ranks = {}
+        for col, raw in values.items():
+            found = cdfs[col].rank([np.nan if value is None else value for value in raw])
+            ranks[col] = [None if rank != rank else rank for rank in found.tolist()]
+        return ranks
+
+    def clear(self) -> None:
+        """Drop every loaded distribution; the next score loads them again."""
+        with self._lock:
+            self._entries.clear()
+            self._next_check.clear()
+
+
+percentile_index = PercentileIndex()
@@ -0,0 +1,416 @@
+"""Query functions as SQLAlchemy Core over the raw test tables, on any dialect.
+
+PortableQueries answers every routed query function from tests_cmj and
+tests_cmjr alone. The Postgres-specific pieces (team-local date bucketing,
+JSON team membership, population variance) are compiled per dialect by
+dialects.py, and none of the rollups, triggers or accumulators of
+migrations.py are needed, so the dashboards run on a SQLite or DuckDB file
+(QUERY_BACKEND=portable, the default for non-Postgres DATABASE_URLs).
+copy_trials() fills such a file from Postgres.
+
+Every query scans the athlete's trials (or the whole table), so on Postgres
+the rollup path in queries.py stays faster; answers match it up to float
+rounding. The whole-table population aggregates are the costly scan, so
+each PortableQueries keeps them until the table's watermark() moves.
+"""
+
+import threading
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+from sqlalchemy import (
+    JSON,
+    Column,
+    Double,
+    Index,
+    MetaData,
+    Table,
+    Text,
+    bindparam,
+    delete,
+    func,
+    insert,
+    select,
+)
+from sqlalchemy.sql import Select
+
+from .backends import use_backend
+from .config import ALL_SEGMENT, SNAPSHOT_COLUMNS
+from .db import get_engine
+from .dialects import has_team, install, trial_date, var_pop
+from .stats import EMPTY_MOMENTS, Moments, moments_to_stats
+
+LAST5_DATES = 5
+
+metadata = MetaData()
+
+# The columns the query functions read; the live tables may have more
+TRIAL_TABLES = {
+    test_type: Table(
+        test_type,
+        metadata,
+        Column("athlete_name", Text),
+        # epoch seconds
+        Column("timestamp", Double),
+        # JSON array of team IDs
+        Column("athlete_teams", JSON),
+        *(Column(col, Double) for col in cols),
+        Index(f"ix_{test_type}_athlete_name", "athlete_name"),
+    )
+    for test_type, cols in SNAPSHOT_COLUMNS.items()
+}
+
+
+def _athlete_trials(table: Table, cols: tuple[str, ...]):
+    """The :name athlete's dated trials: trial_day plus the metric columns."""
+    return (
+        select(
+            trial_date(table.c.timestamp, table.c.athlete_teams).label("trial_day"),
+            *(table.c[col] for col in cols),
+        )
+        .where(table.c.athlete_name == bindparam("name"), table.c.timestamp.is_not(None))
+        .subquery("trials")
+    )
+
+
+def _means(source, cols: tuple[str, ...]) -> list:
+    return [func.avg(source.c[col]).label(col) for col in cols]
+
+
+def _last5(table: Table, cols: tuple[str, ...]) -> Select:
+    # Per-date sums and counts of the latest dates, combined trial-weighted
+    trials = _athlete_trials(table, cols)
+    days = (
+        select(
+            *(func.sum(trials.c[col]).label(f"{col}_sum") for col in cols),
+            *(func.count(trials.c[col]).label(f"{col}_n") for col in cols),
+        )
+        .group_by(trials.c.trial_day)
+        .order_by(trials.c.trial_day.desc())
+        .limit(LAST5_DATES)
+        .subquery("days")
+    )
+    combined = (
+        func.sum(days.c[f"{col}_sum"]) / func.nullif(func.sum(days.c[f"{col}_n"]), 0)
+        for col in cols
+    )
+    return select(*(mean.label(col) for mean, col in zip(combined, cols))).having(
+        func.count() > 0
+    )
+
+
+def _population(table: Table, cols: tuple[str, ...], by_team: bool) -> Select:
+    query = select(
+        *(
+            part
+            for col in cols
+            for part in (
+                func.count(table.c[col]).label(f"{col}_n"),
+                func.avg(table.c[col]).label(f"{col}_mean"),
+                var_pop(table.c[col]).label(f"{col}_var"),
+            )
+        )
+    )
+    if by_team:
+        query = query.where(has_team(table.c.athlete_teams, bindparam("segment")))
+    return query
+
+
+def _dated(table: Table) -> list:
+    return [table.c.athlete_name.is_not(None), table.c.timestamp.is_not(None)]
+
+
+def _dates(table: Table, cols: tuple[str, ...]) -> Select:
+    trials = _athlete_trials(table, ())
+    return select(trials.c.trial_day).distinct().order_by(trials.c.trial_day.desc())
+
+
+def _on_date(table: Table, cols: tuple[str, ...]) -> Select:
+    trials = _athlete_trials(table, cols)
+    on_date = trials.c.trial_day == bindparam("test_date", type_=trial_date.type)
+    return select(*_means(trials, cols)).where(on_date).group_by(trials.c.trial_day)
+
+
+def _baseline(table: Table, cols: tuple[str, ...]) -> Select:
+    trials = _athlete_trials(table, cols)
+    return (
+        select(*_means(trials, cols))
+        .group_by(trials.c.trial_day)
+        .order_by(trials.c.trial_day)
+        .limit(1)
+    )
+
+
+def _trend(table: Table, cols: tuple[str, ...]) -> Select:
+    trials = _athlete_trials(table, cols)
+    return (
+        select(trials.c.trial_day.label("test_date"), *_means(trials, cols))
+        .group_by(trials.c.trial_day)
+        .order_by(trials.c.trial_day)
+    )
+
+
+# shape -> builder(trial table, metric columns) returning a Core select
+SHAPES = {
+    # every athlete with at least one dated trial
+    "names": lambda t, cols: (
+        select(t.c.athlete_name).where(*_dated(t)).distinct().order_by(t.c.athlete_name)
+    ),
+    # every athlete with a trial on the :team_id team
+    "team_names": lambda t, cols: (
+        select(t.c.athlete_name)
+        .where(
+            t.c.athlete_name.is_not(None),
+            has_team(t.c.athlete_teams, bindparam("team_id")),
+        )
+        .distinct()
+        .order_by(t.c.athlete_name)
+    ),
+    # the athlete's test dates, most recent first
+    "dates": _dates,
+    # per-date means on :test_date
+    "date": _on_date,
+    # per-date means on the earliest date
+    "baseline": _baseline,
+    # trial-weighted means over the latest LAST5_DATES dates
+    "last5": _last5,
+    # trial-weighted means over all of the athlete's dates
+    "alltime": lambda t, cols: select(*_means(_athlete_trials(t, cols), cols)),
+    # trial-weighted means over the dated trials of every athlete
+    "team": lambda t, cols: select(*_means(t, cols)).where(*_dated(t)),
+    # per-date means for every date, oldest first
+    "trend": _trend,
+    # count, mean and variance of every trial
+    "population": lambda t, cols: _population(t, cols, by_team=False),
+    # the same over the trials of the :segment team
+    "team_population": lambda t, cols: _population(t, cols, by_team=True),
+    # the metric values of every trial
+    "values": lambda t, cols: select(*(t.c[col] for col in cols)),
+    # the same for the trials of the :segment team
+    "team_values": lambda t, cols: (
+        select(*(t.c[col] for col in cols)).where(
+            has_team(t.c.athlete_teams, bindparam("segment"))
+        )
+    ),
+}
+
+
+def statement(test_type: str, shape: str, metrics=()) -> Select:
+    """Get the Core statement for a shape over test_type's trial table.
+
+    test_type can be tests_cmj or tests_cmjr; metrics is any sequence of
+    that table's SNAPSHOT_COLUMNS, selected in the given order.
+    Raises ValueError for an unknown test type, shape or metric.
+    """
+    return _build(test_type, shape, tuple(metrics))
+
+
+@lru_cache(maxsize=None)
+def _build(test_type: str, shape: str, metrics: tuple[str, ...]) -> Select:
+    if test_type not in TRIAL_TABLES:
+        raise ValueError(f"Unknown test type: {test_type!r}")
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown query shape: {shape!r}")
+    unknown = [col for col in metrics if col not in SNAPSHOT_COLUMNS[test_type]]
+    if unknown:
+        raise ValueError(f"Unknown {test_type} metrics: {', '.join(unknown)}")
+    return SHAPES[shape](TRIAL_TABLES[test_type], metrics)
+
+
+class PortableQueries:
+    """Query backend running statement() shapes on any supported engine.
+
+    Methods share names and arguments with the query functions in
+    queries.py, so use_backend() can route those calls here. engine
+    defaults to the shared engine of db.py.
+    """
+
+    def __init__(self, engine=None):
+        if engine is not None:
+            install(engine)
+        self._engine = engine
+        # (test_type, segment) -> (watermark, population row over SNAPSHOT_COLUMNS)
+        self._populations: dict[tuple, tuple] = {}
+        self._populations_lock = threading.Lock()
+
+    def _rows(self, conn, test_type: str, shape: str, metrics=(), **params) -> list[dict]:
+        result = conn.execute(statement(test_type, shape, metrics), params)
+        return [dict(row) for row in result.mappings()]
+
+    def _row(self, test_type: str, shape: str, metrics=(), **params) -> dict:
+        with (self._engine or get_engine()).connect() as conn:
+            rows = self._rows(conn, test_type, shape, metrics, **params)
+        return rows[0] if rows else {}
+
+    def _population(self, conn, test_type: str, segment: str) -> dict:
+        """The population (or team_population) row, rescanned only when the table changed."""
+        current = tuple(conn.execute(_watermark_query(test_type)).one())
+        key = (test_type, segment)
+        with self._populations_lock:
+            held = self._populations.get(key)
+        if held is not None and held[0] == current:
+            return held[1]
+        cols = SNAPSHOT_COLUMNS[test_type]
+        if segment == ALL_SEGMENT:
+            row = self._rows(conn, test_type, "population", cols)[0]
+        else:
+            row = self._rows(conn, test_type, "team_population", cols, segment=segment)[0]
+        with self._populations_lock:
+            self._populations[key] = (current, row)
+        return row
+
+    def get_athlete_names(self) -> list[str]:
+        with (self._engine or get_engine()).connect() as conn:
+            return list(conn.execute(statement("tests_cmjr", "names")).scalars())
+
+    def get_team_athlete_names(self, team_id: str, test_type: str = "tests_cmj") -> list[str]:
+        with (self._engine or get_engine()).connect() as conn:
+            query = statement(test_type, "team_names")
+            return list(conn.execute(query, {"team_id": team_id}).scalars())
+
+    def get_dates(self, test_type: str, athlete_name: str) -> list[dict]:
+        with (self._engine or get_engine()).connect() as conn:
+            days = conn.execute(statement(test_type, "dates"), {"name": athlete_name}).scalars()
+            return [{"label": day.strftime("%m-%d-%Y"), "value": day.isoformat()} for day in days]
+
+    def get_date_metrics(
+        self, test_type: str, metrics: list, athlete_name: str, test_date_iso: str
+    ) -> dict:
+        return self._row(
+            test_type,
+            "date",
+            metrics,
+            name=athlete_name,
+            test_date=date.fromisoformat(test_date_iso),
+        )
+
+    def get_baseline_metrics(self, test_type: str, metrics: list, athlete_name: str) -> dict:
+        return self._row(test_type, "baseline", metrics, name=athlete_name)
+
+    def get_last5_metrics(self, test_type: str, metrics: list, athlete_name: str) -> dict:
+        return self._row(test_type, "last5", metrics, name=athlete_name)
+
+    def get_alltime_metrics(self, test_type: str, metrics: list, athlete_name: str) -> dict:
+        return self._row(test_type, "alltime", metrics, name=athlete_name)
+
+    def get_trend_metrics(self, test_type: str, metrics: list, athlete_name: str) -> list[dict]:
+        with (self._engine or get_engine()).connect() as conn:
+            return self._rows(conn, test_type, "trend", metrics, name=athlete_name)
+
+    def get_team_average(self, metrics: list, test_type: str, segment: str = ALL_SEGMENT) -> dict:
+        if segment == ALL_SEGMENT:
+            return self._row(test_type, "team", metrics)
+        row = self._row(test_type, "team_population", metrics, segment=segment)
+        return {col: row[f"{col}_mean"] for col in metrics}
+
+    def get_population_stats(
+        self, column_metrics: list, test_type: str, segment: str = ALL_SEGMENT
+    ) -> dict:
+        if set(column_metrics) <= set(SNAPSHOT_COLUMNS.get(test_type, ())):
+            with (self._engine or get_engine()).connect() as conn:
+                return _stats(self._population(conn, test_type, segment), column_metrics)
+        if segment == ALL_SEGMENT:
+            row = self._row(test_type, "population", column_metrics)
+        else:
+            row = self._row(test_type, "team_population", column_metrics, segment=segment)
+        return _stats(row, column_metrics)
+
+    def fetch_session_snapshot(
+        self, test_type: str, athlete_name: str, test_date_iso: str, segment: str = ALL_SEGMENT
+    ) -> dict:
+        cols = SNAPSHOT_COLUMNS[test_type]  # KeyError for anything but a known table
+        with (self._engine or get_engine()).connect() as conn:
+            current, baseline, last5 = (
+                self._rows(conn, test_type, shape, cols, **params)
+                for shape, params in (
+                    ("date", {"name": athlete_name, "test_date": date.fromisoformat(test_date_iso)}),
+                    ("baseline", {"name": athlete_name}),
+                    ("last5", {"name": athlete_name}),
+                )
+            )
+            return {
+                "current": current[0] if current else {},
+                "baseline": baseline[0] if baseline else {},
+                "last5": last5[0] if last5 else {},
+                "population": _stats(self._population(conn, test_type, segment), cols),
+            }
+
+    def get_value_distributions(
+        self, test_type: str, segment: str, exact_limit: int, fractions: list
+    ) -> dict:
+        cols = SNAPSHOT_COLUMNS[test_type]  # KeyError for anything but a known table
+        with (self._engine or get_engine()).connect() as conn:
+            if segment == ALL_SEGMENT:
+                rows = conn.execute(statement(test_type, "values", cols)).fetchall()
+            else:
+                query = statement(test_type, "team_values", cols)
+                rows = conn.execute(query, {"segment": segment}).fetchall()
+        # None becomes NaN
+        values = np.array([tuple(row) for row in rows], dtype=float).reshape(len(rows), len(cols))
+        distributions = {}
+        for i, col in enumerate(cols):
+            present = np.sort(values[~np.isnan(values[:, i]), i])
+            n = len(present)
+            # np.quantile interpolates linearly, as percentile_cont does
+            points = present if n <= exact_limit else np.quantile(present, fractions)
+            distributions[col] = (n, points.tolist())
+        return distributions
+
+
+def _stats(row: dict, cols) -> dict:
+    """{"mean", "std"} per metric from a population / team_population row."""
+    stats = {}
+    for col in cols:
+        n, mean, variance = row[f"{col}_n"], row[f"{col}_mean"], row[f"{col}_var"]
+        stats[col] = moments_to_stats(Moments(n, mean, variance * n) if n else EMPTY_MOMENTS)
+    return stats
+
+
+def watermark(test_type: str, athlete_name: str | None = None) -> tuple:
+    """(row_count, max_timestamp, 0) of an athlete's trials, or the whole table's.
+
+    Stands in for the data_watermarks row off Postgres, where no trigger
+    keeps one: it moves when trials are added or deleted, not when a
+    value is edited in place.
+    """
+    with get_engine().connect() as conn:
+        row_count, max_timestamp = conn.execute(_watermark_query(test_type, athlete_name)).one()
+    return (row_count, max_timestamp, 0)
+
+
+def _watermark_query(test_type: str, athlete_name: str | None = None) -> Select:
+    table = TRIAL_TABLES[test_type]
+    query = select(func.count(), func.max(table.c.timestamp))
+    if athlete_name is not None:
+        query = query.where(table.c.athlete_name == athlete_name)
+    return query
+
+
+def copy_trials(source, target, test_types=tuple(TRIAL_TABLES), chunk: int = 10_000) -> dict:
+    """Copy the trial tables from source to target engine, replacing target's rows.
+
+    Creates the tables (with an athlete_name index) on target if missing.
+    Returns {test_type: rows copied}.
+    """
+    install(target)
+    tables = [TRIAL_TABLES[test_type] for test_type in test_types]
+    metadata.create_all(target, tables=tables)
+    copied = {}
+    with source.connect() as reader, target.begin() as writer:
+        for table in tables:
+            writer.execute(delete(table))
+            copied[table.name] = 0
+            result = reader.execution_options(yield_per=chunk).execute(select(table))
+            for rows in result.mappings().partitions():
+                writer.execute(insert(table), [dict(row) for row in rows])
+                copied[table.name] += len(rows)
+    return copied
+
+
+portable_queries = PortableQueries()
+
+
+def enable_portable() -> list[str]:
+    """Route every query function to the shared PortableQueries."""
+    return use_backend(portable_queries)
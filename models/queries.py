@@ -1,42 +1,76 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+
 from sqlalchemy import text
 
 from .config import (
+    ALL_SEGMENT,
     FOOTBALL_INJURY_DATA_POINTS,
-    engine,
+    QUERY_FAN_OUT_WORKERS,
+    SNAPSHOT_COLUMNS,
+    SNAPSHOT_TTL_SECONDS,
+    SNAPSHOT_WATERMARK_SECONDS,
     GAUGE_COLUMNS,
     BAR_COLUMNS,
     ASYMMETRY_COLUMNS,
+    FOOTBALL_TEAM_ID,
     INJURY_DATA,
+    TREND_COLUMNS,
     FOOTBALL_OUTPUT_METRICS,
     FOOTBALL_MOVEMENT_ANALYSIS_COLUMNS,
     FOOTBALL_ASYMMETRY_METRICS,
+    QUERY_BACKEND,
+)
+from .backends import backend_for, routed
+from .cache import cached, get_watermark
+from .db import get_engine
+from .registry import statement
+from .stats import EMPTY_MOMENTS, Moments, moments_to_stats
+
+POPULATION_STATS_QUERY = text(
+    "SELECT metric, n, mean, m2 FROM population_moments "
+    "WHERE test_type = :test_type AND segment = :segment "
+    "AND metric = ANY(:metrics)"
 )
 
+# Primary-key range of the trigger-maintained membership table (migration 006)
+TEAM_NAMES_QUERY = text(
+    "SELECT athlete_name FROM athlete_team_members "
+    "WHERE test_type = :test_type AND team_id = :team_id ORDER BY athlete_name"
+)
 
-def get_athlete_names() -> list[str]:
-    """Get all distinct athlete names from the CMJR tests."""
-    with engine.connect() as conn:
-        result = conn.execute(
-            text("SELECT DISTINCT athlete_name FROM tests_cmjr ORDER BY athlete_name")
-        )
-        return [row[0] for row in result]
+
+def _fetch_row(query, params: dict) -> dict:
+    """Run a single-row statement; {} when it matches nothing."""
+    with get_engine().connect() as conn:
+        row = conn.execute(query, params).mappings().fetchone()
+        if row is None:
+            return {}
+        return dict(row)
 
 
-def get_test_dates(athlete_name: str) -> list[dict]:
+# ================ Parameterised Queries ==========================================
+# One function per query shape; test_type (tests_cmj or tests_cmjr) picks the
+# rollup table and metrics the columns. Statements come from registry.py.
+# @routed functions can be served by another backend instead (backends.py).
+
+
+@routed
+@cached()
+def get_dates(test_type: str, athlete_name: str) -> list[dict]:
     """Get distinct test dates for a given athlete, most recent first.
 
     Returns list of dicts with 'label' (MM-DD-YYYY) and 'value' (ISO date)
     so the dropdown displays friendly dates but stores queryable values.
+    test_date is the stored generated column added by models/migrations.py,
+    bucketed into calendar days in the team's local timezone; every date
+    with trials has exactly one row in the rollup table.
     """
-    with engine.connect() as conn:
-        result = conn.execute(
-            text(
-                "SELECT DISTINCT to_timestamp(timestamp)::date AS test_date "
-                "FROM tests_cmjr "
-                "WHERE athlete_name = :name ORDER BY test_date DESC"
-            ),
-            {"name": athlete_name},
-        )
+    with get_engine().connect() as conn:
+        result = conn.execute(statement(test_type, "dates"), {"name": athlete_name})
         return [
             {
                 "label": row[0].strftime("%m-%d-%Y"),
@@ -46,297 +80,267 @@ def get_test_dates(athlete_name: str) -> list[dict]:
         ]
 
 
-def get_test_data(athlete_name: str, test_date_iso: str) -> dict:
+@routed
+@cached()
+def get_date_metrics(
+    test_type: str, metrics: list, athlete_name: str, test_date_iso: str
+) -> dict:
     """Get averaged metric values for an athlete on a specific test date.
 
-    Averages the 3 trials (rows) that share the same date.
+    Averages the trials (rows) that share the same date.
     test_date_iso: ISO format date string like '2025-02-15'.
+    Returns dict like {"cmj_jump_height_m": 0.45, ...} or {}.
     """
-    all_cols = GAUGE_COLUMNS + BAR_COLUMNS
-    avg_cols = ", ".join(f"AVG({col}) AS {col}" for col in all_cols)
-    query = text(
-        f"SELECT {avg_cols} "
-        "FROM tests_cmjr "
-        "WHERE athlete_name = :name "
-        "AND to_timestamp(timestamp)::date = :test_date"
+    return _fetch_row(
+        statement(test_type, "date", metrics),
+        {"name": athlete_name, "test_date": test_date_iso},
     )
-    with engine.connect() as conn:
-        result = conn.execute(query, {"name": athlete_name, "test_date": test_date_iso})
-        row = result.mappings().fetchone()
-        if row is None:
-            return {}
-        return dict(row)
 
 
-def get_baseline_data(athlete_name: str) -> dict:
+@routed
+@cached()
+def get_baseline_metrics(test_type: str, metrics: list, athlete_name: str) -> dict:
     """Get averaged metric values from the athlete's earliest test date.
 
     This is the baseline (first test ever recorded for this athlete).
     Returns a dict like {"cmj_jump_height_m": 0.45, ...} or {} if none.
     """
-    all_cols = GAUGE_COLUMNS + BAR_COLUMNS
-    avg_cols = ", ".join(f"AVG({col}) AS {col}" for col in all_cols)
-    query = text(
-        f"SELECT {avg_cols} "
-        "FROM tests_cmjr "
-        "WHERE athlete_name = :name "
-        "AND to_timestamp(timestamp)::date = ("
-        "  SELECT MIN(to_timestamp(timestamp)::date) "
-        "  FROM tests_cmjr WHERE athlete_name = :name"
-        ")"
-    )
-    with engine.connect() as conn:
-        result = conn.execute(query, {"name": athlete_name})
-        row = result.mappings().fetchone()
-        if row is None:
-            return {}
-        return dict(row)
-
-
-def get_population_stats(column_metrics: list, test_type: str) -> dict:
-    """Get mean and stddev for each metric across all athletes/tests.
-
-    test_type can be tests_cmj or tests_cmjr
-
-    Used for z-score scaling. Returns:
-        {"cmj_jump_height_m": {"mean": 0.4, "std": 0.05}, ...}
-    """
-    parts = []
-    for col in column_metrics:
-        parts.append(f"AVG({col}) AS {col}_mean")
-        parts.append(f"STDDEV_POP({col}) AS {col}_std")
-    select_clause = ", ".join(parts)
-
-    with engine.connect() as conn:
-        result = conn.execute(text(f"SELECT {select_clause} FROM {test_type}"))
-        row = result.mappings().fetchone()
-        stats = {}
-        for col in column_metrics:
-            mean = row[f"{col}_mean"]
-            std = row[f"{col}_std"]
-            stats[col] = {
-                "mean": float(mean) if mean is not None else None,
-                "std": float(std) if std is not None and std > 0 else None,
-            }
-        return stats
+    return _fetch_row(statement(test_type, "baseline", metrics), {"name": athlete_name})
 
 
-def get_athlete_average(athlete_name: str) -> dict:
-    """Get the athlete's average for each bar metric across their last 5 test dates.
+@routed
+@cached()
+def get_last5_metrics(test_type: str, metrics: list, athlete_name: str) -> dict:
+    """Get the athlete's average for each metric across their last 5 test dates.
 
     If the athlete has fewer than 5 test dates, all available dates are used.
+    Read from the running last-5 mean stored on the latest rollup row.
     Returns: {"rebound_impulse_ratio": 1.23, ...} or {} if none.
     """
-    avg_cols = ", ".join(f"AVG({col}) AS {col}" for col in BAR_COLUMNS)
-    query = text(
-        f"SELECT {avg_cols} FROM tests_cmjr "
-        "WHERE athlete_name = :name "
-        "AND to_timestamp(timestamp)::date IN ("
-        "  SELECT DISTINCT to_timestamp(timestamp)::date AS test_date "
-        "  FROM tests_cmjr WHERE athlete_name = :name "
-        "  ORDER BY test_date DESC LIMIT 5"
-        ")"
-    )
-    with engine.connect() as conn:
-        result = conn.execute(query, {"name": athlete_name})
-        row = result.mappings().fetchone()
-        if row is None:
-            return {}
-        return dict(row)
+    return _fetch_row(statement(test_type, "last5", metrics), {"name": athlete_name})
 
 
-def get_athlete_alltime_average(athlete_name: str) -> dict:
-    """Get the athlete's all-time average for each gauge metric.
+@routed
+@cached()
+def get_alltime_metrics(test_type: str, metrics: list, athlete_name: str) -> dict:
+    """Get the athlete's all-time average for each metric.
 
     Returns: {"cmj_jump_height_m": 1.23, ...} or {} if none.
     """
-    all_cols = GAUGE_COLUMNS + BAR_COLUMNS
-    avg_cols = ", ".join(f"AVG({col}) AS {col}" for col in all_cols)
-    query = text(f"SELECT {avg_cols} FROM tests_cmjr " "WHERE athlete_name = :name")
-    with engine.connect() as conn:
-        result = conn.execute(query, {"name": athlete_name})
-        row = result.mappings().fetchone()
-        if row is None:
-            return {}
-        return dict(row)
+    return _fetch_row(statement(test_type, "alltime", metrics), {"name": athlete_name})
 
 
-# ================ Injury Container ==========================================
-def get_cmjr_baseline_asymmetry(athlete_name: str) -> dict:
-    """Get averaged asymmetry metrics from the athlete's earliest CMJR test date.
+@routed
+@cached()
+def get_trend_metrics(test_type: str, metrics: list, athlete_name: str) -> list[dict]:
+    """Get per-date averaged metrics for all test dates of an athlete.
 
-    Averages the 3 trials on the baseline date.
-    Returns dict like {"cmj_lr_braking_impulse_index": -0.05, ...} or {}.
+    Returns a list of dicts ordered by date ascending:
+        [{"test_date": datetime.date, "col1": float, ...}, ...]
     """
-    avg_cols = ", ".join(f"AVG({col}) AS {col}" for col in ASYMMETRY_COLUMNS)
-    query = text(
-        f"SELECT {avg_cols} "
-        "FROM tests_cmjr "
-        "WHERE athlete_name = :name "
-        "AND to_timestamp(timestamp)::date = ("
-        "  SELECT MIN(to_timestamp(timestamp)::date) "
-        "  FROM tests_cmjr WHERE athlete_name = :name"
-        ")"
-    )
-    with engine.connect() as conn:
-        result = conn.execute(query, {"name": athlete_name})
-        row = result.mappings().fetchone()
-        if row is None:
-            return {}
-        return dict(row)
+    with get_engine().connect() as conn:
+        result = conn.execute(statement(test_type, "trend", metrics), {"name": athlete_name})
+        return [dict(row) for row in result.mappings()]
 
 
-# Dupe func refactor to accept test_type param
-def get_cmj_baseline_asymmetry(athlete_name: str) -> dict:
-    """Get averaged asymmetry metrics from the athlete's earliest CMJ test date.
+@routed
+@cached()
+def get_team_average(metrics: list, test_type: str, segment: str = ALL_SEGMENT) -> dict:
+    """Get the team-wide average for each bar metric across all athletes/tests.
 
-    Averages the 3 trials on the baseline date.
-    Returns dict like {"cmj_lr_braking_impulse_index": -0.05, ...} or {}.
+    segment is ALL_SEGMENT (every athlete) or a team ID.
+    For ALL_SEGMENT, combines the per-date SUM/COUNT partials of the rollup
+    table, which is a fraction of the raw table's size but gives the same
+    trial-weighted mean. A team's averages are the means of its
+    population_moments rows, i.e. over the trials tagged with the team.
+    Returns: {"rebound_impulse_ratio": 1.15, ...}
     """
-    avg_cols = ", ".join(f"AVG({col}) AS {col}" for col in FOOTBALL_ASYMMETRY_METRICS)
-    query = text(
-        f"SELECT {avg_cols} "
-        "FROM tests_cmj "
-        "WHERE athlete_name = :name "
-        "AND to_timestamp(timestamp)::date = ("
-        "  SELECT MIN(to_timestamp(timestamp)::date) "
-        "  FROM tests_cmj WHERE athlete_name = :name"
-        ")"
-    )
-    with engine.connect() as conn:
-        result = conn.execute(query, {"name": athlete_name})
-        row = result.mappings().fetchone()
-        if row is None:
-            return {}
-        return dict(row)
+    if segment == ALL_SEGMENT:
+        return _fetch_row(statement(test_type, "team", metrics), {})
+    with get_engine().connect() as conn:
+        result = conn.execute(
+            POPULATION_STATS_QUERY,
+            {"test_type": test_type, "segment": segment, "metrics": list(metrics)},
+        )
+        means = {row.metric: row.mean for row in result if row.n}
+        return {col: means.get(col) for col in metrics}
 
 
-def get_cmjr_date_asymmetry(athlete_name: str, test_date_iso: str) -> dict:
-    """Get averaged asymmetry metrics for a specific CMJR test date.
+@routed
+@cached()
+def get_population_stats(
+    column_metrics: list, test_type: str, segment: str = ALL_SEGMENT
+) -> dict:
+    """Get mean and stddev for each metric across all athletes/tests.
 
-    Averages the 3 trials on the given date.
-    Returns dict like {"cmj_lr_braking_impulse_index": -0.05, ...} or {}.
+    test_type can be tests_cmj or tests_cmjr
+    segment is ALL_SEGMENT (every row) or a team ID.
+
+    Reads the trigger-maintained count/mean/M2 accumulators in
+    population_moments, one row per metric, instead of scanning the table.
+
+    Used for z-score scaling. Returns:
+        {"cmj_jump_height_m": {"mean": 0.4, "std": 0.05}, ...}
     """
-    avg_cols = ", ".join(f"AVG({col}) AS {col}" for col in ASYMMETRY_COLUMNS)
-    query = text(
-        f"SELECT {avg_cols} "
-        "FROM tests_cmjr "
-        "WHERE athlete_name = :name "
-        "AND to_timestamp(timestamp)::date = :test_date"
+    with get_engine().connect() as conn:
+        result = conn.execute(
+            POPULATION_STATS_QUERY,
+            {"test_type": test_type, "segment": segment, "metrics": list(column_metrics)},
+        )
+        moments = {row.metric: Moments(row.n, row.mean, row.m2) for row in result}
+        return {
+            col: moments_to_stats(moments.get(col, EMPTY_MOMENTS))
+            for col in column_metrics
+        }
+
+
+@lru_cache(maxsize=64)
+def _distribution_sql(test_type: str, exact: tuple[bool, ...], by_team: bool):
+    parts = []
+    for col, keep_all in zip(SNAPSHOT_COLUMNS[test_type], exact):
+        if keep_all:
+            parts.append(f"array_agg({col} ORDER BY {col}) FILTER (WHERE {col} IS NOT NULL)")
+        else:
+            parts.append(
+                "percentile_cont(CAST(:fractions AS double precision[])) "
+                f"WITHIN GROUP (ORDER BY {col})"
+            )
+    # The rows population_moments counts towards the team's segment
+    where = (
+        " WHERE json_typeof(athlete_teams) = 'array' "
+        "AND CAST(athlete_teams AS jsonb) ? :segment"
+        if by_team
+        else ""
     )
-    with engine.connect() as conn:
-        result = conn.execute(query, {"name": athlete_name, "test_date": test_date_iso})
-        row = result.mappings().fetchone()
-        if row is None:
-            return {}
-        return dict(row)
+    return text(f"SELECT {', '.join(parts)} FROM {test_type}{where}")
 
 
-# Dupe refactor to accept param test_date
-def get_cmj_date_asymmetry(athlete_name: str, test_date_iso: str) -> dict:
-    """Get averaged asymmetry metrics for a specific CMJ test date.
+@routed
+def get_value_distributions(
+    test_type: str, segment: str, exact_limit: int, fractions: list
+) -> dict:
+    """Get the distribution of every SNAPSHOT_COLUMNS metric over segment.
+
+    test_type can be tests_cmj or tests_cmjr
+    segment is ALL_SEGMENT (every row) or a team ID.
 
-    Averages the 3 trials on the given date.
-    Returns dict like {"cmj_lr_braking_impulse_index": -0.05, ...} or {}.
+    A metric with at most exact_limit values gets all of them, sorted;
+    a larger one gets its quantiles at fractions (percentile_cont, linear
+    interpolation), so large tables are never shipped whole. Not cached:
+    percentiles.py keeps the results. Returns:
+        {"cmj_jump_height_m": (n, [points, ...]), ...}
     """
-    avg_cols = ", ".join(f"AVG({col}) AS {col}" for col in FOOTBALL_ASYMMETRY_METRICS)
-    query = text(
-        f"SELECT {avg_cols} "
-        "FROM tests_cmj "
-        "WHERE athlete_name = :name "
-        "AND to_timestamp(timestamp)::date = :test_date"
+    cols = SNAPSHOT_COLUMNS[test_type]  # KeyError for anything but a known table
+    with get_engine().connect() as conn:
+        counts = {
+            row.metric: row.n
+            for row in conn.execute(
+                POPULATION_STATS_QUERY,
+                {"test_type": test_type, "segment": segment, "metrics": cols},
+            )
+        }
+        exact = tuple(counts.get(col, 0) <= exact_limit for col in cols)
+        params = {}
+        if not all(exact):
+            params["fractions"] = list(fractions)
+        if segment != ALL_SEGMENT:
+            params["segment"] = segment
+        row = conn.execute(
+            _distribution_sql(test_type, exact, segment != ALL_SEGMENT), params
+        ).one()
+    return {col: (counts.get(col, 0), points or []) for col, points in zip(cols, row)}
+
+
+@routed
+@cached()
+def get_team_athlete_names(team_id: str, test_type: str = "tests_cmj") -> list[str]:
+    """Get every athlete with a test_type trial on team team_id, sorted.
+
+    Reads the team's rows of athlete_team_members (one index range) instead
+    of expanding each trial's athlete_teams JSON.
+    """
+    with get_engine().connect() as conn:
+        result = conn.execute(TEAM_NAMES_QUERY, {"test_type": test_type, "team_id": team_id})
+        return [row[0] for row in result]
+
+
+# =============================== CMJR Queries ====================================
+
+
+@routed
+@cached("tests_cmjr")
+def get_athlete_names() -> list[str]:
+    """Get all distinct athlete names from the CMJR tests."""
+    with get_engine().connect() as conn:
+        result = conn.execute(statement("tests_cmjr", "names"))
+        return [row[0] for row in result]
+
+
+def get_test_dates(athlete_name: str) -> list[dict]:
+    """Get distinct CMJR test dates for a given athlete, most recent first."""
+    return get_dates("tests_cmjr", athlete_name)
+
+
+def get_test_data(athlete_name: str, test_date_iso: str) -> dict:
+    """Get averaged gauge and bar metrics for an athlete on a specific test date."""
+    return get_date_metrics(
+        "tests_cmjr", GAUGE_COLUMNS + BAR_COLUMNS, athlete_name, test_date_iso
     )
-    with engine.connect() as conn:
-        result = conn.execute(query, {"name": athlete_name, "test_date": test_date_iso})
-        row = result.mappings().fetchone()
-        if row is None:
-            return {}
-        return dict(row)
 
 
-def get_team_average(metrics: list, test_type: str) -> dict:
-    """Get the team-wide average for each bar metric across all athletes/tests.
+def get_baseline_data(athlete_name: str) -> dict:
+    """Get averaged gauge and bar metrics from the athlete's earliest test date."""
+    return get_baseline_metrics("tests_cmjr", GAUGE_COLUMNS + BAR_COLUMNS, athlete_name)
 
-    Returns: {"rebound_impulse_ratio": 1.15, ...}
-    """
-    avg_cols = ", ".join(f"AVG({col}) AS {col}" for col in metrics)
-    with engine.connect() as conn:
-        result = conn.execute(text(f"SELECT {avg_cols} FROM {test_type}"))
-        row = result.mappings().fetchone()
-        if row is None:
-            return {}
-        return dict(row)
+
+def get_athlete_average(athlete_name: str) -> dict:
+    """Get the athlete's average for each bar metric across their last 5 test dates."""
+    return get_last5_metrics("tests_cmjr", BAR_COLUMNS, athlete_name)
+
+
+def get_athlete_alltime_average(athlete_name: str) -> dict:
+    """Get the athlete's all-time average for each gauge and bar metric."""
+    return get_alltime_metrics("tests_cmjr", GAUGE_COLUMNS + BAR_COLUMNS, athlete_name)
 
 
 def get_trend_data(athlete_name: str) -> list[dict]:
-    """Get per-date averaged metrics for all test dates of an athlete.
+    """Get per-date averaged TREND_COLUMNS for the Trends container, oldest first."""
+    return get_trend_metrics("tests_cmjr", TREND_COLUMNS, athlete_name)
 
-    Returns a list of dicts ordered by date ascending:
-        [{"test_date": datetime.date, "col1": float, ...}, ...]
-    Covers both gauge and bar metrics for the Trends container.
-    """
-    all_cols = (
-        GAUGE_COLUMNS
-        + BAR_COLUMNS
-        + [
-            "rebound_depth_m",
-            "time_to_stabilization_ms",
-            "relative_peak_landing_force",
-        ]
-    )
-    avg_cols = ", ".join(f"AVG({col}) AS {col}" for col in all_cols)
-    query = text(
-        f"SELECT to_timestamp(timestamp)::date AS test_date, {avg_cols} "
-        "FROM tests_cmjr "
-        "WHERE athlete_name = :name "
-        "GROUP BY test_date "
-        "ORDER BY test_date ASC"
-    )
-    with engine.connect() as conn:
-        result = conn.execute(query, {"name": athlete_name})
-        return [dict(row) for row in result.mappings()]
 
+# ================ Injury Container ==========================================
+def get_cmjr_baseline_asymmetry(athlete_name: str) -> dict:
+    """Get averaged asymmetry metrics from the athlete's earliest CMJR test date."""
+    return get_baseline_metrics("tests_cmjr", ASYMMETRY_COLUMNS, athlete_name)
 
-def get_injury_data(athlete_name: str, test_date_iso: str) -> dict:
-    """Get the raw data values for data below divergent graph.
 
-    gets the average of the selected athlete and date from athlete profile
-    Returns dict like {"rebound_depth_m": 0.5} or {}
-    """
-    avg_cols = ", ".join(f"AVG({col}) AS {col}" for col in INJURY_DATA)
-    query = text(
-        f"SELECT {avg_cols} "
-        "FROM tests_cmjr "
-        "WHERE athlete_name = :name "
-        "AND to_timestamp(timestamp)::date = :test_date"
+def get_cmj_baseline_asymmetry(athlete_name: str) -> dict:
+    """Get averaged asymmetry metrics from the athlete's earliest CMJ test date."""
+    return get_baseline_metrics("tests_cmj", FOOTBALL_ASYMMETRY_METRICS, athlete_name)
+
+
+def get_cmjr_date_asymmetry(athlete_name: str, test_date_iso: str) -> dict:
+    """Get averaged asymmetry metrics for a specific CMJR test date."""
+    return get_date_metrics("tests_cmjr", ASYMMETRY_COLUMNS, athlete_name, test_date_iso)
+
+
+def get_cmj_date_asymmetry(athlete_name: str, test_date_iso: str) -> dict:
+    """Get averaged asymmetry metrics for a specific CMJ test date."""
+    return get_date_metrics(
+        "tests_cmj", FOOTBALL_ASYMMETRY_METRICS, athlete_name, test_date_iso
     )
-    with engine.connect() as conn:
-        result = conn.execute(query, {"name": athlete_name, "test_date": test_date_iso})
-        row = result.mappings().fetchone()
-        if row is None:
-            return {}
-        return dict(row)
 
 
-def get_football_injury_data(athlete_name: str, test_date_iso: str) -> dict:
-    """Get the raw data values for data below divergent graph.
+def get_injury_data(athlete_name: str, test_date_iso: str) -> dict:
+    """Get the CMJR values shown below the divergent graph for a test date."""
+    return get_date_metrics("tests_cmjr", INJURY_DATA, athlete_name, test_date_iso)
 
-    gets the average of the selected athlete and date from athlete profile
-    Returns dict like {"rebound_depth_m": 0.5} or {}
-    """
-    avg_cols = ", ".join(f"AVG({col}) AS {col}" for col in FOOTBALL_INJURY_DATA_POINTS)
-    query = text(
-        f"SELECT {avg_cols} "
-        "FROM tests_cmj "
-        "WHERE athlete_name = :name "
-        "AND to_timestamp(timestamp)::date = :test_date"
+
+def get_football_injury_data(athlete_name: str, test_date_iso: str) -> dict:
+    """Get the CMJ values shown below the divergent graph for a test date."""
+    return get_date_metrics(
+        "tests_cmj", FOOTBALL_INJURY_DATA_POINTS, athlete_name, test_date_iso
     )
-    with engine.connect() as conn:
-        result = conn.execute(query, {"name": athlete_name, "test_date": test_date_iso})
-        row = result.mappings().fetchone()
-        if row is None:
-            return {}
-        return dict(row)
 
 
 # =============================== CMJ Queries ====================================
@@ -344,115 +348,261 @@ def get_football_injury_data(athlete_name: str, test_date_iso: str) -> dict:
 
 def get_football_athlete_names() -> list[str]:
     """Get all distinct football athlete names from the CMJ tests."""
-    with engine.connect() as conn:
-        result = conn.execute(
-            # teamID used in where statement
-            text(
-                "SELECT DISTINCT athlete_name "
-                "FROM tests_cmj "
-                "WHERE 'ajTD7FpSJgRIjXzEBu3E' IN (SELECT json_array_elements_text(athlete_teams)) "  # expands JSON array into a set of text rows
-                "ORDER BY athlete_name"
-            )
-        )
-        return [row[0] for row in result]
+    return get_team_athlete_names(FOOTBALL_TEAM_ID, "tests_cmj")
 
 
 def get_cmj_test_dates(athlete_name: str) -> list[dict]:
-    """Get distinct test dates from tests_cmj for a given athlete, most recent first.
-
-    Returns list of dicts with 'label' (MM-DD-YYYY) and 'value' (ISO date).
-    """
-    with engine.connect() as conn:
-        result = conn.execute(
-            text(
-                "SELECT DISTINCT to_timestamp(timestamp)::date AS test_date "
-                "FROM tests_cmj "
-                "WHERE athlete_name = :name ORDER BY test_date DESC"
-            ),
-            {"name": athlete_name},
-        )
-        return [
-            {
-                "label": row[0].strftime("%m-%d-%Y"),
-                "value": row[0].isoformat(),
-            }
-            for row in result
-        ]
+    """Get distinct CMJ test dates for a given athlete, most recent first."""
+    return get_dates("tests_cmj", athlete_name)
 
 
 def get_cmj_test_data(athlete_name: str, test_date_iso: str) -> dict:
-    """Get averaged metric values for an athlete on a specific test date.
-
-    Averages the 3 trials (rows) that share the same date.
-    test_date_iso: ISO format date string like '2025-02-15'.
-    """
-    all_cols = FOOTBALL_OUTPUT_METRICS + FOOTBALL_MOVEMENT_ANALYSIS_COLUMNS
-    avg_cols = ", ".join(f"AVG({col}) AS {col}" for col in all_cols)
-    query = text(
-        f"SELECT {avg_cols} "
-        "FROM tests_cmj "
-        "WHERE athlete_name = :name "
-        "AND to_timestamp(timestamp)::date = :test_date"
+    """Get averaged output and movement metrics for an athlete on a specific test date."""
+    return get_date_metrics(
+        "tests_cmj",
+        FOOTBALL_OUTPUT_METRICS + FOOTBALL_MOVEMENT_ANALYSIS_COLUMNS,
+        athlete_name,
+        test_date_iso,
     )
-    with engine.connect() as conn:
-        result = conn.execute(query, {"name": athlete_name, "test_date": test_date_iso})
-        row = result.mappings().fetchone()
-        if row is None:
-            return {}
-        return dict(row)
 
 
 def get_cmj_baseline_data(athlete_name: str) -> dict:
-    """Get averaged metric values from the athlete's earliest test date.
-
-    This is the baseline (first test ever recorded for this athlete).
-    Returns a dict like {"jump_height_m": 0.45, ...} or {} if none.
-    """
-    all_cols = (
+    """Get averaged output, movement and asymmetry metrics from the earliest test date."""
+    return get_baseline_metrics(
+        "tests_cmj",
         FOOTBALL_OUTPUT_METRICS
         + FOOTBALL_MOVEMENT_ANALYSIS_COLUMNS
-        + FOOTBALL_ASYMMETRY_METRICS
-    )
-    avg_cols = ", ".join(f"AVG({col}) AS {col}" for col in all_cols)
-    query = text(
-        f"SELECT {avg_cols} "
-        "FROM tests_cmj "
-        "WHERE athlete_name = :name "
-        "AND to_timestamp(timestamp)::date = ("
-        "  SELECT MIN(to_timestamp(timestamp)::date) "
-        "  FROM tests_cmj WHERE athlete_name = :name"
-        ")"
+        + FOOTBALL_ASYMMETRY_METRICS,
+        athlete_name,
     )
-    with engine.connect() as conn:
-        result = conn.execute(query, {"name": athlete_name})
-        row = result.mappings().fetchone()
-        if row is None:
-            return {}
-        return dict(row)
 
 
 def get_cmj_athlete_average(athlete_name: str) -> dict:
-    """Get the athlete's average for each movement analysis metric across their last 5 test dates.
+    """Get the athlete's movement and asymmetry averages across their last 5 test dates."""
+    return get_last5_metrics(
+        "tests_cmj",
+        FOOTBALL_MOVEMENT_ANALYSIS_COLUMNS + FOOTBALL_ASYMMETRY_METRICS,
+        athlete_name,
+    )
 
-    If the athlete has fewer than 5 test dates, all available dates are used.
-    Returns: {"relative_braking_impulse_n_s_kg": 1.23, ...} or {} if none.
+
+# ================ Session Snapshot ==========================================
+SNAPSHOT_SLOTS = ("current", "baseline", "last5")
+
+
+
+class _SharedSnapshot:
+    """A memo entry: a future of (watermark, snapshot) and its timestamps."""
+
+    __slots__ = ("expires", "checked", "future")
+
+    def __init__(self, now: float):
+        self.expires = now + SNAPSHOT_TTL_SECONDS
+        # When the watermark was last read
+        self.checked = now
+        self.future = Future()
+
+
+_snapshot_lock = threading.Lock()
+_snapshot_memo: dict[tuple, _SharedSnapshot] = {}
+
+
+@routed
+def fetch_session_snapshot(
+    test_type: str, athlete_name: str, test_date_iso: str, segment: str = ALL_SEGMENT
+) -> dict:
+    """Query get_session_snapshot's result, skipping the shared snapshots.
+
+    On Postgres the snapshot and population statements run as one batch:
+    three primary-key range reads on the rollup table (the selected date,
+    the earliest date, and the latest date's running last-5 means) and one
+    on population_moments for segment. Backends take over this function,
+    not get_session_snapshot, so every backend shares the snapshots.
     """
-    avg_cols = ", ".join(
-        f"AVG({col}) AS {col}"
-        for col in FOOTBALL_MOVEMENT_ANALYSIS_COLUMNS + FOOTBALL_ASYMMETRY_METRICS
-    )
-    query = text(
-        f"SELECT {avg_cols} FROM tests_cmj "
-        "WHERE athlete_name = :name "
-        "AND to_timestamp(timestamp)::date IN ("
-        "  SELECT DISTINCT to_timestamp(timestamp)::date AS test_date "
-        "  FROM tests_cmj WHERE athlete_name = :name "
-        "  ORDER BY test_date DESC LIMIT 5"
-        ")"
+    cols = SNAPSHOT_COLUMNS[test_type]  # KeyError for anything but a known table
+    slot_rows, moment_rows = batch(
+        [
+            (
+                statement(test_type, "snapshot", cols),
+                {"name": athlete_name, "test_date": test_date_iso},
+            ),
+            (
+                POPULATION_STATS_QUERY,
+                {"test_type": test_type, "segment": segment, "metrics": cols},
+            ),
+        ]
     )
-    with engine.connect() as conn:
-        result = conn.execute(query, {"name": athlete_name})
-        row = result.mappings().fetchone()
-        if row is None:
-            return {}
-        return dict(row)
+    snapshot = {slot: {} for slot in SNAPSHOT_SLOTS}
+    for row in slot_rows:
+        snapshot[row["slot"]] = {col: row[col] for col in cols}
+    moments = {
+        row["metric"]: Moments(row["n"], row["mean"], row["m2"]) for row in moment_rows
+    }
+    snapshot["population"] = {
+        col: moments_to_stats(moments.get(col, EMPTY_MOMENTS)) for col in cols
+    }
+    return snapshot
+
+
+def get_session_snapshot(
+    test_type: str, athlete_name: str, test_date_iso: str, segment: str = ALL_SEGMENT
+) -> dict:
+    """Get current, baseline and last-5 averages for an athlete, shared across callbacks.
+
+    test_type can be tests_cmj or tests_cmjr. Every slot carries all of that
+    table's SNAPSHOT_COLUMNS (performance, movement, asymmetry and injury
+    metrics), so one call replaces get_test_data, get_baseline_data,
+    get_athlete_average, the asymmetry queries and the injury data query.
+    The "population" slot holds live get_population_stats-style
+    {"mean", "std"} dicts for the same columns over segment (ALL_SEGMENT
+    or a team ID); its means are that segment's trial-weighted averages.
+    Returns:
+        {"current": {...}, "baseline": {...}, "last5": {...}, "population": {...}}
+    with {} for a slot that has no trials.
+
+    The callbacks fired by one dropdown change all ask for the same snapshot,
+    so results are shared for SNAPSHOT_TTL_SECONDS and concurrent callers wait
+    on the in-flight query instead of issuing their own. A new snapshot reads
+    the table's watermark once, before querying; a caller more than
+    SNAPSHOT_WATERMARK_SECONDS after the last read reads it again and
+    queries afresh if it moved, so a test landing in the table (the
+    athlete's or one moving the population) shows up within that long.
+    Treat the returned dicts as read-only.
+    """
+    backend = backend_for("fetch_session_snapshot")
+    key = (test_type, athlete_name, test_date_iso, segment, backend)
+    now = time.monotonic()
+    recheck = False
+    with _snapshot_lock:
+        entry = _snapshot_memo.get(key)
+        owner = entry is None or entry.expires <= now
+        if owner:
+            for stale in [k for k, shared in _snapshot_memo.items() if shared.expires <= now]:
+                del _snapshot_memo[stale]
+            entry = _snapshot_memo[key] = _SharedSnapshot(now)
+        elif entry.future.done() and now - entry.checked >= SNAPSHOT_WATERMARK_SECONDS:
+            # One caller re-reads the watermark; the rest keep the snapshot meanwhile
+            entry.checked = now
+            recheck = True
+
+    if owner:
+        try:
+            # Read before querying, as the query cache does
+            watermark = get_watermark(test_type)
+            snapshot = fetch_session_snapshot(test_type, athlete_name, test_date_iso, segment)
+            entry.future.set_result((watermark, snapshot))
+        except BaseException as exc:
+            entry.future.set_exception(exc)
+            with _snapshot_lock:
+                if _snapshot_memo.get(key) is entry:
+                    del _snapshot_memo[key]
+    elif recheck and get_watermark(test_type) != entry.future.result()[0]:
+        with _snapshot_lock:
+            if _snapshot_memo.get(key) is entry:
+                del _snapshot_memo[key]
+        return get_session_snapshot(test_type, athlete_name, test_date_iso, segment)
+    return entry.future.result()[1]
+
+
+def clear_session_snapshots() -> None:
+    """Drop every shared snapshot so the next call goes back to the database."""
+    with _snapshot_lock:
+        _snapshot_memo.clear()
+
+
+# ================ Concurrent Fan-out ==========================================
+_fan_out_pool = ThreadPoolExecutor(
+    max_workers=QUERY_FAN_OUT_WORKERS, thread_name_prefix="query-fan-out"
+)
+
+
+def fan_out(*calls: tuple) -> list:
+    """Run independent query calls concurrently on pooled connections.
+
+    Each call is a (function, *args) tuple. Returns the results in call
+    order, so the wait is the slowest query rather than the sum of all.
+    The first exception raised by any call is re-raised.
+
+    Example:
+        names, stats = q.fan_out(
+            (q.get_athlete_names,),
+            (q.get_population_stats, GAUGE_COLUMNS, "tests_cmjr"),
+        )
+    """
+    if len(calls) == 1:
+        func, *args = calls[0]
+        return [func(*args)]
+    # Copy the caller's context so the instrumentation tags follow each call
+    futures = [
+        _fan_out_pool.submit(contextvars.copy_context().run, func, *args)
+        for func, *args in calls
+    ]
+    return [future.result() for future in futures]
+
+
+# ================ Pipelined Batches ==========================================
+@lru_cache(maxsize=256)
+def _compile_for(query, dialect):
+    return query.compile(dialect=dialect)
+
+
+def batch(queries) -> list[list[dict]]:
+    """Run several statements in one network round trip.
+
+    queries is a sequence of (statement, params) pairs, e.g. from
+    registry.statement. Returns each statement's rows as a list of dicts,
+    in order.
+
+    On psycopg 3 the statements go out in pipeline mode: all of them are
+    sent before the first result is read, so the batch waits for one round
+    trip instead of one per statement. Other drivers run them one after
+    another on a single connection. before/after_cursor_execute listeners
+    on the engine see every statement either way.
+
+    The batch runs in autocommit, which saves the BEGIN and ROLLBACK round
+    trips; each statement reads its own snapshot, so keep batches read-only.
+
+    Example:
+        snapshot_rows, moment_rows = q.batch([
+            (statement("tests_cmjr", "snapshot", cols), {"name": ..., "test_date": ...}),
+            (POPULATION_STATS_QUERY, {"test_type": "tests_cmjr", ...}),
+        ])
+    """
+    with get_engine().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if conn.dialect.driver != "psycopg":
+            return [
+                [dict(row) for row in conn.execute(query, params).mappings()]
+                for query, params in queries
+            ]
+
+        driver_conn = conn.connection.driver_connection
+        sent = []
+        with driver_conn.pipeline():
+            for query, params in queries:
+                compiled = _compile_for(query, conn.dialect)
+                sql = str(compiled)
+                parameters = compiled.construct_params(params)
+                cursor = driver_conn.cursor()
+                conn.dispatch.before_cursor_execute(conn, cursor, sql, parameters, None, False)
+                cursor.execute(sql, parameters)
+                sent.append((cursor, sql, parameters))
+        # Leaving the pipeline block syncs: every result has arrived
+
+        results = []
+        for cursor, sql, parameters in sent:
+            conn.dispatch.after_cursor_execute(conn, cursor, sql, parameters, None, False)
+            columns = [column.name for column in cursor.description or ()]
+            results.append([dict(zip(columns, row)) for row in cursor.fetchall()])
+            cursor.close()
+        return results
+
+
+# ================ Backend Selection ==========================================
+if QUERY_BACKEND == "columnar":
+    from .columnar import enable_columnar
+
+    enable_columnar()
+elif QUERY_BACKEND == "portable":
+    from .portable import enable_portable
+
+    enable_portable()
@@ -0,0 +1,221 @@
+"""Page startup data kept current by a background thread.
+
+The pages build their layouts from data that used to be queried once at
+import (the dropdown rosters), so new athletes only appeared after a
+restart. A value registered with the refresher is computed on first read
+and then recomputed off the request path: a daemon thread reads the
+watermark of the value's test table every STARTUP_REFRESH_SECONDS and
+recomputes only when it moved.
+
+Each value is held as one (watermark, value) tuple that a refresh replaces
+with a single assignment, so readers always see a complete old or new
+value and never wait on a refresh in progress. Values should be immutable
+(tuples, not lists). A failed refresh keeps serving the previous value and
+is retried on the next check.
+
+Nothing here touches the database at import or registration. Layouts read
+with peek(), which never blocks: before the first load finishes it returns
+a default and has the thread load the value in the background, so a page
+renders (in a loading state) even while the database is slow or down.
+readiness_probe() reports whether every value has loaded, for a /ready
+route.
+
+    athlete_names = refresher.register(
+        "athlete_names", lambda: tuple(q.get_athlete_names()), "tests_cmjr"
+    )
+    options = [{"label": name, "value": name} for name in athlete_names.value]
+"""
+
+import logging
+import os
+import threading
+
+from .cache import get_watermark
+from .config import STARTUP_REFRESH_SECONDS, STARTUP_RETRY_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class Refreshed:
+    """One registered value; read it through .value (blocking) or .peek()."""
+
+    def __init__(self, name: str, compute, test_type: str, refresher: "Refresher"):
+        self.name = name
+        self.test_type = test_type
+        self._compute = compute
+        self._refresher = refresher
+        self._state: tuple | None = None
+        self._lock = threading.Lock()
+        self._wanted = False
+
+    @property
+    def value(self):
+        """The latest computed value; the first read computes it."""
+        self._refresher.ensure_running()
+        state = self._state
+        if state is None:
+            with self._lock:
+                if self._state is None:
+                    self.refresh()
+            state = self._state
+        return state[1]
+
+    def peek(self, default=None):
+        """The latest value, or default (queueing a background load) before the first."""
+        state = self._state
+        if state is None:
+            self.want()
+            return default
+        return state[1]
+
+    def want(self) -> None:
+        """Have the refresh thread load this value now if it hasn't been."""
+        self._wanted = True
+        self._refresher.wake()
+
+    @property
+    def ready(self) -> bool:
+        return self._state is not None
+
+    @property
+    def watermark(self) -> tuple | None:
+        """Watermark the current value was computed at, or None before the first."""
+        state = self._state
+        return state[0] if state is not None else None
+
+    def refresh(self, force: bool = False) -> bool:
+        """Recompute if the table changed since the last computation (or force).
+
+        Returns whether the value was replaced.
+        """
+        # Read before computing: a test landing in between just refreshes next time
+        watermark = get_watermark(self.test_type)
+        if not force and self._state is not None and self._state[0] == watermark:
+            return False
+        self._state = (watermark, self._compute())
+        return True
+
+
+class Refresher:
+    """Registry of Refreshed values and the thread that keeps them current."""
+
+    def __init__(self, interval: float = STARTUP_REFRESH_SECONDS):
+        self.interval = interval
+        self._values: dict[str, Refreshed] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pid = None
+
+    def register(self, name: str, compute, test_type: str) -> Refreshed:
+        """Register compute() as name, recomputed when test_type's watermark moves.
+
+        Nothing is computed until the value is first read.
+        Raises ValueError if name is already registered.
+        """
+        with self._lock:
+            if name in self._values:
+                raise ValueError(f"Already registered: {name!r}")
+            value = Refreshed(name, compute, test_type, self)
+            self._values[name] = value
+        return value
+
+    def get(self, name: str):
+        """Current value of a registered name."""
+        return self._values[name].value
+
+    def refresh_due(self) -> list[str]:
+        """Recompute every read value whose table changed; returns their names.
+
+        Also loads values wanted (peeked) but not loaded yet.
+        """
+        refreshed = []
+        for value in list(self._values.values()):
+            if not value.ready and not value._wanted:
+                continue  # never read; its first read computes it
+            try:
+                if value.refresh():
+                    refreshed.append(value.name)
+            except Exception:
+                logger.exception("Refreshing %s failed; keeping the previous value", value.name)
+        return refreshed
+
+    def warm(self) -> None:
+        """Load every registered value in the background; returns immediately."""
+        for value in list(self._values.values()):
+            value._wanted = True
+        self.wake()
+
+    def wake(self) -> None:
+        """Run a refresh pass now instead of at the next interval."""
+        self.ensure_running()
+        self._wake.set()
+
+    def ready(self) -> bool:
+        """Whether every registered value has loaded."""
+        return all(value.ready for value in list(self._values.values()))
+
+    def status(self) -> dict:
+        """{name: loaded} for every registered value."""
+        return {name: value.ready for name, value in list(self._values.items())}
+
+    def ensure_running(self) -> None:
+        """Start the refresh thread in this process if it isn't running.
+
+        Threads don't survive fork, so a forked worker starts its own on
+        its first read. With interval <= 0 the thread only loads wanted
+        values and never rechecks loaded ones.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._stop = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, args=(self._stop,), name="startup-refresher", daemon=True
+            )
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _run(self, stop: threading.Event) -> None:
+        while True:
+            self._wake.wait(self._next_wait())
+            self._wake.clear()
+            if stop.is_set():
+                return
+            self.refresh_due()
+
+    def _next_wait(self) -> float | None:
+        pending = any(
+            value._wanted and not value.ready for value in list(self._values.values())
+        )
+        if pending:
+            # A first load failed (database down at boot); retry sooner
+            return STARTUP_RETRY_SECONDS
+        return self.interval if self.interval > 0 else None
+
+    def stop(self) -> None:
+        """Stop the refresh thread; the next read starts it again."""
+        with self._lock:
+            self._stop.set()
+            self._wake.set()
+            self._pid = None
+
+
+refresher = Refresher()
+
+
+def readiness_probe():
+    """Flask view for a readiness route: 200 once every value has loaded, else 503.
+
+    The first probe starts loading everything, so an orchestrator polling it
+    warms the process before sending it traffic.
+
+        app.server.add_url_rule("/ready", "ready", readiness_probe)
+    """
+    refresher.warm()
+    status = refresher.status()
+    ready = all(status.values())
+    return {"ready": ready, "loaded": status}, 200 if ready else 503
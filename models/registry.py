@@ -0,0 +1,109 @@
+"""Registry of compiled, parameterised statements for the query functions.
+
+Each statement is built once per (test_type, shape, metrics) and the same
+TextClause is handed back on every later call, so hot paths skip SQL string
+construction and SQLAlchemy reuses its compiled form. Because the text is
+identical on every execution, psycopg also prepares it server-side after
+DB_PREPARE_THRESHOLD runs on a connection and skips planning from then on.
+
+Only values are bound as parameters. Table and column names can't be, so
+they are checked against ROLLUP_TABLES and SNAPSHOT_COLUMNS instead of being
+interpolated from caller input.
+"""
+
+from functools import lru_cache
+
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+from .config import ROLLUP_TABLES, SNAPSHOT_COLUMNS
+
+
+def _avg(cols: tuple[str, ...]) -> str:
+    return ", ".join(cols)
+
+
+def _last5(cols: tuple[str, ...]) -> str:
+    return ", ".join(f"{col}_last5 AS {col}" for col in cols)
+
+
+def _combined(cols: tuple[str, ...]) -> str:
+    return ", ".join(f"SUM({col}_sum) / NULLIF(SUM({col}_n), 0) AS {col}" for col in cols)
+
+
+# shape -> builder(rollup table, metric columns) returning the SQL text
+SHAPES = {
+    # every athlete with at least one trial
+    "names": lambda table, cols: (
+        f"SELECT DISTINCT athlete_name FROM {table} ORDER BY athlete_name"
+    ),
+    # the athlete's test dates, most recent first
+    "dates": lambda table, cols: (
+        f"SELECT test_date FROM {table} "
+        "WHERE athlete_name = :name ORDER BY test_date DESC"
+    ),
+    # per-date means on :test_date
+    "date": lambda table, cols: (
+        f"SELECT {_avg(cols)} FROM {table} "
+        "WHERE athlete_name = :name AND test_date = :test_date"
+    ),
+    # per-date means on the earliest date
+    "baseline": lambda table, cols: (
+        f"SELECT {_avg(cols)} FROM {table} "
+        "WHERE athlete_name = :name ORDER BY test_date ASC LIMIT 1"
+    ),
+    # running last-5 means stored on the latest date
+    "last5": lambda table, cols: (
+        f"SELECT {_last5(cols)} FROM {table} "
+        "WHERE athlete_name = :name ORDER BY test_date DESC LIMIT 1"
+    ),
+    # trial-weighted means over all of the athlete's dates
+    "alltime": lambda table, cols: (
+        f"SELECT {_combined(cols)} FROM {table} WHERE athlete_name = :name"
+    ),
+    # trial-weighted means over the whole table
+    "team": lambda table, cols: f"SELECT {_combined(cols)} FROM {table}",
+    # per-date means for every date, oldest first
+    "trend": lambda table, cols: (
+        f"SELECT test_date, {_avg(cols)} FROM {table} "
+        "WHERE athlete_name = :name ORDER BY test_date ASC"
+    ),
+    # current, baseline and last-5 slots in one round trip
+    "snapshot": lambda table, cols: (
+        f"(SELECT 'current' AS slot, {_avg(cols)} FROM {table} "
+        "WHERE athlete_name = :name AND test_date = :test_date) "
+        "UNION ALL "
+        f"(SELECT 'baseline' AS slot, {_avg(cols)} FROM {table} "
+        "WHERE athlete_name = :name ORDER BY test_date ASC LIMIT 1) "
+        "UNION ALL "
+        f"(SELECT 'last5' AS slot, {_last5(cols)} FROM {table} "
+        "WHERE athlete_name = :name ORDER BY test_date DESC LIMIT 1)"
+    ),
+}
+
+
+def statement(test_type: str, shape: str, metrics=()) -> TextClause:
+    """Get the compiled statement for a shape over test_type's rollup table.
+
+    test_type can be tests_cmj or tests_cmjr; metrics is any sequence of
+    that table's SNAPSHOT_COLUMNS, selected in the given order.
+    Raises ValueError for an unknown test type, shape or metric.
+    """
+    return _compile(test_type, shape, tuple(metrics))
+
+
+@lru_cache(maxsize=None)
+def _compile(test_type: str, shape: str, metrics: tuple[str, ...]) -> TextClause:
+    if test_type not in ROLLUP_TABLES:
+        raise ValueError(f"Unknown test type: {test_type!r}")
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown query shape: {shape!r}")
+    unknown = [col for col in metrics if col not in SNAPSHOT_COLUMNS[test_type]]
+    if unknown:
+        raise ValueError(f"Unknown {test_type} metrics: {', '.join(unknown)}")
+    return text(SHAPES[shape](ROLLUP_TABLES[test_type], metrics))
+
+
+def compiled_count() -> int:
+    """Number of distinct statements compiled so far (sizes prepared_max)."""
+    return _compile.cache_info().currsize
@@ -0,0 +1,95 @@
+"""Keeping in-process copies of the test tables in step with Postgres.
+
+A copy (columnar.py, analytics.py) records the Position it holds: how many
+trials, the newest timestamp and the data_watermarks (version, rewrites)
+they were read at. fetch_changes() compares that with the live watermark
+and returns either the newer trials to append or every trial to rebuild
+from. Appending is only valid while the table has seen nothing but inserts
+of newer trials: rewrites counts UPDATE / DELETE statements (migration 005)
+and the trial count catches back-dated inserts.
+"""
+
+from functools import lru_cache
+from typing import NamedTuple
+
+from sqlalchemy import text
+
+from .config import SNAPSHOT_COLUMNS
+from .db import get_engine
+
+# Leading columns of every fetched trial; the table's SNAPSHOT_COLUMNS follow
+TRIAL_COLUMNS = ("athlete_name", "test_date", "athlete_teams", "timestamp")
+
+WATERMARK_QUERY = text(
+    "SELECT row_count, version, rewrites FROM data_watermarks "
+    "WHERE test_type = :test_type AND athlete_name = ''"
+)
+
+
+class Position(NamedTuple):
+    """How far a copy of a test table has read."""
+
+    trial_count: int
+    max_timestamp: float | None
+    # (version, rewrites) the trials were read at; None when unknown (files)
+    watermark: tuple | None
+
+
+EMPTY_POSITION = Position(0, None, None)
+
+
+def trial_columns(test_type: str) -> list[str]:
+    """Column names of the rows fetch_changes() returns for test_type."""
+    return list(TRIAL_COLUMNS) + SNAPSHOT_COLUMNS[test_type]
+
+
+@lru_cache(maxsize=None)
+def _trials_query(test_type: str, newer_only: bool):
+    if test_type not in SNAPSHOT_COLUMNS:
+        raise ValueError(f"Unknown test type: {test_type!r}")
+    where = " WHERE timestamp > :after" if newer_only else ""
+    return text(f"SELECT {', '.join(trial_columns(test_type))} FROM {test_type}{where}")
+
+
+def advance(position: Position, rows: list, watermark: tuple | None) -> Position:
+    """Position after also reading rows at watermark."""
+    newest = [row[3] for row in rows if row[3] is not None]
+    if position.max_timestamp is not None:
+        newest.append(position.max_timestamp)
+    return Position(
+        position.trial_count + len(rows),
+        float(max(newest)) if newest else None,
+        watermark,
+    )
+
+
+def fetch_changes(test_type: str, held: Position | None) -> tuple[bool, list, Position] | None:
+    """Trials a copy holding `held` needs to match test_type in Postgres.
+
+    Returns None when the copy is current, (True, rows, position) when the
+    newer trials in rows can be appended, or (False, rows, position) when the
+    copy must be rebuilt from rows (every trial). held=None always rebuilds.
+    The watermark and rows are read in one REPEATABLE READ snapshot. A held
+    watermark of None (e.g. loaded from files) is trusted to be an
+    insert-only prefix of the table, checked by trial count alone.
+    """
+    engine_conn = get_engine().connect()
+    with engine_conn.execution_options(isolation_level="REPEATABLE READ") as conn:
+        with conn.begin():
+            row = conn.execute(WATERMARK_QUERY, {"test_type": test_type}).fetchone()
+            row_count, version, rewrites = row if row is not None else (0, 0, 0)
+            watermark = (version, rewrites)
+            if held is not None and held.watermark == watermark:
+                return None
+            if (
+                held is not None
+                and held.max_timestamp is not None
+                and (held.watermark is None or held.watermark[1] == rewrites)
+            ):
+                newer = conn.execute(
+                    _trials_query(test_type, True), {"after": held.max_timestamp}
+                ).fetchall()
+                if held.trial_count + len(newer) == row_count:
+                    return True, newer, advance(held, newer, watermark)
+            rows = conn.execute(_trials_query(test_type, False)).fetchall()
+            return False, rows, advance(EMPTY_POSITION, rows, watermark)
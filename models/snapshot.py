@@ -0,0 +1,185 @@
+"""Cold-start snapshot of the test tables as Parquet files.
+
+Booting a columnar or DuckDB copy from Postgres reads every trial, so it
+scales with the tables. A snapshot directory (SNAPSHOT_DIR, needs the
+pyarrow package) holds, per test table:
+
+    {test_type}.parquet           the trial columns of replica.py, as read by
+                                  DuckDBAnalytics (ANALYTICS_PARQUET_DIR)
+    {test_type}.partials.parquet  the columnar store's precomputed state:
+                                  per-(athlete, date) SUM / COUNT columns,
+                                  sorted by athlete then date, with the
+                                  population moments and team rosters
+
+Both files carry the replica Position they were read at in their key-value
+metadata, so a copy booted from them fetches only the newer trials (or
+rebuilds, if the table was rewritten since; see replica.fetch_changes).
+Files are written to a temporary name and renamed into place, so readers
+never see a partial file.
+
+Write or refresh a snapshot from the repository root, e.g. from cron:
+    python -m models.snapshot [DIRECTORY]
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+
+from .columnar import _Table, _Trials
+from .config import SNAPSHOT_COLUMNS, SNAPSHOT_DIR
+from .replica import Position, fetch_changes
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = pq = None
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("The snapshot files need the pyarrow package")
+
+
+def _paths(directory: str, test_type: str) -> tuple[str, str]:
+    """(trials, partials) file paths of test_type in directory."""
+    return (
+        os.path.join(directory, f"{test_type}.parquet"),
+        os.path.join(directory, f"{test_type}.partials.parquet"),
+    )
+
+
+def _stamp(position: Position) -> dict:
+    version, rewrites = position.watermark or (None, None)
+    return {
+        # [version, rewrites], as analytics.py reads it
+        "watermark": json.dumps(list(position.watermark) if position.watermark else None),
+        "position": json.dumps(
+            [position.trial_count, position.max_timestamp, version, rewrites]
+        ),
+    }
+
+
+def _position(metadata: dict) -> Position:
+    count, newest, version, rewrites = json.loads(metadata[b"position"])
+    return Position(count, newest, (version, rewrites) if version is not None else None)
+
+
+def _write(table, path: str, metadata: dict) -> None:
+    """Write table to path with metadata, replacing any existing file atomically."""
+    table = table.replace_schema_metadata(metadata)
+    partial = f"{path}.tmp-{os.getpid()}"
+    pq.write_table(table, partial, compression="zstd")
+    os.replace(partial, path)
+
+
+def _trials_table(test_type: str, rows: list, trials: _Trials):
+    cols = SNAPSHOT_COLUMNS[test_type]
+    teams = [t if isinstance(t, list) else None for t in trials.teams]
+    return pa.table(
+        {
+            "athlete_name": pa.array(trials.names.tolist(), pa.string()),
+            # NaT and NaN (NULL in Postgres) become Parquet nulls
+            "test_date": pa.array(trials.dates, pa.date32(), from_pandas=True),
+            "athlete_teams": pa.array(teams, pa.list_(pa.string())),
+            "timestamp": pa.array([row[3] for row in rows], pa.float64()),
+            **{
+                col: pa.array(trials.values[:, i], pa.float64(), from_pandas=True)
+                for i, col in enumerate(cols)
+            },
+        }
+    )
+
+
+def _partials_table(table: _Table):
+    return pa.table(
+        {
+            "athlete_name": pa.array(table.names.tolist(), pa.string()),
+            "test_date": pa.array(table.dates, pa.date32()),
+            **{f"{col}_sum": table.sums[:, i] for i, col in enumerate(table.metrics)},
+            **{f"{col}_n": table.counts[:, i] for i, col in enumerate(table.metrics)},
+        }
+    )
+
+
+def write_snapshot(directory: str = SNAPSHOT_DIR, test_types=tuple(SNAPSHOT_COLUMNS)) -> dict:
+    """Write the snapshot files of test_types to directory.
+
+    Each table is read in one REPEATABLE READ snapshot. Returns
+    {test_type: Position written}.
+    """
+    _require_pyarrow()
+    if not directory:
+        raise ValueError("No snapshot directory given (set SNAPSHOT_DIR)")
+    os.makedirs(directory, exist_ok=True)
+    written = {}
+    for test_type in test_types:
+        _, rows, position = fetch_changes(test_type, None)
+        trials = _Trials(rows, len(SNAPSHOT_COLUMNS[test_type]))
+        table = _Table.empty(test_type).append(trials, position)
+        trials_path, partials_path = _paths(directory, test_type)
+        _write(_trials_table(test_type, rows, trials), trials_path, _stamp(position))
+        moments = {
+            segment: [part.tolist() for part in parts] for segment, parts in table.moments.items()
+        }
+        rosters = {team_id: sorted(names) for team_id, names in table.team_athletes.items()}
+        _write(
+            _partials_table(table),
+            partials_path,
+            {
+                **_stamp(position),
+                "moments": json.dumps(moments),
+                "team_athletes": json.dumps(rosters),
+            },
+        )
+        written[test_type] = position
+    return written
+
+
+def read_table(test_type: str, directory: str = SNAPSHOT_DIR) -> _Table | None:
+    """The columnar state of test_type saved in directory, or None without one.
+
+    Also None without pyarrow, or when the file was written for other
+    SNAPSHOT_COLUMNS.
+    """
+    if pa is None or not directory:
+        return None
+    path = _paths(directory, test_type)[1]
+    if not os.path.exists(path):
+        return None
+    data = pq.read_table(path)
+    cols = SNAPSHOT_COLUMNS[test_type]
+    expected = ["athlete_name", "test_date"]
+    expected += [f"{col}_sum" for col in cols] + [f"{col}_n" for col in cols]
+    if data.column_names != expected:
+        return None
+    metadata = data.schema.metadata
+    rows = data.num_rows
+    sums = np.empty((rows, len(cols)))
+    counts = np.empty((rows, len(cols)), dtype=np.int64)
+    for i, col in enumerate(cols):
+        sums[:, i] = data[f"{col}_sum"].to_numpy()
+        counts[:, i] = data[f"{col}_n"].to_numpy()
+    moments = {
+        segment: (np.array(n, dtype=np.int64), np.array(mean), np.array(m2))
+        for segment, (n, mean, m2) in json.loads(metadata[b"moments"]).items()
+    }
+    rosters = json.loads(metadata[b"team_athletes"])
+    return _Table(
+        test_type,
+        data["athlete_name"].to_numpy(zero_copy_only=False).astype(str),
+        data["test_date"].to_numpy(zero_copy_only=False).astype("datetime64[D]"),
+        sums,
+        counts,
+        moments,
+        {team_id: set(names) for team_id, names in rosters.items()},
+        _position(metadata),
+    )
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else SNAPSHOT_DIR
+    for test_type, position in write_snapshot(target).items():
+        print(f"{test_type}: {position.trial_count} trials at watermark {position.watermark}")
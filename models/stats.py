@@ -0,0 +1,66 @@
+"""Mergeable population moments (count / mean / M2) used for z-score scaling.
+
+The population_moments table stores one Moments row per (test_type, segment,
+metric). Triggers fold each inserted, updated or deleted batch into it with
+the same merge as merge_moments below, so the stats never need a full scan.
+"""
+
+import math
+from functools import reduce
+from typing import Iterable, NamedTuple
+
+
+class Moments(NamedTuple):
+    """Count, mean and sum of squared deviations (M2) of a set of values."""
+
+    n: int
+    mean: float
+    m2: float
+
+
+EMPTY_MOMENTS = Moments(0, 0.0, 0.0)
+
+
+def moments_from_values(values: Iterable[float | None]) -> Moments:
+    """Accumulate Moments over values with Welford's update, skipping None."""
+    n, mean, m2 = 0, 0.0, 0.0
+    for value in values:
+        if value is None:
+            continue
+        n += 1
+        delta = float(value) - mean
+        mean += delta / n
+        m2 += delta * (float(value) - mean)
+    return Moments(n, mean, m2)
+
+
+def merge_moments(a: Moments, b: Moments) -> Moments:
+    """Combine the moments of two disjoint partitions (Chan et al.).
+
+    Associative, so partitions computed in parallel can be merged in any
+    grouping. Passing b with negated n and m2 removes a partition instead.
+    """
+    n = a.n + b.n
+    if n == 0:
+        return EMPTY_MOMENTS
+    delta = b.mean - a.mean
+    mean = a.mean + delta * b.n / n
+    m2 = a.m2 + b.m2 + delta * delta * a.n * b.n / n
+    return Moments(n, mean, max(m2, 0.0))
+
+
+def combine_moments(parts: Iterable[Moments]) -> Moments:
+    """Merge any number of partition moments into one."""
+    return reduce(merge_moments, parts, EMPTY_MOMENTS)
+
+
+def moments_to_stats(moments: Moments) -> dict:
+    """Convert Moments to the {"mean", "std"} dict the gauges scale with.
+
+    std is the population standard deviation; either value is None when it
+    can't be used for a z-score (no data, or zero spread).
+    """
+    if moments.n == 0:
+        return {"mean": None, "std": None}
+    std = math.sqrt(moments.m2 / moments.n)
+    return {"mean": moments.mean, "std": std if std > 0 else None}
@@ -1,6 +1,7 @@
-import plotly.graph_objects as go
 from dash import Dash, dcc, html
 
+from views.components import FIGURE_TEMPLATE, band_shape, line_shape
+
 
 # ====================== Color Palette & Theme ===================================
 COLORS = {
@@ -82,165 +83,138 @@ KPI_DATA = [
 ]
 
 
-# ====================== Chart Builders ===================================
-def create_grip_comparison_bar(metric: str, right_zscore: float, left_zscore: float) -> go.Figure:
-    fig = go.Figure()
-
-    fig.add_trace(go.Bar(
-        x=["Right", "Left"],
-        y=[right_zscore, left_zscore],
-        marker=dict(
-            color=[COLORS["right_bar"], COLORS["left_bar"]],
-            line=dict(width=0),
-        ),
-        text=[f"{right_zscore:.1f}", f"{left_zscore:.1f}"],
-        textposition="outside",
-        textfont=dict(size=14, color=COLORS["text_primary"], family=FONT_MONO),
-        width=0.5,
-    ))
-
+def create_grip_comparison_bar(metric: str, right_zscore: float, left_zscore: float) -> dict:
     pct_diff = abs(right_zscore - left_zscore)
     diff_color = COLORS["accent_green"] if pct_diff < 10 else (
         COLORS["accent_amber"] if pct_diff < 25 else COLORS["accent_red"]
     )
-
-    fig.add_hline(
-        y=50, line_dash="dot", line_color=COLORS["text_muted"],
-        line_width=1, opacity=0.5,
-    )
-
-    fig.update_layout(
-        **PLOTLY_LAYOUT_BASE,
-        title=dict(
-            text=f"<b>{metric}</b>",
-            x=0.5,
-            xanchor="center",
-            font=dict(size=14, color=COLORS["text_primary"]),
-        ),
-        height=260,
-        yaxis=dict(
-            title="Z-Score (0–100)",
-            gridcolor=COLORS["grid"],
-            zeroline=False,
-            range=[0, 105],
-            tickfont=dict(size=11, color=COLORS["text_secondary"]),
-            title_font=dict(size=10, color=COLORS["text_muted"]),
-        ),
-        xaxis=dict(
-            tickfont=dict(size=12, color=COLORS["text_secondary"]),
-        ),
-        showlegend=False,
-        bargap=0.35,
-        annotations=[
-            dict(
-                text=f"<b>{pct_diff:.1f} pt diff</b>",
-                x=0.5,
-                y=100,
-                xref="paper",
-                yref="y",
-                showarrow=False,
-                font=dict(size=11, color=diff_color),
-            )
-        ],
-    )
-    return fig
+    return {
+        "data": [{
+            "type": "bar",
+            "x": ["Right", "Left"],
+            "y": [right_zscore, left_zscore],
+            "marker": {
+                "color": [COLORS["right_bar"], COLORS["left_bar"]],
+                "line": {"width": 0},
+            },
+            "text": [f"{right_zscore:.1f}", f"{left_zscore:.1f}"],
+            "textposition": "outside",
+            "textfont": {"size": 14, "color": COLORS["text_primary"], "family": FONT_MONO},
+            "width": 0.5,
+        }],
+        "layout": {
+            **PLOTLY_LAYOUT_BASE,
+            "template": FIGURE_TEMPLATE,
+            "shapes": [line_shape("y", 50, COLORS["text_muted"], "dot", 1, 0.5)],
+            "title": {
+                "text": f"<b>{metric}</b>",
+                "x": 0.5,
+                "xanchor": "center",
+                "font": {"size": 14, "color": COLORS["text_primary"]},
+            },
+            "height": 260,
+            "yaxis": {
+                "title": {
+                    "text": "Z-Score (0–100)",
+                    "font": {"size": 10, "color": COLORS["text_muted"]},
+                },
+                "gridcolor": COLORS["grid"],
+                "zeroline": False,
+                "range": [0, 105],
+                "tickfont": {"size": 11, "color": COLORS["text_secondary"]},
+            },
+            "xaxis": {"tickfont": {"size": 12, "color": COLORS["text_secondary"]}},
+            "showlegend": False,
+            "bargap": 0.35,
+            "annotations": [{
+                "text": f"<b>{pct_diff:.1f} pt diff</b>",
+                "x": 0.5,
+                "y": 100,
+                "xref": "paper",
+                "yref": "y",
+                "showarrow": False,
+                "font": {"size": 11, "color": diff_color},
+            }],
+        },
+    }
 
 
-def create_asymmetry_chart(data: dict) -> go.Figure:
+def create_asymmetry_chart(data: dict) -> dict:
     metrics = list(data.keys())
     values = list(data.values())
-
-    bar_colors = []
-    for v in values:
-        abs_v = abs(v)
-        if abs_v < 10:
-            bar_colors.append(COLORS["accent_green"])
-        elif abs_v < 25:
-            bar_colors.append(COLORS["accent_amber"])
-        else:
-            bar_colors.append(COLORS["accent_red"])
-
-    fig = go.Figure()
-
-    fig.add_trace(go.Bar(
-        y=metrics,
-        x=values,
-        orientation="h",
-        marker=dict(
-            color=bar_colors,
-            line=dict(width=0),
-        ),
-        text=[f"{v:.1f}%" for v in values],
-        textposition="outside",
-        textfont=dict(size=13, color=COLORS["text_primary"], family=FONT_MONO),
-    ))
-
+    bar_colors = [
+        COLORS["accent_green"] if abs(v) < 10
+        else COLORS["accent_amber"] if abs(v) < 25
+        else COLORS["accent_red"]
+        for v in values
+    ]
     max_abs = max(abs(v) for v in values) if values else 1
     x_range = max(max_abs * 1.4, 15)
 
-    fig.add_vline(x=10, line_dash="dot", line_color=COLORS["accent_amber"], line_width=1, opacity=0.5)
-    fig.add_vline(x=-10, line_dash="dot", line_color=COLORS["accent_amber"], line_width=1, opacity=0.5)
-    fig.add_vline(x=25, line_dash="dot", line_color=COLORS["accent_red"], line_width=1, opacity=0.4)
-    fig.add_vline(x=-25, line_dash="dot", line_color=COLORS["accent_red"], line_width=1, opacity=0.4)
-
-    fig.add_vrect(x0=-10, x1=10, fillcolor=COLORS["accent_green"], opacity=0.08, line_width=0)
-
-    base_layout = {**PLOTLY_LAYOUT_BASE, "margin": dict(l=140, r=60, t=50, b=50)}
-    fig.update_layout(
-        **base_layout,
-        title=dict(
-            text="<b>CMJ Bilateral Leg Asymmetry</b>",
-            x=0.5,
-            xanchor="center",
-            font=dict(size=16, color=COLORS["text_primary"]),
-        ),
-        height=320,
-        xaxis=dict(
-            range=[-x_range, x_range],
-            zeroline=True,
-            zerolinewidth=2,
-            zerolinecolor=COLORS["text_muted"],
-            gridcolor=COLORS["grid"],
-            title="Asymmetry (%)",
-            title_font=dict(size=12, color=COLORS["text_secondary"]),
-            tickfont=dict(size=11, color=COLORS["text_secondary"]),
-        ),
-        yaxis=dict(
-            autorange="reversed",
-            tickfont=dict(size=13, color=COLORS["text_primary"]),
-        ),
-        showlegend=False,
-        annotations=[
-            dict(
-                text="<i>Normal</i>",
-                x=0,
-                y=-0.18,
-                xref="paper",
-                yref="paper",
-                showarrow=False,
-                font=dict(size=10, color=COLORS["accent_green"]),
-            ),
-            dict(
-                text="<i>Monitor</i>",
-                x=0.85,
-                y=-0.18,
-                xref="paper",
-                yref="paper",
-                showarrow=False,
-                font=dict(size=10, color=COLORS["accent_amber"]),
-            ),
-            dict(
-                text="<i>Flag</i>",
-                x=1.0,
-                y=-0.18,
-                xref="paper",
-                yref="paper",
-                showarrow=False,
-                font=dict(size=10, color=COLORS["accent_red"]),
-            ),
-        ],
-    )
-    return fig
+    def zone_label(text: str, x: float, color: str) -> dict:
+        return {
+            "text": f"<i>{text}</i>",
+            "x": x,
+            "y": -0.18,
+            "xref": "paper",
+            "yref": "paper",
+            "showarrow": False,
+            "font": {"size": 10, "color": color},
+        }
+
+    return {
+        "data": [{
+            "type": "bar",
+            "y": metrics,
+            "x": values,
+            "orientation": "h",
+            "marker": {"color": bar_colors, "line": {"width": 0}},
+            "text": [f"{v:.1f}%" for v in values],
+            "textposition": "outside",
+            "textfont": {"size": 13, "color": COLORS["text_primary"], "family": FONT_MONO},
+        }],
+        "layout": {
+            **PLOTLY_LAYOUT_BASE,
+            "margin": {"l": 140, "r": 60, "t": 50, "b": 50},
+            "template": FIGURE_TEMPLATE,
+            "shapes": [
+                line_shape("x", 10, COLORS["accent_amber"], "dot", 1, 0.5),
+                line_shape("x", -10, COLORS["accent_amber"], "dot", 1, 0.5),
+                line_shape("x", 25, COLORS["accent_red"], "dot", 1, 0.4),
+                line_shape("x", -25, COLORS["accent_red"], "dot", 1, 0.4),
+                band_shape(-10, 10, COLORS["accent_green"], 0.08),
+            ],
+            "title": {
+                "text": "<b>CMJ Bilateral Leg Asymmetry</b>",
+                "x": 0.5,
+                "xanchor": "center",
+                "font": {"size": 16, "color": COLORS["text_primary"]},
+            },
+            "height": 320,
+            "xaxis": {
+                "range": [-x_range, x_range],
+                "zeroline": True,
+                "zerolinewidth": 2,
+                "zerolinecolor": COLORS["text_muted"],
+                "gridcolor": COLORS["grid"],
+                "title": {
+                    "text": "Asymmetry (%)",
+                    "font": {"size": 12, "color": COLORS["text_secondary"]},
+                },
+                "tickfont": {"size": 11, "color": COLORS["text_secondary"]},
+            },
+            "yaxis": {
+                "autorange": "reversed",
+                "tickfont": {"size": 13, "color": COLORS["text_primary"]},
+            },
+            "showlegend": False,
+            "annotations": [
+                zone_label("Normal", 0, COLORS["accent_green"]),
+                zone_label("Monitor", 0.85, COLORS["accent_amber"]),
+                zone_label("Flag", 1.0, COLORS["accent_red"]),
+            ],
+        },
+    }
 
 
 # ====================== Layout Component Builders ===================================
@@ -0,0 +1,52 @@
+"""The page figure builders return plain dicts that plotly accepts unchanged.
+
+Dash serializes those dicts without plotly's property validation, so each
+one is validated here by go.Figure and must serialize to the same JSON
+through it, over the data shapes benchmarks/figures.py times.
+"""
+
+import json
+
+import plotly.graph_objects as go
+import pytest
+from plotly.io.json import to_json_plotly
+
+from benchmarks.figures import CASES
+from views.components import band_shape, line_label, line_shape
+
+SHAPES = [
+    pytest.param(builder, args, id=f"{label}[{shape}]")
+    for label, builder, shapes in CASES
+    for shape, args in shapes
+]
+
+
+@pytest.mark.parametrize("builder, args", SHAPES)
+def test_builder_serializes_unchanged_through_go_figure(builder, args):
+    figure = builder(*args)
+    validated = go.Figure(figure)
+    assert json.loads(to_json_plotly(figure)) == json.loads(to_json_plotly(validated))
+
+
+def test_helpers_match_plotly_shape_helpers():
+    figure = go.Figure()
+    figure.add_hline(
+        y=3.5,
+        line_dash="dash",
+        line_color="#d9534f",
+        line_width=2,
+        annotation_text="Team Avg: 3.50",
+        annotation_position="top right",
+        annotation_font_size=11,
+        annotation_font_color="#d9534f",
+    )
+    figure.add_vline(x=10, line_dash="dot", line_color="#888", line_width=1, opacity=0.5)
+    figure.add_vrect(x0=-10, x1=10, fillcolor="#2ecc71", opacity=0.08, line_width=0)
+    layout = figure.to_plotly_json()["layout"]
+
+    assert layout["shapes"] == [
+        line_shape("y", 3.5, "#d9534f", "dash"),
+        line_shape("x", 10, "#888", "dot", 1, 0.5),
+        band_shape(-10, 10, "#2ecc71", 0.08),
+    ]
+    assert layout["annotations"] == [line_label(3.5, "Team Avg: 3.50", "#d9534f", 11)]